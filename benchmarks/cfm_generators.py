@@ -0,0 +1,186 @@
+"""
+This module defines generators of synthetic feature models of a given size, used by the benchmarks. All generators
+are deterministic, the random shapes are seeded.
+
+The features are named f0, f1, ... in the order they are created, every fourth name is made longer, so that the
+benchmarks also cover names that are truncated. The group cardinalities are derived from the children like the editor
+does when features are added.
+
+Functions:
+    wide_cfm: Creates a feature model whose root has all other features as children.
+    deep_cfm: Creates a feature model that is a single chain of features.
+    balanced_cfm: Creates a feature model that is a complete tree with a fixed number of children per feature.
+    random_cfm: Creates a feature model whose features are attached to randomly chosen parents.
+    add_constraints: Adds random constraints between the features of a feature model.
+    generate_cfm: Creates a feature model of one of the shapes by name.
+"""
+
+import random
+from typing import Callable
+
+from cfmtoolbox import CFM, Cardinality, Constraint, Feature, Interval
+
+from cfmtoolbox_editor.utils.cfm_utils import (
+    derive_parent_group_cards_for_multiple_children,
+    derive_parent_group_cards_for_one_child,
+)
+
+
+def _feature(index: int, parent: Feature | None, rnd: random.Random) -> Feature:
+    name = f"f{index}" if index % 4 else f"f{index}_with_a_longer_name"
+    feature = Feature(
+        name=name,
+        instance_cardinality=Cardinality(
+            [Interval(rnd.randint(0, 1), rnd.choice([1, 2, None]))]
+        ),
+        group_type_cardinality=Cardinality([]),
+        group_instance_cardinality=Cardinality([]),
+        parent=parent,
+        children=[],
+    )
+    if parent is not None:
+        parent.children.append(feature)
+    return feature
+
+
+def _finish(root: Feature) -> CFM:
+    cfm = CFM(root=root, constraints=[])
+    for feature in cfm.features:
+        cards = [child.instance_cardinality for child in feature.children]
+        if len(cards) == 1:
+            group_cards = derive_parent_group_cards_for_one_child(cards[0])
+        elif cards:
+            group_cards = derive_parent_group_cards_for_multiple_children(cards)
+        else:
+            continue
+        feature.group_type_cardinality, feature.group_instance_cardinality = group_cards
+    return cfm
+
+
+def wide_cfm(size: int, seed: int = 0) -> CFM:
+    """
+    Creates a feature model whose root has all other features as children.
+
+    Args:
+        size (int): The number of features.
+        seed (int, optional): The seed of the random cardinalities.
+
+    Returns:
+        CFM: The feature model.
+    """
+    rnd = random.Random(seed)
+    root = _feature(0, None, rnd)
+    for index in range(1, size):
+        _feature(index, root, rnd)
+    return _finish(root)
+
+
+def deep_cfm(size: int, seed: int = 0) -> CFM:
+    """
+    Creates a feature model that is a single chain of features.
+
+    Args:
+        size (int): The number of features.
+        seed (int, optional): The seed of the random cardinalities.
+
+    Returns:
+        CFM: The feature model.
+    """
+    rnd = random.Random(seed)
+    root = feature = _feature(0, None, rnd)
+    for index in range(1, size):
+        feature = _feature(index, feature, rnd)
+    return _finish(root)
+
+
+def balanced_cfm(size: int, seed: int = 0, branching: int = 4) -> CFM:
+    """
+    Creates a feature model that is a complete tree: the features are added level by level, every feature gets the
+    given number of children before the next one gets any.
+
+    Args:
+        size (int): The number of features.
+        seed (int, optional): The seed of the random cardinalities.
+        branching (int, optional): The number of children per feature.
+
+    Returns:
+        CFM: The feature model.
+    """
+    rnd = random.Random(seed)
+    features = [_feature(0, None, rnd)]
+    for index in range(1, size):
+        features.append(_feature(index, features[(index - 1) // branching], rnd))
+    return _finish(features[0])
+
+
+def random_cfm(size: int, seed: int = 0) -> CFM:
+    """
+    Creates a feature model whose features are attached to randomly chosen, earlier created parents. The trees are
+    shallow with a few features that have many children, like many real models.
+
+    Args:
+        size (int): The number of features.
+        seed (int, optional): The seed of the shape and the random cardinalities.
+
+    Returns:
+        CFM: The feature model.
+    """
+    rnd = random.Random(seed)
+    features = [_feature(0, None, rnd)]
+    for index in range(1, size):
+        features.append(_feature(index, rnd.choice(features), rnd))
+    return _finish(features[0])
+
+
+def add_constraints(cfm: CFM, count: int, seed: int = 0) -> CFM:
+    """
+    Adds random requires and excludes constraints between the features of a feature model.
+
+    Args:
+        cfm (CFM): The feature model.
+        count (int): The number of constraints to add.
+        seed (int, optional): The seed of the random constraints.
+
+    Returns:
+        CFM: The feature model.
+    """
+    rnd = random.Random(seed)
+    features = cfm.features
+    if len(features) < 2:
+        return cfm
+    for _ in range(count):
+        first, second = rnd.sample(features, 2)
+        cfm.constraints.append(
+            Constraint(
+                require=rnd.random() < 0.5,
+                first_feature=first,
+                first_cardinality=Cardinality([Interval(1, None)]),
+                second_feature=second,
+                second_cardinality=Cardinality([Interval(rnd.randint(0, 2), None)]),
+            )
+        )
+    return cfm
+
+
+SHAPES: dict[str, Callable[[int, int], CFM]] = {
+    "wide": wide_cfm,
+    "deep": deep_cfm,
+    "balanced": balanced_cfm,
+    "random": random_cfm,
+}
+
+
+def generate_cfm(shape: str, size: int, constraints: int = 0, seed: int = 0) -> CFM:
+    """
+    Creates a feature model of one of the shapes "wide", "deep", "balanced" or "random".
+
+    Args:
+        shape (str): The name of the shape.
+        size (int): The number of features.
+        constraints (int, optional): The number of random constraints.
+        seed (int, optional): The seed of the random parts of the model.
+
+    Returns:
+        CFM: The feature model.
+    """
+    return add_constraints(SHAPES[shape](size, seed), constraints, seed)
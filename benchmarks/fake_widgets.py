@@ -0,0 +1,240 @@
+"""
+This module defines stand-ins for the Tk widgets used by the canvas and the constraints panel, so that drawing can
+be benchmarked without a display. The stand-ins store the items and rows in dictionaries and measure text with a
+fixed width per character. They cost much less than the real widgets, so the benchmarks using them measure the work
+done by the editor itself; use --tk (e.g. under Xvfb) to include the cost of Tk.
+
+Classes:
+    FakeFont: A font with a fixed width per character.
+    FakeCanvas: A canvas keeping its items in a dictionary.
+    FakeTreeview: A treeview keeping its rows in a dictionary.
+    FakeCanvasView: The canvas of the editor drawing on a FakeCanvas.
+    FakeConstraintsView: The constraints panel of the editor showing its rows in a FakeTreeview.
+"""
+
+import sys
+from collections import Counter
+from itertools import count
+from types import SimpleNamespace
+
+from cfmtoolbox_editor.ui.cfm_canvas import CFMCanvas
+from cfmtoolbox_editor.ui.cfm_constraints import CFMConstraints
+from cfmtoolbox_editor.utils.cfm_layout_worker import LayoutWorker
+from cfmtoolbox_editor.utils.cfm_text_width import CharacterWidthTable
+
+
+class FakeFont:
+    def __init__(self, character_width: int = 7):
+        self.character_width = character_width
+
+    def measure(self, text: str) -> int:
+        return self.character_width * len(text)
+
+    def __str__(self):
+        return f"FakeFont({self.character_width})"
+
+
+class FakeCanvas:
+    def __init__(self, width: int = 800, height: int = 400):
+        self.width = width
+        self.height = height
+        self.items: dict[int, SimpleNamespace] = {}
+        self._ids = count(1)
+        self._font = FakeFont()
+        # Number of calls per method that changes items, e.g. "create", "coords" or "itemconfig"
+        self.calls: Counter[str] = Counter()
+        # Item under the mouse pointer, found by the tag "current"
+        self.current: int | None = None
+        self.scrollregion: tuple[float, float, float, float] = (0, 0, 1000, 1000)
+        # Canvas coordinates of the top left corner of the widget
+        self.left = 0.0
+        self.top = 0.0
+
+    def _create(self, kind, *coords, **options):
+        self.calls["create"] += 1
+        item_id = next(self._ids)
+        self.items[item_id] = SimpleNamespace(kind=kind, coords=coords, options=options)
+        return item_id
+
+    def create_rectangle(self, *coords, **options):
+        return self._create("rectangle", *coords, **options)
+
+    def create_text(self, *coords, **options):
+        return self._create("text", *coords, **options)
+
+    def create_line(self, *coords, **options):
+        return self._create("line", *coords, **options)
+
+    def create_arc(self, *coords, **options):
+        return self._create("arc", *coords, **options)
+
+    def create_oval(self, *coords, **options):
+        return self._create("oval", *coords, **options)
+
+    def create_polygon(self, *coords, **options):
+        return self._create("polygon", *coords, **options)
+
+    def create_window(self, *coords, **options):
+        return self._create("window", *coords, **options)
+
+    def coords(self, item_id, *coords):
+        self.calls["coords"] += 1
+        self.items[item_id].coords = coords
+
+    def itemconfig(self, item_id, **options):
+        self.calls["itemconfig"] += 1
+        if isinstance(item_id, tuple):
+            item_id = item_id[0]
+        self.items[item_id].options.update(options)
+
+    itemconfigure = itemconfig
+
+    def bbox(self, item_id):
+        item = self.items[item_id]
+        x, y = item.coords[0], item.coords[1]
+        width = self._font.measure(item.options.get("text", ""))
+        return (
+            int(x - width / 2),
+            int(y - 7),
+            int(x + width / 2),
+            int(y + 7),
+        )
+
+    def delete(self, *item_ids):
+        self.calls["delete"] += 1
+        for item_id in item_ids:
+            if item_id == "all":
+                self.items.clear()
+            else:
+                self.items.pop(item_id, None)
+
+    def find_withtag(self, tag):
+        if tag == "current":
+            return (self.current,) if self.current in self.items else ()
+        return ()
+
+    def tag_raise(self, *args):
+        pass
+
+    def tag_lower(self, *args):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def config(self, **options):
+        if "scrollregion" in options:
+            self.scrollregion = options["scrollregion"]
+
+    configure = config
+
+    def scale(self, tag_or_id, x_origin, y_origin, x_scale, y_scale):
+        items = self.items.values() if tag_or_id == "all" else [self.items[tag_or_id]]
+        for item in items:
+            coords = list(item.coords)
+            coords[0::2] = [x_origin + (x - x_origin) * x_scale for x in coords[0::2]]
+            coords[1::2] = [y_origin + (y - y_origin) * y_scale for y in coords[1::2]]
+            item.coords = tuple(coords)
+
+    def xview_moveto(self, fraction):
+        x_min, _, x_max, _ = self.scrollregion
+        self.left = x_min + (x_max - x_min) * min(max(fraction, 0), 1)
+
+    def yview_moveto(self, fraction):
+        _, y_min, _, y_max = self.scrollregion
+        self.top = y_min + (y_max - y_min) * min(max(fraction, 0), 1)
+
+    def canvasx(self, x):
+        return self.left + x
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def after(self, ms, callback=None, *args):
+        # Callbacks are not run, the benchmarks draw synchronously
+        return "after"
+
+    def after_idle(self, callback, *args):
+        return "after"
+
+
+class FakeTreeview:
+    def __init__(self, height: int = 4):
+        self.height = height
+        self.rows: dict[str, tuple] = {}
+        self.order: list[str] = []
+        self._ids = count(1)
+
+    def cget(self, option):
+        return self.height
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def insert(self, parent, index, values):
+        row = f"I{next(self._ids)}"
+        self.rows[row] = tuple(values)
+        self.order.insert(len(self.order) if index == "end" else index, row)
+        return row
+
+    def item(self, row, option=None, values=None):
+        if values is None:
+            return self.rows[row]
+        self.rows[row] = tuple(values)
+
+    def move(self, row, parent, index):
+        self.order.remove(row)
+        self.order.insert(index, row)
+
+    def delete(self, *rows):
+        removed = set(rows)
+        for row in rows:
+            del self.rows[row]
+        self.order = [row for row in self.order if row not in removed]
+
+
+class _FakeScrollbar:
+    def set(self, first, last):
+        pass
+
+
+class FakeCanvasView(CFMCanvas):
+    """
+    The canvas of the editor drawing on a FakeCanvas. The layout is always computed synchronously.
+    """
+
+    def __init__(self, editor, click_handler):
+        super().__init__(None, None, editor, click_handler)
+        self.BACKGROUND_LAYOUT_THRESHOLD = sys.maxsize
+
+    def _create_canvas(self):
+        self.canvas = FakeCanvas()
+        self.node_tooltip = SimpleNamespace(
+            show_tip=lambda *args, **kwargs: None, hide_tip=lambda: None
+        )
+        self.layout_worker = LayoutWorker(self.canvas)
+        self.button_font = FakeFont()
+        self.text_font = FakeFont()
+        self.character_widths = CharacterWidthTable.from_font(self.text_font)
+        self.node_font = self.cardinality_font = FakeFont()
+        self.zoomed_fonts = []
+        self.text_height = 14
+
+
+class FakeConstraintsView(CFMConstraints):
+    """
+    The constraints panel of the editor showing its rows in a FakeTreeview.
+    """
+
+    def _create_constraints_frame(self):
+        self.constraints_tree = FakeTreeview()
+        self.constraints_scroll = _FakeScrollbar()
+
+    def _create_constraints_tooltip(self):
+        return None
@@ -0,0 +1,570 @@
+"""
+This module runs the benchmarks of the editor on synthetic feature models (see cfm_generators) and writes the results
+as JSON, so that regressions can be tracked by comparing the results of two runs.
+
+Usage:
+    python -m benchmarks.run_benchmarks [--sizes 100 1000 10000 100000] [--shapes wide deep balanced random]
+        [--benchmarks layout draw_model ...] [--repeat 3] [--constraints 0.1] [--output results.json]
+        [--compare baseline.json] [--max-slowdown 1.5] [--tk]
+
+By default, the canvas and the constraints panel draw on stand-ins of the Tk widgets (see fake_widgets), so the
+benchmarks run without a display. With --tk, the real widgets are used, e.g. under Xvfb.
+
+Every benchmark is repeated on a freshly prepared state; only the benchmarked call is timed, after a garbage
+collection. The results contain the single times and their minimum, median and mean in seconds. With --compare, the
+medians are compared to an earlier result file and the exit code is 1 if a benchmark became slower than allowed.
+
+Classes:
+    Widgets: Base class of the factories of the canvas and the constraints panel used by the benchmarks.
+    FakeWidgets: Creates the canvas and the constraints panel on stand-ins of the Tk widgets.
+    TkWidgets: Creates the canvas and the constraints panel on real Tk widgets.
+
+Functions:
+    measure: Times a function on freshly prepared states.
+    run_benchmarks: Runs benchmarks on models of the given shapes and sizes.
+    compare_results: Compares the results of two runs.
+    main: Runs the benchmarks from the command line.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from cfmtoolbox import CFM, Cardinality, Constraint, Interval
+
+from benchmarks.cfm_generators import SHAPES, generate_cfm
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import (
+    GraphLayoutCalculator,
+    LayoutCache,
+)
+from cfmtoolbox_editor.utils.cfm_click_handler import CFMClickHandler
+from cfmtoolbox_editor.utils.cfm_editor_undo_redo import UndoRedoManager
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_journal import (
+    Journal,
+    model_fingerprint,
+    read_journal,
+    replay_journal,
+)
+from cfmtoolbox_editor.utils.cfm_minimap_raster import MinimapRaster
+from cfmtoolbox_editor.utils.cfm_operations import RenameFeature, SetCardinality
+from cfmtoolbox_editor.utils.cfm_svg_export import SvgExporter
+from cfmtoolbox_editor.utils.cfm_utils import copy_cfm
+
+
+class Widgets:
+    """
+    Creates the canvas and the constraints panel the drawing benchmarks run on.
+    """
+
+    def canvas(self, editor):
+        raise NotImplementedError
+
+    def constraints(self, editor):
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Let the widgets process the pending changes.
+        """
+
+    def close(self):
+        """
+        Release the widgets after the last benchmark.
+        """
+
+
+class FakeWidgets(Widgets):
+    def canvas(self, editor):
+        from benchmarks.fake_widgets import FakeCanvasView
+
+        return FakeCanvasView(editor, CFMClickHandler())
+
+    def constraints(self, editor):
+        from benchmarks.fake_widgets import FakeConstraintsView
+
+        return FakeConstraintsView(None, editor, CFMClickHandler())
+
+
+class TkWidgets(Widgets):
+    def __init__(self):
+        import tkinter as tk
+
+        self.root = tk.Tk()
+        self.root.geometry("800x600")
+        self._frame = None
+
+    def _new_frame(self):
+        from tkinter import ttk
+
+        # Only the widgets of the latest benchmark run are kept
+        if self._frame is not None:
+            self._frame.destroy()
+        self._frame = ttk.Frame(self.root)
+        self._frame.pack(expand=True, fill="both")
+        return self._frame
+
+    def canvas(self, editor):
+        from cfmtoolbox_editor.ui.cfm_canvas import CFMCanvas
+
+        view = CFMCanvas(self._new_frame(), self.root, editor, CFMClickHandler())
+        view.BACKGROUND_LAYOUT_THRESHOLD = sys.maxsize
+        return view
+
+    def constraints(self, editor):
+        from cfmtoolbox_editor.ui.cfm_constraints import CFMConstraints
+
+        return CFMConstraints(self._new_frame(), editor, CFMClickHandler())
+
+    def flush(self):
+        # Let Tk process the changes, which is part of the cost of drawing
+        self.root.update_idletasks()
+
+    def close(self):
+        self.root.destroy()
+
+
+def measure(
+    setup: Callable[[], Any], run: Callable[[Any], Any], repeat: int
+) -> list[float]:
+    """
+    Times a function on freshly prepared states.
+
+    Args:
+        setup (Callable[[], Any]): Prepares the state for one run, not timed.
+        run (Callable[[Any], Any]): The timed function, called with the state.
+        repeat (int): The number of runs.
+
+    Returns:
+        list[float]: The time of every run in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        # Garbage of earlier runs is collected before, not during the timed call
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _deepest_leaf(cfm: CFM):
+    return cfm.features[-1]
+
+
+def _rename(cfm: CFM):
+    feature = _deepest_leaf(cfm)
+    feature.name += "_renamed"
+
+
+def _layout(cfm: CFM, widgets):
+    return (
+        lambda: GraphLayoutCalculator(cfm, {}, 120),
+        lambda calculator: calculator.compute_positions(),
+    )
+
+
+def _layout_incremental(cfm: CFM, widgets):
+    def setup():
+        model = copy_cfm(cfm)
+        cache = LayoutCache()
+        GraphLayoutCalculator(model, {}, 120, cache=cache).compute_positions()
+        _rename(model)
+        return GraphLayoutCalculator(model, {}, 120, cache=cache)
+
+    return setup, lambda calculator: calculator.compute_positions()
+
+
+def _drawn_view(cfm: CFM, widgets, draw: bool):
+    view = widgets.canvas(SimpleNamespace(cfm=cfm))
+    view.initialize()
+    if draw:
+        view.draw_model()
+        widgets.flush()
+    return view
+
+
+def _draw_model(cfm: CFM, widgets):
+    def run(view):
+        view.draw_model()
+        widgets.flush()
+
+    return lambda: _drawn_view(cfm, widgets, draw=False), run
+
+
+# The zoom factor of the draw_model.overview benchmark, below the detail threshold of the canvas
+OVERVIEW_ZOOM = 0.25
+
+
+def _draw_overview(cfm: CFM, widgets):
+    def setup():
+        view = _drawn_view(cfm, widgets, draw=False)
+        view.zoom_to(OVERVIEW_ZOOM)
+        return view
+
+    def run(view):
+        view.draw_model()
+        widgets.flush()
+
+    return setup, run
+
+
+def _redraw(cfm: CFM, widgets):
+    def setup():
+        model = copy_cfm(cfm)
+        view = _drawn_view(model, widgets, draw=True)
+        _rename(model)
+        return view
+
+    def run(view):
+        view.draw_model()
+        widgets.flush()
+
+    return setup, run
+
+
+def _history(cfm: CFM) -> tuple[UndoRedoManager, FeatureIndex]:
+    # A history with a snapshot of the model followed by a rename, and an index of the model like the editor keeps it
+    model = copy_cfm(cfm)
+    index = FeatureIndex(model)
+    manager = UndoRedoManager()
+    manager.set_initial_state(model)
+    manager.add_state(model)
+    operation = RenameFeature(_deepest_leaf(model).name, "renamed")
+    operation.apply(model, index)
+    manager.add_state(model, operation, index)
+    return manager, index
+
+
+def _add_state(cfm: CFM, widgets):
+    def setup():
+        manager = UndoRedoManager()
+        manager.set_initial_state(cfm)
+        return manager
+
+    return setup, lambda manager: manager.add_state(cfm)
+
+
+def _add_state_changed(cfm: CFM, widgets):
+    # A snapshot after the rename of the history, which only visits the path to the renamed feature
+    def setup():
+        manager, index = _history(cfm)
+        return manager, manager.current_state, index
+
+    def run(state):
+        manager, model, index = state
+        manager.add_state(model, index=index, changed=())
+
+    return setup, run
+
+
+def _undo(cfm: CFM, widgets):
+    return lambda: _history(cfm), lambda history: history[0].undo(history[1])
+
+
+def _redo(cfm: CFM, widgets):
+    def setup():
+        manager, index = _history(cfm)
+        manager.undo(index)
+        return manager, index
+
+    return setup, lambda history: history[0].redo(history[1])
+
+
+# The number of edits replayed by the journal.replay benchmark, independently of the size of the model
+JOURNAL_EDITS = 20000
+
+
+def _journal_replay(cfm: CFM, widgets):
+    def setup():
+        # The directory is removed when the state of the run is no longer used
+        directory = tempfile.TemporaryDirectory()
+        path = Path(directory.name) / "model.journal"
+        model = copy_cfm(cfm)
+        journal = Journal(path, model_fingerprint(model), checkpoint_interval=None)
+        index = FeatureIndex(model)
+        features = model.features
+        for number in range(JOURNAL_EDITS):
+            feature = features[number * 7919 % len(features)]
+            if number % 2:
+                operation = RenameFeature(feature.name, f"edited{number}")
+            else:
+                operation = SetCardinality(
+                    feature.name,
+                    "instance_cardinality",
+                    feature.instance_cardinality,
+                    Cardinality([Interval(0, number % 5 + 1)]),
+                )
+            journal.apply(operation, model, index)
+        journal.close()
+        return directory, path, copy_cfm(cfm)
+
+    def run(state):
+        _, path, model = state
+        replay_journal(model, read_journal(path).records, FeatureIndex(model))
+
+    return setup, run
+
+
+def _journal_checkpoint(cfm: CFM, widgets):
+    def setup():
+        directory = tempfile.TemporaryDirectory()
+        journal = Journal(Path(directory.name) / "model.journal", "")
+        return directory, journal
+
+    return setup, lambda state: state[1].checkpoint(cfm)
+
+
+def _export_svg(cfm: CFM, widgets):
+    def setup():
+        directory = tempfile.TemporaryDirectory()
+        return directory, Path(directory.name) / "model.svg"
+
+    # Includes the layout, like an export from the command line
+    return setup, lambda state: SvgExporter(cfm).export(state[1])
+
+
+def _minimap_update(cfm: CFM, widgets):
+    def setup():
+        model = copy_cfm(cfm)
+        raster = MinimapRaster(200, 150)
+        raster.update(
+            model.features, GraphLayoutCalculator(model, {}, 120).compute_positions()
+        )
+        _rename(model)
+        positions = GraphLayoutCalculator(model, {}, 120).compute_positions()
+        return raster, model.features, positions
+
+    return setup, lambda state: state[0].update(state[1], state[2])
+
+
+def _update_constraints(cfm: CFM, widgets):
+    def run(view):
+        view.update_constraints(cfm.constraints)
+        widgets.flush()
+
+    return lambda: widgets.constraints(SimpleNamespace(cfm=cfm)), run
+
+
+def _update_changed_constraints(cfm: CFM, widgets):
+    def setup():
+        view = widgets.constraints(SimpleNamespace(cfm=cfm))
+        view.update_constraints(cfm.constraints)
+        widgets.flush()
+        constraints = list(cfm.constraints)
+        if constraints:
+            first = constraints[0]
+            constraints[0] = Constraint(
+                require=not first.require,
+                first_feature=first.first_feature,
+                first_cardinality=Cardinality([Interval(2, None)]),
+                second_feature=first.second_feature,
+                second_cardinality=first.second_cardinality,
+            )
+        return view, constraints
+
+    def run(state):
+        view, constraints = state
+        view.update_constraints(constraints)
+        widgets.flush()
+
+    return setup, run
+
+
+# Benchmark name -> function creating the setup and the timed function for a model
+BENCHMARKS: dict[str, Callable[[CFM, Any], tuple[Callable, Callable]]] = {
+    "layout": _layout,
+    "layout.incremental": _layout_incremental,
+    "draw_model": _draw_model,
+    "draw_model.redraw": _redraw,
+    "draw_model.overview": _draw_overview,
+    "undo_redo.add_state": _add_state,
+    "undo_redo.add_state_changed": _add_state_changed,
+    "undo_redo.undo": _undo,
+    "undo_redo.redo": _redo,
+    "journal.replay": _journal_replay,
+    "journal.checkpoint": _journal_checkpoint,
+    "export.svg": _export_svg,
+    "minimap.update": _minimap_update,
+    "constraints.update": _update_constraints,
+    "constraints.update_changed": _update_changed_constraints,
+}
+
+
+def run_benchmarks(
+    shapes: list[str],
+    sizes: list[int],
+    benchmarks: list[str],
+    repeat: int = 3,
+    constraints: float = 0.1,
+    widgets: Widgets | None = None,
+    report: Callable[[dict[str, Any]], None] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Runs benchmarks on models of the given shapes and sizes.
+
+    Args:
+        shapes (list[str]): The shapes of the models, see cfm_generators.SHAPES.
+        sizes (list[int]): The numbers of features of the models.
+        benchmarks (list[str]): The names of the benchmarks, see BENCHMARKS.
+        repeat (int, optional): The number of runs of every benchmark.
+        constraints (float, optional): The number of constraints per feature.
+        widgets (Widgets, optional): Creates the canvas and the constraints panel. Defaults to FakeWidgets.
+        report (Callable[[dict[str, Any]], None], optional): Called with every result as soon as it is available.
+
+    Returns:
+        list[dict[str, Any]]: One result per benchmark, shape and size.
+    """
+    widgets = widgets or FakeWidgets()
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            cfm = generate_cfm(shape, size, int(size * constraints))
+            # Assigns the stable ids, which copies of the model keep
+            FeatureIndex(cfm)
+            for name in benchmarks:
+                setup, run = BENCHMARKS[name](cfm, widgets)
+                times = measure(setup, run, repeat)
+                result = {
+                    "benchmark": name,
+                    "shape": shape,
+                    "features": size,
+                    "constraints": len(cfm.constraints),
+                    "times": times,
+                    "min": min(times),
+                    "median": statistics.median(times),
+                    "mean": statistics.mean(times),
+                }
+                results.append(result)
+                if report is not None:
+                    report(result)
+    return results
+
+
+def _result_key(result: dict[str, Any]) -> tuple[str, str, int]:
+    return result["benchmark"], result["shape"], result["features"]
+
+
+def compare_results(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    max_slowdown: float,
+) -> list[tuple[dict[str, Any], float]]:
+    """
+    Compares the medians of the results of two runs.
+
+    Args:
+        results (list[dict[str, Any]]): The new results.
+        baseline (list[dict[str, Any]]): The results to compare with. Results without a counterpart are ignored.
+        max_slowdown (float): The allowed ratio of the new to the old median.
+
+    Returns:
+        list[tuple[dict[str, Any], float]]: The new results that are slower than allowed, with their ratio.
+    """
+    old_medians = {_result_key(result): result["median"] for result in baseline}
+    regressions = []
+    for result in results:
+        old_median = old_medians.get(_result_key(result))
+        if old_median:
+            ratio = result["median"] / old_median
+            if ratio > max_slowdown:
+                regressions.append((result, ratio))
+    return regressions
+
+
+def _print_result(result: dict[str, Any]):
+    print(
+        f"{result['benchmark']:<28}{result['shape']:<10}{result['features']:>8}"
+        f"{result['median'] * 1000:>12.2f} ms",
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the benchmarks from the command line, see the module documentation for the arguments.
+
+    Args:
+        argv (list[str], optional): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: The exit code, 1 if a benchmark became slower than allowed.
+    """
+    parser = argparse.ArgumentParser(description="Run the benchmarks of the editor.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument(
+        "--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES)
+    )
+    parser.add_argument(
+        "--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--constraints",
+        type=float,
+        default=0.1,
+        help="Number of constraints per feature.",
+    )
+    parser.add_argument("--output", type=Path, help="File to write the results to.")
+    parser.add_argument("--compare", type=Path, help="Results of an earlier run.")
+    parser.add_argument("--max-slowdown", type=float, default=1.5)
+    parser.add_argument(
+        "--tk", action="store_true", help="Draw on real Tk widgets (needs a display)."
+    )
+    args = parser.parse_args(argv)
+
+    widgets: Widgets = TkWidgets() if args.tk else FakeWidgets()
+    try:
+        results = run_benchmarks(
+            args.shapes,
+            args.sizes,
+            args.benchmarks,
+            args.repeat,
+            args.constraints,
+            widgets,
+            _print_result,
+        )
+    finally:
+        widgets.close()
+
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "widgets": "tk" if args.tk else "fake",
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressions = compare_results(results, baseline, args.max_slowdown)
+        for result, ratio in regressions:
+            print(
+                f"Regression: {result['benchmark']} on {result['shape']} with "
+                f"{result['features']} features is {ratio:.2f}x slower"
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
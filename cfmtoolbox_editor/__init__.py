@@ -1,8 +1,93 @@
+from pathlib import Path
+from typing import Annotated
+
+import typer
 from cfmtoolbox import app, CFM
-from cfmtoolbox_editor.cfm_editor import CFMEditorApp
+
+from cfmtoolbox_editor.utils.cfm_journal import journal_path
+from cfmtoolbox_editor.utils.cfm_model_edits import (
+    ModelEditError,
+    ModelEditor,
+    load_edit_script,
+)
+from cfmtoolbox_editor.utils.cfm_profiler import profiler
+from cfmtoolbox_editor.utils.cfm_svg_export import export_svg as write_svg
+
+
+# cfmtoolbox types commands as taking only the model, the options are additional arguments of the command line
+@app.command()  # type: ignore[type-var]
+def edit(
+    cfm: CFM,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile", help="Log the time spent in drawing, layout and history."
+        ),
+    ] = False,
+    profile_overlay: Annotated[
+        bool,
+        typer.Option(
+            "--profile-overlay",
+            help="Like --profile, and show the times of the last redraw on the canvas.",
+        ),
+    ] = False,
+    no_journal: Annotated[
+        bool,
+        typer.Option(
+            "--no-journal",
+            help="Do not record the edits next to the model for the recovery after a crash.",
+        ),
+    ] = False,
+) -> CFM:
+    """
+    Open the model in the editor.
+    """
+    # Imported here, so the plugin can be loaded without a display
+    from cfmtoolbox_editor.cfm_editor import CFMEditorApp
+
+    if profile or profile_overlay:
+        profiler.enable(overlay=profile_overlay)
+
+    # The edits are recorded next to the model file, see cfm_journal
+    path = (
+        None if no_journal or app.import_path is None else journal_path(app.import_path)
+    )
+    # cfmtoolbox exports the returned model. The journal is dropped once the model is opened in its edited state
+    return CFMEditorApp(journal_path=path).start(cfm)
+
+
+@app.command()  # type: ignore[type-var]
+def edit_script(cfm: CFM, script: Path) -> CFM:
+    """
+    Apply the edits of an edit script to the model without opening the editor.
+    """
+    editor = ModelEditor(cfm)
+    try:
+        editor.run_script(load_edit_script(script.read_text(encoding="utf-8")))
+    except ModelEditError as error:
+        app.err_console.print(f"{script}: {error}")
+        raise typer.Exit(code=1)
+    return cfm
 
 
-@app.command()
-def edit(cfm: CFM) -> CFM:
-    editor = CFMEditorApp()
-    return editor.start(cfm)
+@app.command()  # type: ignore[type-var]
+def export_svg(
+    cfm: CFM,
+    output: Path,
+    tile_size: Annotated[
+        int | None,
+        typer.Option(
+            "--tile-size",
+            help="Split the diagram into square tiles of this size in pixels.",
+        ),
+    ] = None,
+) -> CFM:
+    """
+    Write a diagram of the model to an SVG file without opening the editor.
+    """
+    try:
+        write_svg(cfm, output, None if tile_size is None else (tile_size, tile_size))
+    except (OSError, ValueError) as error:
+        app.err_console.print(f"{output}: {error}")
+        raise typer.Exit(code=1)
+    return cfm
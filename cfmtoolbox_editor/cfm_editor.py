@@ -8,39 +8,75 @@ Classes:
 """
 
 import tkinter as tk
+from pathlib import Path
+from typing import Iterable
 from tkinter import ttk
 from tkinter import messagebox
 
 from cfmtoolbox import Feature, CFM
 
 from cfmtoolbox_editor.ui.cfm_canvas import CFMCanvas
+from cfmtoolbox_editor.ui.cfm_minimap import CFMMinimap
 from cfmtoolbox_editor.ui.delete_feature_dialog import DeleteFeatureDialog
 from cfmtoolbox_editor.ui.feature_dialog import FeatureDialog
 
 from cfmtoolbox_editor.utils.cfm_shortcuts import ShortcutManager
 from cfmtoolbox_editor.utils.cfm_editor_undo_redo import UndoRedoManager
 from cfmtoolbox_editor.utils.cfm_click_handler import CFMClickHandler
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_journal import (
+    Journal,
+    JournalError,
+    model_fingerprint,
+    read_journal,
+    replay_journal,
+)
+from cfmtoolbox_editor.utils.cfm_profiler import profiled, profiler
+from cfmtoolbox_editor.utils.cfm_operations import (
+    CompositeOperation,
+    Operation,
+    RemoveConstraint,
+    RemoveFeature,
+    remove_constraints_of,
+)
 
 from cfmtoolbox_editor.ui.cfm_menubar import CFMMenuBar
 from cfmtoolbox_editor.ui.cfm_constraints import CFMConstraints
 
 
 class CFMEditorApp:
-    def __init__(self):
+    def __init__(self, journal_path: Path | None = None):
         """
         Initialize the CFMEditorApp with the necessary components and UI setup.
-        """
-        self.cfm = None
+
+        Args:
+            journal_path (Path, optional): The path of the journal recording the edits (see cfm_journal), usually
+                next to the model file. Without a path, no journal is written.
+        """
+        self.cfm: CFM | None = None
+        self.feature_index = FeatureIndex()
+        self.journal_path = journal_path
+        self.journal: Journal | None = None
+        self._journal_sync_scheduled = False
         self.root = tk.Tk()
         self.root.title("CFM Editor")
 
-        self.undo_redo_manager = UndoRedoManager()
+        # Undone and redone operations are recorded in the journal like new ones
+        self.undo_redo_manager = UndoRedoManager(apply=self._apply)
         self.shortcut_manager = ShortcutManager(self)
 
         self.click_handler = CFMClickHandler()
 
         self.CARDINALITY_FONT = ("Arial", 8)
 
+        # Deferred redraw: changes mark the canvas and the constraints as dirty, and both are redrawn once the
+        # pending events have been processed
+        self._redraw_scheduled = False
+        self._canvas_dirty = False
+        self._constraints_dirty = False
+
+        # Profiling is opt-in, the overlay is set up together with the canvas
+        profiler.configure_from_environment()
         self._setup_ui()
 
     def start(self, cfm: CFM) -> CFM:
@@ -54,12 +90,123 @@ class CFMEditorApp:
             CFM: The edited feature model.
         """
         self.cfm = cfm
+        self.feature_index.rebuild(self.cfm)
         self.undo_redo_manager.set_initial_state(self.cfm)
         self.canvas.initialize()
-        self.update_model_state()
+        # The model is unchanged since the initial state was taken
+        self.update_model_state(changed=())
+        self._open_journal()
         self.root.mainloop()
+        # The journal is kept with the fingerprint of the edited model, it is dropped once the model is opened in
+        # that state again, i.e. after the export
+        if self.journal is not None:
+            try:
+                self.journal.close(end=model_fingerprint(self.cfm))
+            except (OSError, JournalError):
+                pass
+            self.journal = None
+        if profiler.enabled:
+            profiler.log_summary()
         return self.cfm
 
+    def _open_journal(self):
+        # Offers to recover the edits of a journal left behind by a crash, then starts a new journal
+        if self.journal_path is None:
+            return
+        base = model_fingerprint(self.cfm)
+        contents = None
+        if self.journal_path.exists():
+            try:
+                contents = read_journal(self.journal_path)
+            except (OSError, JournalError) as error:
+                messagebox.showwarning(
+                    "Journal",
+                    f"The edit journal cannot be read and is discarded: {error}",
+                )
+        if contents is not None and contents.end == base:
+            # The journal ends in the state of the opened model, i.e. its edits have been saved
+            contents = None
+        recovered = False
+        if contents is not None and contents.base != base:
+            messagebox.showwarning(
+                "Journal",
+                f"The edit journal {self.journal_path} belongs to another version of the model and is discarded.",
+            )
+        elif (
+            contents is not None
+            and contents.records
+            and messagebox.askyesno(
+                "Recover Edits",
+                "The editor was not closed properly. Do you want to recover the unsaved edits?",
+            )
+        ):
+            try:
+                replay_journal(self.cfm, contents.records, self.feature_index)
+            except JournalError as error:
+                messagebox.showwarning(
+                    "Journal", f"Not all edits could be recovered: {error}"
+                )
+            # The recovered state is recorded as a snapshot, so the recovery is undone as one step
+            self.update_model_state()
+            recovered = True
+        try:
+            self.journal = Journal(self.journal_path, base)
+            if recovered:
+                self.journal.checkpoint(self.cfm)
+        except (OSError, JournalError) as error:
+            self._stop_journal(error)
+
+    def _apply(self, operation: Operation, cfm: CFM, index: FeatureIndex | None):
+        # Applies an operation to the edited model and records it in the journal
+        if self.journal is None:
+            operation.apply(cfm, index)
+            return
+        try:
+            self.journal.apply(operation, cfm, index)
+        except (OSError, JournalError) as error:
+            self._stop_journal(error)
+            return
+        self._schedule_journal_sync()
+
+    def _checkpoint_journal(self):
+        # Records a state that was restored from a snapshot instead of being reached by an operation
+        if self.journal is None or self.cfm is None:
+            return
+        try:
+            self.journal.checkpoint(self.cfm)
+        except (OSError, JournalError) as error:
+            self._stop_journal(error)
+
+    def _schedule_journal_sync(self):
+        # The journal syncs while edits follow each other, the timer syncs the last edits of a burst
+        if self.journal is not None and self.journal.pending:
+            if not self._journal_sync_scheduled:
+                self._journal_sync_scheduled = True
+                self.root.after(
+                    int(self.journal.sync_interval * 1000), self._sync_journal
+                )
+
+    def _sync_journal(self):
+        self._journal_sync_scheduled = False
+        if self.journal is None:
+            return
+        try:
+            self.journal.sync()
+        except OSError as error:
+            self._stop_journal(error)
+
+    def _stop_journal(self, error: Exception):
+        if self.journal is not None:
+            try:
+                self.journal.close()
+            except OSError:
+                pass
+        self.journal = None
+        messagebox.showwarning(
+            "Journal",
+            f"Writing the edit journal failed, the edits are no longer recorded: {error}",
+        )
+
     def _setup_ui(self):
         main_frame = ttk.Frame(self.root, width=800, height=600)
         main_frame.pack(expand=True, fill=tk.BOTH)
@@ -74,6 +221,9 @@ class CFMEditorApp:
         # Canvas (for model graph)
         self.canvas = CFMCanvas(main_frame, self.root, self, self.click_handler)
 
+        # Overview of the whole model beside the canvas
+        self.minimap = CFMMinimap(main_frame, self.canvas)
+
         # TODO: is that necessary?
         # Update the shortcut manager with the new editor instance
         self.shortcut_manager.update_editor(self)
@@ -95,40 +245,100 @@ class CFMEditorApp:
         """
         Reset the feature model to its initial state.
         """
-        original_state = self.undo_redo_manager.reset()
+        original_state = self.undo_redo_manager.reset(self.feature_index)
         if original_state:
             self._load_state(original_state)
 
+    @profiled("undo")
     def undo(self):
         """
         Undo the last action.
         """
-        previous_state = self.undo_redo_manager.undo()
+        previous_state = self.undo_redo_manager.undo(self.feature_index)
         if previous_state:
             self._load_state(previous_state)
 
+    @profiled("redo")
     def redo(self):
         """
         Redo the last undone action.
         """
-        next_state = self.undo_redo_manager.redo()
+        next_state = self.undo_redo_manager.redo(self.feature_index)
         if next_state:
             self._load_state(next_state)
 
     def _load_state(self, state: CFM):
-        self.cfm = state
-        self.canvas.initialize_feature_states(self.cfm.root)
-        self.canvas.draw_model()
-        self.update_constraints()
+        # Undone and redone operations update the index of the edited model, only restored models are indexed anew
+        if state is not self.cfm:
+            self.cfm = state
+            self.feature_index.rebuild(self.cfm)
+            self._checkpoint_journal()
+        # The expansion states are keyed by stable feature ids, so they still apply to the restored model
+        self.schedule_redraw()
 
-    def update_model_state(self):
+    @profiled("apply_operation")
+    def apply_operation(self, operation: Operation):
+        """
+        Apply an edit operation to the feature model and record it in the undo history.
+
+        Args:
+            operation (Operation): The operation to apply.
+        """
+        assert self.cfm is not None
+        self._apply(operation, self.cfm, self.feature_index)
+        self.update_model_state(operation)
+
+    def update_model_state(
+        self,
+        operation: Operation | None = None,
+        changed: Iterable[Feature] | None = None,
+    ):
         """
         Update the model state after any change.
+
+        Args:
+            operation (Operation, optional): The operation that caused the change. If omitted, a snapshot of the
+                whole model is recorded in the undo history.
+            changed (Iterable[Feature], optional): Without an operation, the features changed since the last update,
+                see UndoRedoManager.add_state. If omitted, the snapshot compares the whole model.
         """
+        assert self.cfm is not None
         self.canvas.cancel_add_constraint()
-        self.undo_redo_manager.add_state(self.cfm)
-        self.canvas.draw_model()
-        self.update_constraints()
+        self.undo_redo_manager.add_state(
+            self.cfm, operation, self.feature_index, changed
+        )
+        self.schedule_redraw()
+
+    def schedule_redraw(self, canvas: bool = True, constraints: bool = True):
+        """
+        Mark the canvas and/or the constraints as out of date and redraw them when Tk is idle. Any number of changes
+        made before that are drawn by a single redraw.
+
+        Args:
+            canvas (bool, optional): Whether the feature model on the canvas has to be redrawn. Defaults to True.
+            constraints (bool, optional): Whether the constraints have to be updated. Defaults to True.
+        """
+        if canvas:
+            # A layout still computed in the background is outdated by the change
+            self.canvas.cancel_layout()
+        self._canvas_dirty |= canvas
+        self._constraints_dirty |= constraints
+        if not self._redraw_scheduled:
+            self._redraw_scheduled = True
+            self.root.after_idle(self.flush_redraw)
+
+    @profiled("redraw")
+    def flush_redraw(self):
+        """
+        Redraw the parts marked as out of date by schedule_redraw immediately.
+        """
+        self._redraw_scheduled = False
+        if self._canvas_dirty:
+            self._canvas_dirty = False
+            self.canvas.draw_model()
+        if self._constraints_dirty:
+            self._constraints_dirty = False
+            self.update_constraints()
 
     def add_constraint(self, feature):
         """
@@ -158,8 +368,8 @@ class CFMEditorApp:
             f"{constraint.first_feature.name} and {constraint.second_feature.name}?",
         ):
             return
-        self.cfm.constraints.remove(constraint)
-        self.update_model_state()
+        index = self.feature_index.constraint_position(self.cfm.constraints, constraint)
+        self.apply_operation(RemoveConstraint(index))
 
     def add_feature(self, parent):
         """
@@ -196,13 +406,19 @@ class CFMEditorApp:
                 "Delete Feature",
                 f"Are you sure you want to delete the feature {feature.name} and related constraints?",
             ):
-                feature.parent.children.remove(feature)
-                self.cfm.constraints = [
-                    c
-                    for c in self.cfm.constraints
-                    if c.first_feature != feature and c.second_feature != feature
-                ]
-                self.update_model_state()
+                index = next(
+                    i for i, f in enumerate(feature.parent.children) if f is feature
+                )
+                self.apply_operation(
+                    CompositeOperation(
+                        [
+                            *remove_constraints_of(
+                                self.cfm, [feature], self.feature_index
+                            ),
+                            RemoveFeature(feature.parent.name, index),
+                        ]
+                    )
+                )
 
         # inner node
         else:
@@ -219,7 +435,8 @@ class CFMEditorApp:
             parent_widget=self.root,  # Pass the parent widget (e.g., the root window)
             feature=feature,  # The feature to be deleted
             cfm=self.cfm,  # The CFM model containing constraints and features
-            update_model_state_callback=self.update_model_state,  # Callback to update the model state
+            feature_index=self.feature_index,  # The index of the features and their constraints
+            apply_operation_callback=self.apply_operation,  # Callback to apply the deletion
             show_feature_dialog_callback=self.show_feature_dialog,  # Callback to open the feature dialog
         )
 
@@ -236,8 +453,9 @@ class CFMEditorApp:
         FeatureDialog(
             parent_widget=self.root,
             cfm=self.cfm,
+            feature_index=self.feature_index,
             add_expanded_feature_callback=self.add_expanded_feature,
-            update_model_state_callback=self.update_model_state,
+            apply_operation_callback=self.apply_operation,
             show_feature_dialog_callback=self.show_feature_dialog,
             parent_feature=parent,
             feature=feature,
@@ -271,7 +489,4 @@ class CFMEditorApp:
         Returns:
             Feature | None: The feature with the specified name, or None if no such feature exists.
         """
-        for feature in self.cfm.features:
-            if feature.name == name:
-                return feature
-        return None
+        return self.feature_index.get(name)
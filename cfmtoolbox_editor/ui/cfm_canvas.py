@@ -8,17 +8,43 @@ Classes:
 """
 
 import tkinter as tk
+from dataclasses import dataclass
 from math import degrees, atan2
 from tkinter import ttk, messagebox
 from tkinter.font import Font
-from typing import Dict
+from typing import TYPE_CHECKING, Dict
 
-from cfmtoolbox import Feature
+from cfmtoolbox import CFM, Feature
 
+from cfmtoolbox_editor.ui.cfm_profile_overlay import ProfileOverlay
 from cfmtoolbox_editor.ui.cfm_tooltip import ToolTip
-from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import Point, GraphLayoutCalculator
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import (
+    GraphLayoutCalculator,
+    LayoutCache,
+    Point,
+)
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+from cfmtoolbox_editor.utils.cfm_layout_worker import LayoutWorker, layout_snapshot
+from cfmtoolbox_editor.utils.cfm_profiler import profiled, profiler
+from cfmtoolbox_editor.utils.cfm_spatial_index import SpatialGrid
+from cfmtoolbox_editor.utils.cfm_text_width import (
+    CharacterWidthTable,
+    TextWidthCache,
+)
 from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_display_str
 
+if TYPE_CHECKING:
+    from cfmtoolbox_editor.ui.cfm_minimap import CFMMinimap
+
+
+@dataclass
+class _CanvasItem:
+    """A canvas item retained between redraws together with the state it was last drawn with."""
+
+    item_id: int
+    coords: tuple
+    options: dict
+
 
 class CFMCanvas:
     def __init__(
@@ -33,20 +59,82 @@ class CFMCanvas:
         self.editor = editor
         self.click_handler = click_handler
 
-        self.expanded_features: Dict[
-            int, bool
-        ] = {}  # Dictionary to track expanded/collapsed state of features
+        # Expanded/collapsed state and positions of the features, keyed by their stable ids (feature_uid), which are
+        # kept by the copies of the model that undo and redo restore
+        self.expanded_features: Dict[int, bool] = {}
         self.positions: Dict[int, Point] = {}
         self.currently_highlighted_feature: Feature | None = None
 
         self.info_label = None
         self.cancel_button_window = None
 
+        # Retained canvas items: feature key (feature_uid) -> role of the item (e.g. "rect" or "edge") -> drawn item
+        self._feature_items: dict[int, dict[str, _CanvasItem]] = {}
+        # Feature key -> (measured name, displayed text, truncated, text bbox relative to the node position)
+        self._node_labels: dict[
+            int, tuple[str, str, bool, tuple[int, int, int, int]]
+        ] = {}
+        # Feature key -> feature drawn in the last pass, used by the event bindings of retained items
+        self._drawn_features: dict[int, Feature] = {}
+        # Canvas item id -> (feature key, role of the item), used to resolve events on the canvas to features
+        self._item_features: dict[int, tuple[int, str]] = {}
+        self._hovered_item: int | None = None
+        # Feature the constraint being added starts at, None if no constraint is being added
+        self._constraint_start_feature: Feature | None = None
+        self._drawn_roles: dict[int, set[str]] = {}
+        self._items_created = False
+        # Feature name -> label as in _node_labels, shared by all features and kept for the whole session
+        self._label_cache: dict[
+            str, tuple[str, str, bool, tuple[int, int, int, int]]
+        ] = {}
+        self.text_widths = TextWidthCache()
+
         self.CARDINALITY_FONT = ("Arial", 8)
         self.MAX_NODE_WIDTH = 120
+        self.NODE_PADDING_X = 4
+        self.NODE_PADDING_Y = 2
+
+        # Viewport culling: if more features are shown than the threshold, only the features within the visible part
+        # of the canvas (extended by the margin) get canvas items.
+        self.CULLING_THRESHOLD = 1000
+        self.CULLING_MARGIN = 200
+
+        # From this number of shown features on, the layout is computed in a background thread
+        self.BACKGROUND_LAYOUT_THRESHOLD = 5000
+        # Contours of the subtrees from the last layout, so only changed subtrees are laid out again
+        self.layout_cache = LayoutCache()
+        self._culling = False
+        self._spatial_index = SpatialGrid()
+        # Feature key -> (pre-order index, feature, position of the feature instance cardinality)
+        self._culling_units: dict[int, tuple[int, Feature, str]] = {}
+        self._culled_keys: set[int] | None = None
+        self._culling_scheduled = False
+        # Whether the model or the expansion states changed since the positions were computed. The features of the
+        # model then no longer match the positions, so culling and redraws wait until the new layout is drawn.
+        self._layout_outdated = False
+
+        # Zoom: the canvas coordinates of the items are the positions of the features times the zoom factor. Below
+        # the detail threshold, the features are drawn as plain rectangles without names, cardinalities, collapse
+        # buttons and group arcs, so zoomed-out overviews of large models need only a fraction of the canvas items.
+        self.zoom = 1.0
+        self.MIN_ZOOM = 0.05
+        self.MAX_ZOOM = 4.0
+        self.ZOOM_STEP = 1.2
+        self.DETAIL_ZOOM_THRESHOLD = 0.5
+        # Scroll region in unzoomed coordinates
+        self._scroll_region: tuple[float, float, float, float] = (0, 0, 1000, 1000)
+
+        # Overview of the whole model beside the canvas, set by the minimap itself (see cfm_minimap)
+        self.minimap: "CFMMinimap | None" = None
 
         self._create_canvas()
 
+        # Breakdown of the last profiled frame, only shown if requested (see cfm_profiler)
+        self.profile_overlay: ProfileOverlay | None = None
+        if profiler.overlay:
+            self.profile_overlay = ProfileOverlay(self.canvas)
+            profiler.add_frame_listener(self.profile_overlay.show)
+
     def initialize(self):
         """
         Initialize the canvas by setting the initial states of all features.
@@ -55,15 +143,17 @@ class CFMCanvas:
 
     def initialize_feature_states(self, feature):
         """
-        Recursively initialize the expanded/collapsed states of all features.
+        Initialize the expanded/collapsed states of a feature and all of its descendants.
 
         Args:
             feature (Feature): The feature to initialize.
         """
         # Initialize all features as expanded
-        self.expanded_features[id(feature)] = True
-        for child in feature.children:
-            self.initialize_feature_states(child)
+        stack = [feature]
+        while stack:
+            current = stack.pop()
+            self.expanded_features[feature_uid(current)] = True
+            stack.extend(current.children)
 
     def _create_canvas(self):
         self._create_scrollbars()
@@ -76,11 +166,38 @@ class CFMCanvas:
             scrollregion=(0, 0, 1000, 1000),
         )
         self.canvas.config(
-            yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set
+            yscrollcommand=self._on_y_scroll, xscrollcommand=self._on_x_scroll
         )
         self.canvas.pack(expand=True, fill=tk.BOTH)
+        self.canvas.bind("<Configure>", self._schedule_culling, add="+")
+        # Events on features are handled by one binding per event type on the canvas instead of bindings per item
+        self.canvas.bind(self.click_handler.left_click(), self._on_canvas_left_click)
+        self.canvas.bind(self.click_handler.right_click(), self._on_canvas_right_click)
+        self.canvas.bind("<Motion>", self._on_canvas_motion)
+        self.canvas.bind("<Leave>", self._on_canvas_leave)
+        self.canvas.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self._on_mouse_wheel)
+        self.node_tooltip = ToolTip(self.canvas)
+        self.layout_worker = LayoutWorker(self.canvas)
         self.v_scroll.config(command=self.canvas.yview)
         self.h_scroll.config(command=self.canvas.xview)
+        self.button_font = Font(weight="bold")
+        # Font of the feature names (the default font of canvas text items)
+        self.text_font = Font(name="TkDefaultFont", exists=True)
+        # Character widths of the font, so the layout can measure names without calling into Tk
+        self.character_widths = CharacterWidthTable.from_font(self.text_font)
+        # Fonts of the drawn names and cardinalities, which are resized with the zoom together with the button font
+        self.node_font = self.text_font.copy()
+        self.cardinality_font = Font(
+            family=self.CARDINALITY_FONT[0], size=self.CARDINALITY_FONT[1]
+        )
+        self.zoomed_fonts = [
+            (font, font.actual("size"))
+            for font in (self.node_font, self.cardinality_font, self.button_font)
+        ]
+        # Height of a name, used for the nodes drawn without their names
+        self.text_height = self.text_font.metrics("linespace")
 
     def _create_scrollbars(self):
         self.v_scroll = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL)
@@ -91,13 +208,20 @@ class CFMCanvas:
 
     def clear(self):
         """
-        Clear all elements from the canvas.
+        Clear all elements from the canvas and forget the items drawn for the features.
         """
         self.canvas.delete("all")
+        self._feature_items = {}
+        self._node_labels = {}
+        self._drawn_features = {}
+        self._item_features = {}
+        self._hovered_item = None
+        self._culled_keys = None
 
     def configure_scroll_region(self, x_min, y_min, x_max, y_max):
         """
-        Configure the scroll region of the canvas.
+        Configure the scroll region of the canvas. The coordinates are those of the feature positions, they are
+        multiplied by the zoom factor.
 
         Args:
             x_min (int): Minimum x-coordinate of the scroll region.
@@ -105,17 +229,81 @@ class CFMCanvas:
             x_max (int): Maximum x-coordinate of the scroll region.
             y_max (int): Maximum y-coordinate of the scroll region.
         """
-        self.canvas.config(scrollregion=(x_min, y_min, x_max, y_max))
+        self._scroll_region = (x_min, y_min, x_max, y_max)
+        zoom = self.zoom
+        self.canvas.config(
+            scrollregion=(x_min * zoom, y_min * zoom, x_max * zoom, y_max * zoom)
+        )
 
+    @profiled("draw_model")
     def draw_model(self):
         """
         Draw the entire feature model on the canvas.
+
+        Canvas items are retained between calls: items of features that are still visible are only moved or
+        reconfigured if their geometry or appearance changed, items are created for newly visible features and
+        deleted for features that are no longer visible. Large models are culled to the visible part of the canvas,
+        the items of other features are created when they are scrolled into view.
+
+        The layout is computed on a snapshot of the shown features. From BACKGROUND_LAYOUT_THRESHOLD shown features
+        on, it is computed in a background thread and the model is drawn when the layout is ready. Until then, the
+        canvas keeps showing the last layout, which is neither culled again nor redrawn at another level of detail. If
+        the background computation fails, the layout is computed again on the Tk thread.
+        """
+        self._layout_outdated = True
+        snapshot, size = layout_snapshot(self.editor.cfm, self.expanded_features)
+        if size >= self.BACKGROUND_LAYOUT_THRESHOLD:
+            # The node widths are measured without the shared cache, which is not meant for other threads
+            character_widths, padding = self.character_widths, 2 * self.NODE_PADDING_X
+            self.layout_worker.submit(
+                snapshot,
+                self.MAX_NODE_WIDTH,
+                lambda name: character_widths.measure(name) + padding,
+                self._draw_layout,
+                self.layout_cache,
+                on_error=lambda error: self._draw_layout_on_tk_thread(snapshot),
+            )
+            return
+
+        self.layout_worker.cancel()
+        self._draw_layout_on_tk_thread(snapshot)
+
+    def _draw_layout_on_tk_thread(self, snapshot: CFM):
+        """
+        Compute the layout of a snapshot of the shown features and draw the model. Also used if the computation in
+        the background failed, so the canvas does not keep an outdated layout.
+
+        Args:
+            snapshot (CFM): The snapshot to lay out, see layout_snapshot.
+        """
+        self._draw_layout(
+            GraphLayoutCalculator(
+                snapshot,
+                {},
+                self.MAX_NODE_WIDTH,
+                self._node_width,
+                cache=self.layout_cache,
+            ).compute_positions()
+        )
+
+    def cancel_layout(self):
+        """
+        Discard the layout that is being computed in the background, e.g. because the model has changed since. The
+        drawn layout is outdated until draw_model is called again.
+        """
+        self._layout_outdated = True
+        self.layout_worker.cancel()
+
+    @profiled("draw_layout")
+    def _draw_layout(self, positions: dict[int, Point]):
+        """
+        Draw the model with the computed positions of the shown features.
+
+        Args:
+            positions (dict[int, Point]): The positions keyed by stable feature ids.
         """
-        self.positions = GraphLayoutCalculator(
-            self.editor.cfm, self.expanded_features, self.MAX_NODE_WIDTH
-        ).compute_positions()
-        self.clear()
-        self._draw_feature(self.editor.cfm.root, "middle")
+        self.positions = positions
+        self._layout_outdated = False
 
         min_x = min(pos.x for pos in self.positions.values())
         max_x = max(pos.x for pos in self.positions.values())
@@ -127,136 +315,502 @@ class CFMCanvas:
             min(min_x - padding_x, 0), 0, max_x + padding_x, max_y + padding_y
         )
 
-    def _draw_feature(self, feature: Feature, feature_instance_card_pos: str):
-        x, y = self.positions[id(feature)].x, self.positions[id(feature)].y
-        node_id, padded_bbox = self._draw_node(feature, x, y)
+        features = self._visible_features()
+        if self.minimap is not None:
+            self.minimap.update_layout(
+                [feature for feature, _ in features], self.positions
+            )
+        self._culling = len(features) > self.CULLING_THRESHOLD
+        if self._culling:
+            self._index_features(features)
+            self._culled_keys = None
+            self._update_culling()
+        else:
+            self._spatial_index.clear()
+            self._culling_units = {}
+            self._draw_features(features)
 
-        if not feature == self.editor.cfm.root:
-            self._draw_feat_instance_card(
-                feature, feature_instance_card_pos, padded_bbox, x
+    def _index_features(self, features: list[tuple[Feature, str]]):
+        """
+        Rebuild the spatial index over the areas covered by the items of the shown features.
+
+        Args:
+            features (list[tuple[Feature, str]]): The shown features in drawing order.
+        """
+        self._spatial_index.clear()
+        self._culling_units = {}
+        x_margin = self.MAX_NODE_WIDTH // 2 + 40
+        for index, (feature, feature_instance_card_pos) in enumerate(features):
+            position = self.positions[feature_uid(feature)]
+            # Node with cardinalities and collapse button, group arc and cardinalities below the node
+            x_min, y_min = position.x - x_margin, position.y - 40
+            x_max, y_max = position.x + x_margin, position.y + 50
+            if feature.parent is not None:
+                # Edge from the parent
+                parent_position = self.positions[feature_uid(feature.parent)]
+                x_min = min(x_min, parent_position.x)
+                x_max = max(x_max, parent_position.x)
+                y_min = min(y_min, parent_position.y)
+            self._spatial_index.insert(
+                feature_uid(feature), (x_min, y_min, x_max, y_max)
+            )
+            self._culling_units[feature_uid(feature)] = (
+                index,
+                feature,
+                feature_instance_card_pos,
             )
 
-        if feature.children:
-            self._draw_collapse_expand_button(feature, padded_bbox, y)
+    def _on_x_scroll(self, first, last):
+        self.h_scroll.set(first, last)
+        self._schedule_culling()
+        if self.minimap is not None:
+            self.minimap.update_viewport()
+        if self.profile_overlay is not None:
+            self.profile_overlay.place()
+
+    def _on_y_scroll(self, first, last):
+        self.v_scroll.set(first, last)
+        self._schedule_culling()
+        if self.minimap is not None:
+            self.minimap.update_viewport()
+        if self.profile_overlay is not None:
+            self.profile_overlay.place()
+
+    def _schedule_culling(self, event=None):
+        # Scrolling reports many small view changes, the culled items are updated once the events are processed.
+        if self._culling and not self._culling_scheduled:
+            self._culling_scheduled = True
+            self.canvas.after_idle(self._update_culling)
+
+    @profiled("update_culling")
+    def _update_culling(self):
+        """
+        Draw the features near the visible part of the canvas and delete the items of all other features.
+        """
+        self._culling_scheduled = False
+        if not self._culling or self._layout_outdated:
+            # An outdated layout is culled again when the new layout is drawn
+            return
+        keys = self._spatial_index.query(self.visible_area(self.CULLING_MARGIN))
+        if keys == self._culled_keys:
+            return
+        self._culled_keys = keys
+        units = sorted(
+            (self._culling_units[key] for key in keys), key=lambda unit: unit[0]
+        )
+        self._draw_features(
+            [
+                (feature, feature_instance_card_pos)
+                for _, feature, feature_instance_card_pos in units
+            ]
+        )
+
+    def visible_area(self, margin: int = 0) -> tuple[float, float, float, float]:
+        """
+        Get the visible part of the canvas in the coordinates of the feature positions.
+
+        Args:
+            margin (int, optional): The number of pixels the area is extended by on every side.
+
+        Returns:
+            tuple[float, float, float, float]: The area (x_min, y_min, x_max, y_max).
+        """
+        zoom = self.zoom
+        return (
+            (self.canvas.canvasx(0) - margin) / zoom,
+            (self.canvas.canvasy(0) - margin) / zoom,
+            (self.canvas.canvasx(self.canvas.winfo_width()) + margin) / zoom,
+            (self.canvas.canvasy(self.canvas.winfo_height()) + margin) / zoom,
+        )
+
+    def center_on(self, x: float, y: float):
+        """
+        Scroll the canvas so that a point is in the center of the visible part, as far as the scroll region allows.
+
+        Args:
+            x (float): The x-coordinate of the point in the coordinates of the feature positions.
+            y (float): The y-coordinate of the point.
+        """
+        self._move_view(
+            x * self.zoom - self.canvas.winfo_width() / 2,
+            y * self.zoom - self.canvas.winfo_height() / 2,
+        )
 
-        self.canvas.tag_bind(
-            node_id,
-            self.click_handler.right_click(),
-            lambda event, f=feature: self._on_right_click_node(event, f),
+    def _move_view(self, left: float, top: float):
+        # Scroll the canvas so that the zoomed canvas point (left, top) is in the top left corner of the widget
+        x_min, y_min, x_max, y_max = (
+            value * self.zoom for value in self._scroll_region
         )
+        self.canvas.xview_moveto((left - x_min) / (x_max - x_min))
+        self.canvas.yview_moveto((top - y_min) / (y_max - y_min))
 
-        self.canvas.tag_bind(
-            node_id,
-            self.click_handler.left_click(),
-            lambda event, f=feature: self._on_left_click_node(event, f),
+    def _node_width(self, name: str) -> int:
+        # Width of the rectangle drawn around the name by _draw_node
+        return (
+            self.text_widths.measure(self.character_widths, name)
+            + 2 * self.NODE_PADDING_X
         )
 
-        # Recursively draw children if expanded
-        if feature.children and self.expanded_features.get(id(feature), True):
+    def _draw_item(self, feature_key: int, role: str, kind: str, coords, **options):
+        """
+        Create or update the canvas item that plays the given role for a feature. Only the coordinates and options
+        that differ from the last drawn state are sent to the canvas.
+
+        Args:
+            feature_key (int): The key of the feature the item belongs to.
+            role (str): The role of the item, e.g. "rect" or "edge".
+            kind (str): The canvas item type, e.g. "text" or "line".
+            coords (tuple): The unzoomed coordinates of the item, they are multiplied by the zoom factor.
+            **options: The configuration options of the item.
+
+        Returns:
+            int: The canvas id of the item.
+        """
+        self._drawn_roles.setdefault(feature_key, set()).add(role)
+        items = self._feature_items.setdefault(feature_key, {})
+        item = items.get(role)
+        zoom = self.zoom
+        if item is None:
+            item_id = getattr(self.canvas, f"create_{kind}")(
+                *(coords if zoom == 1 else [value * zoom for value in coords]),
+                **options,
+            )
+            items[role] = _CanvasItem(item_id, coords, options)
+            self._item_features[item_id] = (feature_key, role)
+            self._items_created = True
+            return item_id
+
+        if item.coords != coords:
+            self.canvas.coords(
+                item.item_id,
+                *(coords if zoom == 1 else [value * zoom for value in coords]),
+            )
+            item.coords = coords
+        if item.options != options:
+            self.canvas.itemconfig(
+                item.item_id,
+                **{
+                    key: value
+                    for key, value in options.items()
+                    if item.options.get(key) != value
+                },
+            )
+            item.options = options
+        return item.item_id
+
+    def _delete_stale_items(self):
+        """
+        Delete the canvas items of features or roles that were not drawn in the last pass.
+        """
+        for feature_key in list(self._feature_items):
+            items = self._feature_items[feature_key]
+            drawn_roles = self._drawn_roles.get(feature_key)
+            if drawn_roles is None:
+                self.canvas.delete(*(item.item_id for item in items.values()))
+                for item in items.values():
+                    self._item_features.pop(item.item_id, None)
+                del self._feature_items[feature_key]
+                self._node_labels.pop(feature_key, None)
+                continue
+            for role in [role for role in items if role not in drawn_roles]:
+                item_id = items.pop(role).item_id
+                self.canvas.delete(item_id)
+                self._item_features.pop(item_id, None)
+
+    def _visible_features(self) -> list[tuple[Feature, str]]:
+        """
+        Collect the features that are shown, i.e. whose ancestors are all expanded, in depth-first pre-order. The
+        traversal uses an explicit stack, so the depth of the model is not limited by the recursion limit.
+
+        Returns:
+            list[tuple[Feature, str]]: The shown features with the position of their feature instance cardinality
+            ("left", "right" or "middle").
+        """
+        features = []
+        stack = [(self.editor.cfm.root, "middle")]
+        while stack:
+            feature, feature_instance_card_pos = stack.pop()
+            features.append((feature, feature_instance_card_pos))
+            feature_key = feature_uid(feature)
+            if feature.children and self.expanded_features.get(feature_key, True):
+                x = self.positions[feature_key].x
+                for child in reversed(feature.children):
+                    child_x = self.positions[feature_uid(child)].x
+                    stack.append((child, "right" if child_x >= x else "left"))
+        return features
+
+    def _draw_features(self, features: list[tuple[Feature, str]]):
+        """
+        Draw the given features and delete the items of all other features.
+
+        Args:
+            features (list[tuple[Feature, str]]): The features to draw with the position of their feature instance
+                cardinality.
+        """
+        self._drawn_roles = {}
+        self._items_created = False
+        self._drawn_features = {}
+        for feature, feature_instance_card_pos in features:
+            self._draw_single_feature(feature, feature_instance_card_pos)
+        self._delete_stale_items()
+        if self._items_created:
+            # Restore the stacking order of a full redraw: edges below group arcs below everything else.
+            self.canvas.tag_lower("arc")
+            self.canvas.tag_lower("edge")
+
+    def _draw_single_feature(self, feature: Feature, feature_instance_card_pos: str):
+        """
+        Draw a feature together with the edge from its parent and the group to its children.
+
+        Args:
+            feature (Feature): The feature to draw.
+            feature_instance_card_pos (str): Where to place the feature instance cardinality ("left", "right" or
+                "middle").
+        """
+        feature_key = feature_uid(feature)
+        x, y = self.positions[feature_key].x, self.positions[feature_key].y
+        self._drawn_features[feature_key] = feature
+        is_root = feature is self.editor.cfm.root
+        detailed = self.zoom >= self.DETAIL_ZOOM_THRESHOLD
+
+        if feature.parent is not None and not is_root:
+            parent_position = self.positions[feature_uid(feature.parent)]
+            self._draw_item(
+                feature_key,
+                "edge",
+                "line",
+                (parent_position.x, parent_position.y + 10, x, y - 10),
+                tags="edge",
+                arrow=tk.LAST,
+            )
+
+        if not detailed:
+            # Level of detail of zoomed-out overviews: only the node and the edge from the parent
+            self._draw_plain_node(feature, x, y)
+            return
+
+        padded_bbox = self._draw_node(feature, x, y)
+
+        if not is_root:
+            self._draw_feat_instance_card(
+                feature, feature_instance_card_pos, padded_bbox, x
+            )
+
+        if feature.children:
+            self._draw_collapse_expand_button(feature, padded_bbox, y)
+
+        # Draw the group if expanded, the children and the edges to them are drawn separately
+        if len(feature.children) > 1 and self.expanded_features.get(feature_key, True):
             # arc for group
             arc_radius = 35
             x_center = x
             y_center = y + 10
-            left_angle = 180.0
-            right_angle = 360.0
-
-            for i, child in enumerate(feature.children):
-                new_x = self.positions[id(child)].x
-                new_y = self.positions[id(child)].y
-                self.canvas.create_line(
-                    x, y + 10, new_x, new_y - 10, tags="edge", arrow=tk.LAST
-                )
 
-                # Calculate angles for the group arc and adjust to canvas coordinate system
-                if i == 0:
-                    left_angle = (
-                        degrees(atan2((new_y - y_center), (new_x - x_center))) + 180
-                    ) % 360
-                if (i == len(feature.children) - 1) and (len(feature.children) > 1):
-                    right_angle = (
-                        degrees(atan2((new_y - y_center), (new_x - x_center))) + 180
-                    ) % 360
-
-                    self._draw_group_instance_card(
-                        feature, new_x, new_y, padded_bbox, x, y
-                    )
-
-                child_feature_instance_card_pos = "right" if new_x >= x else "left"
-                self._draw_feature(child, child_feature_instance_card_pos)
-
-            if len(feature.children) > 1:
-                self.canvas.create_arc(
+            # Calculate angles for the group arc and adjust to canvas coordinate system
+            first_child = self.positions[feature_uid(feature.children[0])]
+            last_child = self.positions[feature_uid(feature.children[-1])]
+            left_angle = (
+                degrees(atan2((first_child.y - y_center), (first_child.x - x_center)))
+                + 180
+            ) % 360
+            right_angle = (
+                degrees(atan2((last_child.y - y_center), (last_child.x - x_center)))
+                + 180
+            ) % 360
+
+            self._draw_group_instance_card(
+                feature, last_child.x, last_child.y, padded_bbox, x, y
+            )
+            self._draw_item(
+                feature_key,
+                "arc",
+                "arc",
+                (
                     x_center - arc_radius,
                     y_center - arc_radius,
                     x_center + arc_radius,
                     y_center + arc_radius,
-                    fill="white",
-                    style=tk.PIESLICE,
-                    tags="arc",
-                    start=left_angle,
-                    extent=right_angle - left_angle,
-                )
-                self._draw_group_type_card(feature, padded_bbox, x)
+                ),
+                fill="white",
+                style=tk.PIESLICE,
+                tags="arc",
+                start=left_angle,
+                extent=right_angle - left_angle,
+            )
+            self._draw_group_type_card(feature, padded_bbox, x)
 
     def _draw_node(self, feature, x, y):
-        max_width = self.MAX_NODE_WIDTH
-        padding_x = 4
-        padding_y = 2
+        padding_x = self.NODE_PADDING_X
+        padding_y = self.NODE_PADDING_Y
+        feature_key = feature_uid(feature)
+        tags = (f"feature_text:{feature.name}", feature.name)
+        is_new_rect = "rect" not in self._feature_items.get(feature_key, {})
 
-        node_id = self.canvas.create_text(
-            x, y, text=feature.name, tags=(f"feature_text:{feature.name}", feature.name)
-        )
-        bbox = self.canvas.bbox(node_id)
-        width = bbox[2] - bbox[0]
-
-        truncated = False
-        if width > max_width:
-            truncated = True
-            truncated_name = feature.name
-            while width > max_width - 10:
-                self.canvas.delete(node_id)
-                truncated_name = truncated_name[:-1]
-                node_id = self.canvas.create_text(
-                    x,
-                    y,
-                    text=truncated_name + "...",
-                    tags=(f"feature_text:{feature.name}", feature.name),
-                )
-                bbox = self.canvas.bbox(node_id)
-                width = bbox[2] - bbox[0]
+        label = self._node_labels.get(feature_key)
+        if label is None or label[0] != feature.name:
+            label = self._label_cache.get(feature.name)
+            if label is None:
+                label = self._measure_node_label(feature)
+                self._label_cache[feature.name] = label
+            self._node_labels[feature_key] = label
+        _, text, _, relative_bbox = label
 
+        node_id = self._draw_item(
+            feature_key,
+            "text",
+            "text",
+            (x, y),
+            text=text,
+            tags=tags,
+            font=self.node_font,
+        )
         padded_bbox = (
-            bbox[0] - padding_x,
-            bbox[1] - padding_y,
-            bbox[2] + padding_x,
-            bbox[3] + padding_y,
+            x + relative_bbox[0] - padding_x,
+            y + relative_bbox[1] - padding_y,
+            x + relative_bbox[2] + padding_x,
+            y + relative_bbox[3] + padding_y,
         )
-        rect_id = self.canvas.create_rectangle(
+        rect_id = self._draw_item(
+            feature_key,
+            "rect",
+            "rectangle",
             padded_bbox,
-            fill="lightgrey",
+            fill="lightblue"
+            if feature is self.currently_highlighted_feature
+            else "lightgrey",
             tags=(f"feature_rect:{feature.name}", feature.name),
         )
-        self.canvas.tag_raise(node_id, rect_id)
+        if is_new_rect:
+            self.canvas.tag_raise(node_id, rect_id)
+        return padded_bbox
+
+    def _draw_plain_node(self, feature, x, y):
+        # The rectangle of a node without the name. Its size is taken from the measured label if the name was shown
+        # before, otherwise it is estimated like for the layout.
+        label = self._label_cache.get(feature.name)
+        if label is not None:
+            relative_bbox = label[3]
+        else:
+            half_width = (
+                min(
+                    self._node_width(feature.name) - 2 * self.NODE_PADDING_X,
+                    self.MAX_NODE_WIDTH,
+                )
+                // 2
+            )
+            half_height = self.text_height // 2
+            relative_bbox = (-half_width, -half_height, half_width, half_height)
+        self._draw_item(
+            feature_uid(feature),
+            "rect",
+            "rectangle",
+            (
+                x + relative_bbox[0] - self.NODE_PADDING_X,
+                y + relative_bbox[1] - self.NODE_PADDING_Y,
+                x + relative_bbox[2] + self.NODE_PADDING_X,
+                y + relative_bbox[3] + self.NODE_PADDING_Y,
+            ),
+            fill="lightblue"
+            if feature is self.currently_highlighted_feature
+            else "lightgrey",
+            tags=(f"feature_rect:{feature.name}", feature.name),
+        )
+
+    def _measure_node_label(self, feature):
+        """
+        Measure the name of a feature and truncate it so that it fits into the maximum node width. The length of the
+        truncated name is found by a binary search over cached font measurements. The bounding box is computed from
+        the unzoomed font, so the label fits the node at every zoom level, however zoomed its text item is drawn.
+
+        Args:
+            feature (Feature): The feature whose name is measured.
 
-        # Attach tooltip to show full feature name if truncated
+        Returns:
+            tuple: The measured name, the displayed text, whether the text is truncated and the bounding box of the
+            text relative to its position.
+        """
+        max_width = self.MAX_NODE_WIDTH
+        text = feature.name
+        width = self.text_widths.measure(self.text_font, text)
+
+        truncated = width > max_width
         if truncated:
-            tooltip = ToolTip(self.canvas)
+            text = (
+                self.text_widths.fitting_prefix(
+                    self.text_font, feature.name, "...", max_width - 10
+                )
+                + "..."
+            )
+            width = self.text_widths.measure(self.text_font, text)
+
+        half_width = width // 2
+        half_height = self.text_height // 2
+        relative_bbox = (
+            -half_width,
+            -half_height,
+            width - half_width,
+            self.text_height - half_height,
+        )
+        return feature.name, text, truncated, relative_bbox
+
+    def _current_feature(self) -> tuple[Feature | None, str | None]:
+        """
+        Resolve the canvas item under the mouse pointer to the feature it belongs to.
+
+        Returns:
+            tuple[Feature | None, str | None]: The feature and the role of the item (e.g. "text" or "button"), or
+            (None, None) if the pointer is not over an item of a feature.
+        """
+        current = self.canvas.find_withtag("current")
+        entry = self._item_features.get(current[0]) if current else None
+        if entry is None:
+            return None, None
+        feature_key, role = entry
+        feature = self._drawn_features.get(feature_key)
+        return (feature, role) if feature is not None else (None, None)
+
+    def _on_canvas_left_click(self, event):
+        feature, role = self._current_feature()
+        if self._constraint_start_feature is not None:
+            self._on_constraint_target_click(
+                feature if role in ("text", "rect") else None
+            )
+        elif role == "text":
+            self._on_left_click_node(event, feature)
+        elif role == "button":
+            self._toggle_children(event, feature)
 
-            def on_enter(event):
-                tooltip_bbox = self.canvas.bbox(node_id)
-                if tooltip_bbox:
-                    tooltip_x, tooltip_y = (
-                        tooltip_bbox[2],
-                        tooltip_bbox[1],
-                    )  # Position at top-right of text
-                    tooltip.show_tip(feature.name, tooltip_x, tooltip_y)
+    def _on_canvas_right_click(self, event):
+        feature, role = self._current_feature()
+        if role == "text":
+            self._on_right_click_node(event, feature)
 
-            def on_leave(event):
-                tooltip.hide_tip()
+    def _on_canvas_motion(self, event):
+        current = self.canvas.find_withtag("current")
+        item_id = current[0] if current else None
+        if item_id == self._hovered_item:
+            return
+        self._hovered_item = item_id
+        self.node_tooltip.hide_tip()
 
-            self.canvas.tag_bind(node_id, "<Enter>", on_enter)
-            self.canvas.tag_bind(node_id, "<Leave>", on_leave)
-        return node_id, padded_bbox
+        # Show the full feature name if it is truncated
+        feature, role = self._current_feature()
+        if role != "text":
+            return
+        label = self._node_labels.get(feature_uid(feature))
+        if not label or not label[2]:
+            return
+        tooltip_bbox = self.canvas.bbox(item_id)
+        if tooltip_bbox:
+            tooltip_x, tooltip_y = (
+                tooltip_bbox[2],
+                tooltip_bbox[1],
+            )  # Position at top-right of text
+            self.node_tooltip.show_tip(label[0], tooltip_x, tooltip_y)
+
+    def _on_canvas_leave(self, event):
+        self._hovered_item = None
+        self.node_tooltip.hide_tip()
 
     def _draw_feat_instance_card(
         self, feature, feature_instance_card_pos, padded_bbox, x
@@ -274,31 +828,30 @@ class CFMCanvas:
                 anchor = tk.CENTER
                 feature_instance_x = x
         feature_instance_y = padded_bbox[1] - 10
-        self.canvas.create_text(
-            feature_instance_x,
-            feature_instance_y,
+        self._draw_item(
+            feature_uid(feature),
+            "instance_card",
+            "text",
+            (feature_instance_x, feature_instance_y),
             text=cardinality_to_display_str(feature.instance_cardinality, "⟨", "⟩"),
-            font=self.CARDINALITY_FONT,
+            font=self.cardinality_font,
             tags=f"{feature.name}_feature_instance",
             anchor=anchor,
         )
 
     def _draw_collapse_expand_button(self, feature, padded_bbox, y):
-        expanded = self.expanded_features.get(id(feature), True)
+        expanded = self.expanded_features.get(feature_uid(feature), True)
         button_text, button_color = ("-", "firebrick") if expanded else ("+", "green")
-        button_id = self.canvas.create_text(
-            padded_bbox[2] + 10,
-            y,
+        self._draw_item(
+            feature_uid(feature),
+            "button",
+            "text",
+            (padded_bbox[2] + 10, y),
             text=button_text,
             tags="button",
-            font=Font(weight="bold"),
+            font=self.button_font,
             fill=button_color,
         )
-        self.canvas.tag_bind(
-            button_id,
-            self.click_handler.left_click(),
-            lambda event, f=feature: self._toggle_children(event, f),
-        )
 
     def _draw_group_instance_card(self, feature, new_x, new_y, padded_bbox, x, y):
         # Calculate text position for group instance cardinality with linear interpolation
@@ -306,13 +859,15 @@ class CFMCanvas:
         group_instance_y = padded_bbox[3] + 10
         group_instance_x = x + slope * (group_instance_y - (y + 10)) + 7
         # anchor w means west, so the left side of the text is placed at the specified position
-        self.canvas.create_text(
-            group_instance_x,
-            group_instance_y,
+        self._draw_item(
+            feature_uid(feature),
+            "group_instance_card",
+            "text",
+            (group_instance_x, group_instance_y),
             text=cardinality_to_display_str(
                 feature.group_instance_cardinality, "⟨", "⟩"
             ),
-            font=self.CARDINALITY_FONT,
+            font=self.cardinality_font,
             tags=f"{feature.name}_group_instance",
             anchor=tk.W,
         )
@@ -320,14 +875,70 @@ class CFMCanvas:
     def _draw_group_type_card(self, feature, padded_bbox, x):
         # bbox[3] is the y-coordinate of the bottom of the text box
         group_type_y = padded_bbox[3] + 20
-        self.canvas.create_text(
-            x,
-            group_type_y,
+        self._draw_item(
+            feature_uid(feature),
+            "group_type_card",
+            "text",
+            (x, group_type_y),
             text=cardinality_to_display_str(feature.group_type_cardinality, "[", "]"),
-            font=self.CARDINALITY_FONT,
+            font=self.cardinality_font,
             tags=f"{feature.name}_group_type",
         )
 
+    def _on_mouse_wheel(self, event):
+        step = (
+            self.ZOOM_STEP if event.num == 4 or event.delta > 0 else 1 / self.ZOOM_STEP
+        )
+        self.zoom_to(self.zoom * step, event.x, event.y)
+        return "break"
+
+    @profiled("zoom")
+    def zoom_to(self, zoom: float, x: int | None = None, y: int | None = None):
+        """
+        Zoom the canvas. The drawn items are scaled by the canvas and the fonts are resized, the features are only
+        drawn again if the zoom crosses the detail threshold (DETAIL_ZOOM_THRESHOLD) or if the model is culled.
+
+        Args:
+            zoom (float): The new zoom factor, limited to MIN_ZOOM and MAX_ZOOM.
+            x (int, optional): The x-coordinate in the canvas widget of the point that stays in place, e.g. the mouse
+                pointer. Defaults to the center of the widget.
+            y (int, optional): The y-coordinate in the canvas widget of the point that stays in place.
+        """
+        zoom = min(max(zoom, self.MIN_ZOOM), self.MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        if x is None or y is None:
+            x, y = self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2
+        fixed_x, fixed_y = self.canvas.canvasx(x), self.canvas.canvasy(y)
+        factor = zoom / self.zoom
+        was_detailed = self.zoom >= self.DETAIL_ZOOM_THRESHOLD
+        self.zoom = zoom
+
+        self.canvas.scale("all", 0, 0, factor, factor)
+        # The hint shown while a constraint is added keeps its place
+        for item_id in (self.info_label, self.cancel_button_window):
+            if item_id is not None:
+                self.canvas.scale(item_id, 0, 0, 1 / factor, 1 / factor)
+        for font, size in self.zoomed_fonts:
+            # Font sizes are in points if positive and in pixels if negative, they must not become 0
+            scaled_size = round(size * zoom) or (1 if size > 0 else -1)
+            font.configure(size=scaled_size)
+
+        self.configure_scroll_region(*self._scroll_region)
+        self._move_view(fixed_x * factor - x, fixed_y * factor - y)
+
+        if (
+            self.positions
+            and not self._layout_outdated
+            and was_detailed != (zoom >= self.DETAIL_ZOOM_THRESHOLD)
+        ):
+            # An outdated layout is drawn at the level of detail of the zoom when the new layout is drawn
+            self._draw_layout(self.positions)
+        else:
+            self._schedule_culling()
+        if self.profile_overlay is not None:
+            self.profile_overlay.place()
+
     def _on_right_click_node(self, event, feature):
         menu = tk.Menu(self.tk_root, tearoff=0)
         menu.add_command(
@@ -349,25 +960,29 @@ class CFMCanvas:
 
     def _highlight_feature(self, feature):
         self._cancel_highlight()
-        node_id = self.canvas.find_withtag(f"feature_rect:{feature.name}")
-        if node_id:
-            self.canvas.itemconfig(node_id[0], fill="lightblue")
-            self.currently_highlighted_feature = feature
+        self.currently_highlighted_feature = feature
+        self._set_node_fill(feature, "lightblue")
 
     def _cancel_highlight(self):
         if self.currently_highlighted_feature:
-            previous_node = self.canvas.find_withtag(
-                f"feature_rect:{self.currently_highlighted_feature.name}"
-            )
-            if previous_node:
-                self.canvas.itemconfig(previous_node[0], fill="lightgrey")
+            self._set_node_fill(self.currently_highlighted_feature, "lightgrey")
             self.currently_highlighted_feature = None
 
+    def _set_node_fill(self, feature, fill):
+        # Recolor the retained rectangle of a feature and its record, so the next redraw does not see a change. Culled
+        # features have no rectangle, they get the color from currently_highlighted_feature when they are drawn.
+        item = self._feature_items.get(feature_uid(feature), {}).get("rect")
+        if item is not None and item.options.get("fill") != fill:
+            self.canvas.itemconfig(item.item_id, fill=fill)
+            item.options = {**item.options, "fill": fill}
+
     def _toggle_children(self, event, feature):
-        self.expanded_features[id(feature)] = not self.expanded_features.get(
-            id(feature), True
+        feature_key = feature_uid(feature)
+        self.expanded_features[feature_key] = not self.expanded_features.get(
+            feature_key, True
         )
-        self.editor.update_model_state()
+        # Expanding or collapsing only changes the view, not the model, so it is not recorded in the undo history
+        self.editor.schedule_redraw(constraints=False)
 
     def add_constraint(self, feature):
         """
@@ -377,35 +992,7 @@ class CFMCanvas:
             feature (Feature): The feature to start the constraint from.
         """
         self._highlight_feature(feature)
-
-        def on_canvas_click(event):
-            clicked_item = self.canvas.find_withtag("current")
-            if not clicked_item:
-                messagebox.showerror("Selection Error", "Please click on a feature.")
-                return
-
-            clicked_tags = self.canvas.gettags(clicked_item[0])
-            second_feature_name = next(
-                (
-                    tag
-                    for tag in clicked_tags
-                    if tag in (feat.name for feat in self.editor.cfm.features)
-                ),
-                None,
-            )
-            second_feature = next(
-                (f for f in self.editor.cfm.features if f.name == second_feature_name),
-                None,
-            )
-
-            if not second_feature:
-                messagebox.showerror("Selection Error", "Please click on a feature.")
-                return
-
-            self.cancel_add_constraint()
-            self.editor.constraints.constraint_dialog(
-                initial_first_feature=feature, initial_second_feature=second_feature
-            )
+        self._constraint_start_feature = feature
 
         self.info_label = self.canvas.create_text(
             400,
@@ -420,7 +1007,17 @@ class CFMCanvas:
         self.cancel_button_window = self.canvas.create_window(
             650, 15, window=cancel_button
         )
-        self.canvas.bind(self.click_handler.left_click(), on_canvas_click)
+
+    def _on_constraint_target_click(self, second_feature: Feature | None):
+        if not second_feature:
+            messagebox.showerror("Selection Error", "Please click on a feature.")
+            return
+
+        first_feature = self._constraint_start_feature
+        self.cancel_add_constraint()
+        self.editor.constraints.constraint_dialog(
+            initial_first_feature=first_feature, initial_second_feature=second_feature
+        )
 
     def cancel_add_constraint(self):
         """
@@ -428,7 +1025,7 @@ class CFMCanvas:
         """
         self.canvas.delete(self.info_label)
         self.canvas.delete(self.cancel_button_window)
-        self.canvas.unbind(self.click_handler.left_click())
+        self._constraint_start_feature = None
         self._cancel_highlight()
 
     def add_expanded_feature(self, feature: Feature):
@@ -438,4 +1035,4 @@ class CFMCanvas:
         Args:
             feature (Feature): The feature to mark as expanded.
         """
-        self.expanded_features[id(feature)] = True
+        self.expanded_features[feature_uid(feature)] = True
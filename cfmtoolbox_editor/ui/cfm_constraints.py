@@ -3,6 +3,9 @@ This module defines the CFMConstraints class, which is responsible for managing
 in a feature model using the Tkinter library. The CFMConstraints class provides functionalities to add, edit,
 and delete constraints, as well as to display them in a treeview with tooltips for additional information.
 
+Large lists of constraints are displayed in a virtual mode, in which the treeview only contains the rows that are
+currently visible, and scrolling fills these rows with other constraints.
+
 Classes:
     CFMConstraints: A class to create and manage the UI elements for displaying and interacting with constraints.
 """
@@ -15,6 +18,8 @@ from cfmtoolbox import Constraint
 
 from cfmtoolbox_editor.ui.cfm_tooltip import ToolTip
 from cfmtoolbox_editor.ui.constraint_dialog import ConstraintDialog
+from cfmtoolbox_editor.utils.cfm_operations import AddConstraint, EditConstraint
+from cfmtoolbox_editor.utils.cfm_profiler import profiled
 from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_display_str
 
 
@@ -23,9 +28,26 @@ class CFMConstraints:
         self.parent = parent
         self.editor = editor
         self.click_handler = click_handler
+
+        # Number of constraints from which on only the visible rows are inserted into the treeview
+        self.VIRTUAL_THRESHOLD = 500
+
+        self.constraints: List[Constraint] = []  # Constraints displayed in the treeview
+        self._virtual = False
+        self._first_row = 0  # Index of the constraint in the first row in virtual mode
+        self._row_cache: Dict[
+            int, Tuple[Constraint, Tuple, Tuple[str, ...]]
+        ] = {}  # id(constraint) -> (constraint, signature, row values)
         self.constraint_mapping: Dict[
             str, Constraint
         ] = {}  # Mapping of constraint treeview items to constraints
+        self.constraint_rows: Dict[
+            int, str
+        ] = {}  # Mapping of id(constraint) to treeview items, the reverse of constraint_mapping
+        self._row_order: List[
+            str
+        ] = []  # Treeview items in the order they are displayed
+        self._shown_values: Dict[str, Tuple[str, ...]] = {}  # Values of the items
         self.last_hovered_cell: Tuple[str | None, str | None] = (
             None,
             None,
@@ -60,8 +82,8 @@ class CFMConstraints:
         # Treeview
         self._setup_treeview()
 
-        self.constraints_tree.config(yscrollcommand=self.constraints_scroll.set)
-        self.constraints_scroll.config(command=self.constraints_tree.yview)
+        self.constraints_tree.config(yscrollcommand=self._on_tree_scrolled)
+        self.constraints_scroll.config(command=self._on_scrollbar)
 
         self.constraints_frame.columnconfigure(0, weight=1)
         self.constraints_frame.columnconfigure(1, weight=0)
@@ -71,6 +93,9 @@ class CFMConstraints:
         )
         self.constraints_tree.bind("<Motion>", self.on_constraints_hover)
         self.constraints_tree.bind("<Leave>", self.on_constraints_leave)
+        self.constraints_tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.constraints_tree.bind("<Button-4>", self._on_mouse_wheel)
+        self.constraints_tree.bind("<Button-5>", self._on_mouse_wheel)
 
     def _setup_treeview(self):
         columns_config = {
@@ -118,30 +143,181 @@ class CFMConstraints:
         """
         return self.constraints_frame
 
+    @profiled("update_constraints")
     def update_constraints(self, constraints: List[Constraint]):
         """
-        Update the constraints displayed in the treeview.
+        Update the constraints displayed in the treeview. Only the rows of inserted, removed and modified constraints
+        are changed. From VIRTUAL_THRESHOLD constraints on, only the visible rows are filled.
 
         Args:
             constraints (List[Constraint]): The list of constraints to display.
         """
+        self.constraints = constraints
+        self._prune_row_cache()
+        virtual = len(constraints) >= self.VIRTUAL_THRESHOLD
+        if virtual != self._virtual:
+            # The rows are assigned to the constraints differently in the two modes
+            self._clear_rows()
+            self._virtual = virtual
+
+        if virtual:
+            self._first_row = min(self._first_row, self._max_first_row())
+            self._fill_visible_rows()
+        else:
+            self._first_row = 0
+            self._update_rows()
+            self.last_hovered_cell = (None, None)
+
+    def _clear_rows(self):
         self.constraints_tree.delete(*self.constraints_tree.get_children())
         self.constraint_mapping = {}
-        for constraint in constraints:
-            constraint_id = self.constraints_tree.insert(
-                "",
-                "end",
-                values=(
-                    constraint.first_feature.name,
-                    cardinality_to_display_str(constraint.first_cardinality, "⟨", "⟩"),
-                    "requires" if constraint.require else "excludes",
-                    constraint.second_feature.name,
-                    cardinality_to_display_str(constraint.second_cardinality, "⟨", "⟩"),
-                    "🖉",
-                    "🗑️",
-                ),
+        self.constraint_rows = {}
+        self._row_order = []
+        self._shown_values = {}
+
+    def _show_values(self, row: str, values: Tuple[str, ...]):
+        # Unchanged rows get the identical values object from the row cache
+        if self._shown_values.get(row) is not values:
+            self.constraints_tree.item(row, values=values)
+            self._shown_values[row] = values
+
+    def _update_rows(self):
+        """
+        Bring the rows of the treeview in line with the constraints, keyed by the identity of the constraints.
+        """
+        present = {id(constraint) for constraint in self.constraints}
+        removed = [
+            row for key, row in self.constraint_rows.items() if key not in present
+        ]
+        if removed:
+            self.constraints_tree.delete(*removed)
+            for row in removed:
+                del self.constraint_rows[id(self.constraint_mapping.pop(row))]
+                del self._shown_values[row]
+            removed_rows = set(removed)
+            self._row_order = [
+                row for row in self._row_order if row not in removed_rows
+            ]
+
+        order = self._row_order
+        for position, constraint in enumerate(self.constraints):
+            values = self._row_values(constraint)
+            row = self.constraint_rows.get(id(constraint))
+            if row is None:
+                row = self.constraints_tree.insert("", position, values=values)
+                self.constraint_mapping[row] = constraint
+                self.constraint_rows[id(constraint)] = row
+                self._shown_values[row] = values
+                order.insert(position, row)
+                continue
+            self._show_values(row, values)
+            if order[position] != row:
+                self.constraints_tree.move(row, "", position)
+                order.remove(row)
+                order.insert(position, row)
+
+    def _row_values(self, constraint: Constraint) -> Tuple[str, ...]:
+        # Cardinalities are replaced, not changed in place, when a constraint is edited, so keeping them in the
+        # signature is enough to tell whether the cached values are up to date.
+        signature = (
+            constraint.require,
+            constraint.first_feature.name,
+            constraint.first_cardinality,
+            constraint.second_feature.name,
+            constraint.second_cardinality,
+        )
+        cached = self._row_cache.get(id(constraint))
+        if cached is not None and cached[0] is constraint and cached[1] == signature:
+            return cached[2]
+        values = (
+            constraint.first_feature.name,
+            cardinality_to_display_str(constraint.first_cardinality, "⟨", "⟩"),
+            "requires" if constraint.require else "excludes",
+            constraint.second_feature.name,
+            cardinality_to_display_str(constraint.second_cardinality, "⟨", "⟩"),
+            "🖉",
+            "🗑️",
+        )
+        self._row_cache[id(constraint)] = (constraint, signature, values)
+        return values
+
+    def _prune_row_cache(self):
+        # Forget removed constraints once the cache has grown well beyond the number of constraints
+        if len(self._row_cache) > 2 * len(self.constraints) + 64:
+            present = {id(constraint) for constraint in self.constraints}
+            self._row_cache = {
+                key: entry for key, entry in self._row_cache.items() if key in present
+            }
+
+    def _visible_row_count(self) -> int:
+        return int(self.constraints_tree.cget("height"))
+
+    def _max_first_row(self) -> int:
+        return max(0, len(self.constraints) - self._visible_row_count())
+
+    def _fill_visible_rows(self):
+        """
+        Show the constraints from _first_row on in the rows of the treeview, reusing the existing rows.
+        """
+        visible = self.constraints[
+            self._first_row : self._first_row + self._visible_row_count()
+        ]
+        rows = self._row_order
+        if len(rows) > len(visible):
+            self.constraints_tree.delete(*rows[len(visible) :])
+            for row in rows[len(visible) :]:
+                del self._shown_values[row]
+            del rows[len(visible) :]
+        self.constraint_mapping = {}
+        for position, constraint in enumerate(visible):
+            values = self._row_values(constraint)
+            if position < len(rows):
+                row = rows[position]
+                self._show_values(row, values)
+            else:
+                row = self.constraints_tree.insert("", "end", values=values)
+                self._shown_values[row] = values
+                rows.append(row)
+            self.constraint_mapping[row] = constraint
+        self.last_hovered_cell = (None, None)
+
+        total = len(self.constraints)
+        self.constraints_scroll.set(
+            self._first_row / total, (self._first_row + len(visible)) / total
+        )
+
+    def _scroll_to_row(self, first_row: int):
+        first_row = max(0, min(first_row, self._max_first_row()))
+        if first_row != self._first_row:
+            self._first_row = first_row
+            self._fill_visible_rows()
+
+    def _on_tree_scrolled(self, first, last):
+        # In virtual mode the treeview only contains the visible rows, the scrollbar is set by _fill_visible_rows.
+        if not self._virtual:
+            self.constraints_scroll.set(first, last)
+
+    def _on_scrollbar(self, *args):
+        if not self._virtual:
+            self.constraints_tree.yview(*args)
+            return
+        action, amount = args[0], args[1]
+        if action == tk.MOVETO:
+            self._scroll_to_row(round(float(amount) * len(self.constraints)))
+        elif args[2] == tk.PAGES:
+            self._scroll_to_row(
+                self._first_row + int(amount) * self._visible_row_count()
             )
-            self.constraint_mapping[constraint_id] = constraint
+        else:
+            self._scroll_to_row(self._first_row + int(amount))
+
+    def _on_mouse_wheel(self, event):
+        if not self._virtual:
+            return None
+        self._scroll_to_row(
+            self._first_row + (-1 if event.num == 4 or event.delta > 0 else 1)
+        )
+        return "break"
 
     def on_constraints_click(self, event):
         """
@@ -239,6 +415,13 @@ class CFMConstraints:
             initial_second_feature=initial_second_feature,
         )
         result = dialog.show()
-        if result:
-            self.editor.cfm.constraints.append(result)
-        self.editor.update_model_state()
+        if not result:
+            return
+        constraints = self.editor.cfm.constraints
+        if constraint:
+            index = self.editor.feature_index.constraint_position(
+                constraints, constraint
+            )
+            self.editor.apply_operation(EditConstraint(index, constraint, result))
+        else:
+            self.editor.apply_operation(AddConstraint(len(constraints), result))
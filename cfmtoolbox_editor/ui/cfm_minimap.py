@@ -0,0 +1,103 @@
+"""
+This module defines the CFMMinimap class, an overview of the whole laid-out feature model beside the canvas of the
+editor. The model is shown as a single image rendered by a MinimapRaster (see cfm_minimap_raster), so the minimap has
+no canvas items per feature. A rectangle marks the visible part of the canvas; clicking or dragging in the minimap
+scrolls the canvas.
+
+Classes:
+    CFMMinimap: A minimap showing the whole feature model and the visible part of the canvas.
+"""
+
+import base64
+import tkinter as tk
+
+from cfmtoolbox import Feature
+
+from cfmtoolbox_editor.ui.cfm_canvas import CFMCanvas
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import Point
+from cfmtoolbox_editor.utils.cfm_minimap_raster import MinimapRaster
+
+
+class CFMMinimap:
+    def __init__(
+        self, parent, canvas_view: CFMCanvas, width: int = 200, height: int = 150
+    ):
+        """
+        Initialize the CFMMinimap and show it to the right of the canvas.
+
+        Args:
+            parent: The widget containing the canvas.
+            canvas_view (CFMCanvas): The canvas whose model is shown. It updates the minimap after every layout and
+                whenever it is scrolled or zoomed.
+            width (int, optional): The width of the minimap in pixels.
+            height (int, optional): The height of the minimap in pixels.
+        """
+        self.canvas_view = canvas_view
+        self.raster = MinimapRaster(width, height)
+        self.canvas = tk.Canvas(
+            parent,
+            width=width,
+            height=height,
+            bg="white",
+            highlightthickness=1,
+            highlightbackground="gray",
+        )
+        # Packed before the scrollbar of the canvas, so it is placed at the right edge next to the scrollbar
+        self.canvas.pack(side=tk.RIGHT, anchor=tk.N, before=canvas_view.v_scroll)
+        self.image = tk.PhotoImage(width=width, height=height)
+        self.canvas.create_image(0, 0, image=self.image, anchor=tk.NW)
+        self.viewport_id = self.canvas.create_rectangle(
+            0, 0, 0, 0, outline="firebrick", width=2
+        )
+        # Offset of the pointer from the center of the viewport rectangle while it is dragged
+        self._drag_offset = (0.0, 0.0)
+        self.canvas.bind("<Button-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        canvas_view.minimap = self
+
+    def update_layout(self, features: list[Feature], positions: dict[int, Point]):
+        """
+        Show a new layout of the model. Only the parts of the image that changed are rendered again.
+
+        Args:
+            features (list[Feature]): The shown features.
+            positions (dict[int, Point]): The positions of the shown features, keyed by stable feature ids.
+        """
+        self.raster.update(features, positions)
+        if self.raster.changed:
+            # Tk reads binary image data reliably only if it is base64 encoded. Its PPM format also reads PGM images
+            self.image.configure(
+                data=base64.b64encode(self.raster.to_pgm()).decode("ascii"),
+                format="PPM",
+            )
+        self.update_viewport()
+
+    def update_viewport(self):
+        """
+        Move the viewport rectangle to the visible part of the canvas.
+        """
+        x_min, y_min, x_max, y_max = self.canvas_view.visible_area()
+        left, top = self.raster.to_pixel(x_min, y_min)
+        right, bottom = self.raster.to_pixel(x_max, y_max)
+        self.canvas.coords(self.viewport_id, left, top, right, bottom)
+
+    def _viewport_center(self) -> tuple[float, float]:
+        left, top, right, bottom = self.canvas.coords(self.viewport_id)
+        return (left + right) / 2, (top + bottom) / 2
+
+    def _on_press(self, event):
+        left, top, right, bottom = self.canvas.coords(self.viewport_id)
+        if left <= event.x <= right and top <= event.y <= bottom:
+            # Grabbing the rectangle keeps the pointer at the same place on it
+            center_x, center_y = self._viewport_center()
+            self._drag_offset = (event.x - center_x, event.y - center_y)
+        else:
+            # Clicking elsewhere centers the canvas on the clicked point
+            self._drag_offset = (0.0, 0.0)
+            self._on_drag(event)
+
+    def _on_drag(self, event):
+        x, y = self.raster.to_position(
+            event.x - self._drag_offset[0], event.y - self._drag_offset[1]
+        )
+        self.canvas_view.center_on(x, y)
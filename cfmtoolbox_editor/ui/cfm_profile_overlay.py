@@ -0,0 +1,84 @@
+"""
+This module defines the ProfileOverlay class, which shows the wall times recorded by the profiler for the last frame
+and the number of canvas items in the top left corner of the canvas.
+
+Classes:
+    ProfileOverlay: A class to show the breakdown of the last profiled frame on a canvas.
+"""
+
+import tkinter as tk
+
+from cfmtoolbox_editor.utils.cfm_profiler import Span
+
+
+class ProfileOverlay:
+    """Shows the breakdown of the last profiled frame and the canvas item count on a canvas."""
+
+    TAG = "profile_overlay"
+
+    def __init__(self, canvas: tk.Canvas, margin: int = 8):
+        """
+        Initialize the ProfileOverlay. Nothing is shown before the first frame.
+
+        Args:
+            canvas (tk.Canvas): The canvas to show the overlay on.
+            margin (int, optional): The distance of the overlay to the corner of the visible part of the canvas.
+        """
+        self.canvas = canvas
+        self.margin = margin
+        self.text = ""
+
+    def show(self, frame: list[Span]):
+        """
+        Show the spans of a frame, replacing the previous frame. The overlay is disabled, so the features below it
+        still receive the mouse events.
+
+        Args:
+            frame (list[Span]): The spans of the frame in the order they were started.
+        """
+        self.canvas.delete(self.TAG)
+        lines = [
+            f"{'  ' * span.depth}{span.name}: {span.duration * 1000:.1f} ms"
+            + (" (bg)" if span.background else "")
+            for span in frame
+        ]
+        lines.append(f"canvas items: {len(self.canvas.find_all())}")
+        self.text = "\n".join(lines)
+
+        text_id = self.canvas.create_text(
+            0,
+            0,
+            text=self.text,
+            anchor=tk.NW,
+            font=("TkFixedFont", 8),
+            state=tk.DISABLED,
+            tags=(self.TAG,),
+        )
+        x_min, y_min, x_max, y_max = self.canvas.bbox(text_id)
+        background_id = self.canvas.create_rectangle(
+            x_min - 3,
+            y_min - 3,
+            x_max + 3,
+            y_max + 3,
+            fill="#ffffe0",
+            outline="gray",
+            state=tk.DISABLED,
+            tags=(self.TAG,),
+        )
+        self.canvas.tag_lower(background_id, text_id)
+        self.place()
+
+    def place(self):
+        """
+        Move the overlay to the top left corner of the visible part of the canvas, e.g. after scrolling.
+        """
+        items = self.canvas.find_withtag(self.TAG)
+        if not items:
+            return
+        x_min, y_min, _, _ = self.canvas.bbox(self.TAG)
+        self.canvas.move(
+            self.TAG,
+            self.canvas.canvasx(0) + self.margin - x_min,
+            self.canvas.canvasy(0) + self.margin - y_min,
+        )
+        self.canvas.tag_raise(self.TAG)
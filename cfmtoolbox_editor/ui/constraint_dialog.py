@@ -9,13 +9,9 @@ Classes:
 import tkinter as tk
 from tkinter import ttk, messagebox, StringVar
 
-from cfmtoolbox import Constraint
-
-from cfmtoolbox_editor.utils.cfm_utils import (
-    edit_str_to_cardinality,
-    cardinality_to_edit_str,
-    center_window,
-)
+from cfmtoolbox_editor.utils.cfm_model_edits import ModelEditError, create_constraint
+from cfmtoolbox_editor.utils.cfm_profiler import profiler
+from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_edit_str, center_window
 
 
 class ConstraintDialog:
@@ -56,7 +52,8 @@ class ConstraintDialog:
         self.type_dropdown = None
 
         # Set up the dialog
-        self.setup_dialog()
+        with profiler.span("constraint_dialog.open"):
+            self.setup_dialog()
 
     def setup_dialog(self):
         """
@@ -174,35 +171,20 @@ class ConstraintDialog:
 
         first_feature = self.editor.get_feature_by_name(selected_first_feature)
         second_feature = self.editor.get_feature_by_name(selected_second_feature)
-        if first_feature == second_feature:
-            messagebox.showerror(
-                "Input Error", "The first and second features cannot be the same."
-            )
-            return
 
+        # The edited constraint is returned as a new object, the caller applies it to the model
         try:
-            first_card = edit_str_to_cardinality(self.first_card_var.get().strip())
-            second_card = edit_str_to_cardinality(self.second_card_var.get().strip())
-        except ValueError:
-            messagebox.showerror("Input Error", "Invalid cardinality format.")
+            self.result = create_constraint(
+                first_feature,
+                self.first_card_var.get(),
+                second_feature,
+                self.second_card_var.get(),
+                self.type_var.get() == "requires",
+            )
+        except ModelEditError as error:
+            messagebox.showerror("Input Error", str(error))
             return
 
-        require = self.type_var.get() == "requires"
-
-        if self.constraint:
-            self.constraint.first_feature = first_feature
-            self.constraint.second_feature = second_feature
-            self.constraint.first_cardinality = first_card
-            self.constraint.second_cardinality = second_card
-            self.constraint.require = require
-        else:
-            self.result = Constraint(
-                require=require,
-                first_feature=first_feature,
-                first_cardinality=first_card,
-                second_feature=second_feature,
-                second_cardinality=second_card,
-            )
         self.dialog.destroy()
 
     def show(self):
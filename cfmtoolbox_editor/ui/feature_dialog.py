@@ -9,15 +9,13 @@ Classes:
 from tkinter import messagebox
 from tkinter import Toplevel, Label, Entry, StringVar, Button
 
-from cfmtoolbox import Cardinality, Feature, Interval
-
-from cfmtoolbox_editor.utils.cfm_utils import (
-    derive_parent_group_cards_for_multiple_children,
-    derive_parent_group_cards_for_one_child,
-    edit_str_to_cardinality,
-    cardinality_to_edit_str,
-    center_window,
+from cfmtoolbox_editor.utils.cfm_model_edits import (
+    ModelEditError,
+    add_feature,
+    edit_feature,
 )
+from cfmtoolbox_editor.utils.cfm_profiler import profiler
+from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_edit_str, center_window
 
 
 class FeatureDialog:
@@ -31,8 +29,9 @@ class FeatureDialog:
     Attributes:
         parent: The Tk root window or parent widget.
         cfm: The feature model containing the list of features.
+        feature_index: The index of the features of the model, used to check that names are unique.
         expanded_features: Dictionary of feature IDs to expanded/collapsed states.
-        update_model_state_callback: Callback to update the model state.
+        apply_operation_callback: Callback to apply the resulting edit operation to the model.
         show_feature_dialog_callback: Callback to reopen the dialog for a parent feature.
         parent_feature: The parent feature for the new feature (if adding).
         feature: The feature being edited (if applicable).
@@ -42,8 +41,9 @@ class FeatureDialog:
         self,
         parent_widget,
         cfm,
+        feature_index,
         add_expanded_feature_callback,
-        update_model_state_callback,
+        apply_operation_callback,
         show_feature_dialog_callback,
         parent_feature=None,
         feature=None,
@@ -54,16 +54,18 @@ class FeatureDialog:
         Args:
             parent_widget (tk.Widget): The parent widget for the dialog.
             cfm: The feature model containing the list of features.
+            feature_index (FeatureIndex): The index of the features of the model.
             add_expanded_feature_callback (callable): Callback to mark a feature as expanded.
-            update_model_state_callback (callable): Callback to update the model state.
+            apply_operation_callback (callable): Callback to apply the resulting edit operation to the model.
             show_feature_dialog_callback (callable): Callback to reopen the dialog for a parent feature.
             parent_feature (Feature, optional): The parent feature for the new feature. Defaults to None.
             feature (Feature, optional): The feature being edited. Defaults to None.
         """
         self.parent_widget = parent_widget  # The Tk root window or parent widget
         self.cfm = cfm
+        self.feature_index = feature_index
         self.add_expanded_feature_callback = add_expanded_feature_callback
-        self.update_model_state_callback = update_model_state_callback
+        self.apply_operation_callback = apply_operation_callback
         self.show_feature_dialog_callback = show_feature_dialog_callback
         self.parent_feature = parent_feature
         self.feature = feature
@@ -74,17 +76,20 @@ class FeatureDialog:
             feature is not None and feature.parent and len(feature.parent.children) == 1
         )
 
-        self.dialog = Toplevel(self.parent_widget)
-        self.dialog.title("Edit Feature" if self.is_edit else "Add Feature")
-        self.dialog.transient(self.parent_widget)
-        self.dialog.grab_set()
-
-        self._create_widgets()
-        self.dialog.update_idletasks()
-        x, y = center_window(
-            self.parent_widget, self.dialog.winfo_width(), self.dialog.winfo_height()
-        )
-        self.dialog.geometry(f"+{x}+{y}")
+        with profiler.span("feature_dialog.open"):
+            self.dialog = Toplevel(self.parent_widget)
+            self.dialog.title("Edit Feature" if self.is_edit else "Add Feature")
+            self.dialog.transient(self.parent_widget)
+            self.dialog.grab_set()
+
+            self._create_widgets()
+            self.dialog.update_idletasks()
+            x, y = center_window(
+                self.parent_widget,
+                self.dialog.winfo_width(),
+                self.dialog.winfo_height(),
+            )
+            self.dialog.geometry(f"+{x}+{y}")
         self.dialog.wait_window(self.dialog)
 
     def _create_widgets(self):
@@ -148,95 +153,32 @@ class FeatureDialog:
         """
         Handle the submission of the dialog, creating or updating the feature.
         """
-        feature_name = self.name_var.get().strip()
-        if not feature_name:
-            messagebox.showerror("Input Error", "Feature name cannot be empty.")
-            return
-
-        if (feature_name in [f.name for f in self.cfm.features]) and (
-            not self.is_edit or (feature_name != self.feature.name)
-        ):
-            messagebox.showerror("Input Error", "Feature name must be unique.")
-            return
-
-        raw_feature_card = self.feature_card_var.get().strip()
-        feature_card = Cardinality([Interval(0, None)])
-        if raw_feature_card:
-            try:
-                feature_card = edit_str_to_cardinality(raw_feature_card)
-            except ValueError:
-                messagebox.showerror(
-                    "Input Error",
-                    "Invalid feature cardinality format. Use 'min,max' or 'min,*' for intervals.",
+        try:
+            if self.is_edit:
+                edit = edit_feature(
+                    self.feature_index,
+                    self.feature,
+                    self.name_var.get(),
+                    self.feature_card_var.get(),
+                    self.group_type_card_var.get() if self.is_group else None,
+                    self.group_instance_card_var.get() if self.is_group else None,
                 )
-                return
-
-        group_created = False
-
-        if self.is_edit:
-            self.feature.name = feature_name
-            self.feature.instance_cardinality = feature_card
-            if self.is_group:
-                raw_group_type_card = self.group_type_card_var.get().strip()
-                raw_group_instance_card = self.group_instance_card_var.get().strip()
-                try:
-                    group_type_card = edit_str_to_cardinality(raw_group_type_card)
-                except ValueError:
-                    messagebox.showerror(
-                        "Input Error",
-                        "Invalid group type cardinality format. Use 'min,max' or 'min,*' for intervals.",
-                    )
-                    return
-                try:
-                    group_instance_card = edit_str_to_cardinality(
-                        raw_group_instance_card
-                    )
-                except ValueError:
-                    messagebox.showerror(
-                        "Input Error",
-                        "Invalid group instance cardinality format. Use 'min,max' or 'min,*' for intervals.",
-                    )
-                    return
-                self.feature.group_type_cardinality = group_type_card
-                self.feature.group_instance_cardinality = group_instance_card
-            if self.is_only_child:
-                (
-                    self.feature.parent.group_type_cardinality,
-                    self.feature.parent.group_instance_cardinality,
-                ) = derive_parent_group_cards_for_one_child(
-                    self.feature.instance_cardinality
-                )
-        else:
-            new_feature = Feature(
-                name=feature_name,
-                instance_cardinality=feature_card,
-                group_type_cardinality=Cardinality([]),
-                group_instance_cardinality=Cardinality([]),
-                parent=self.parent_feature,
-                children=[],
-            )
-            self.add_expanded_feature_callback(new_feature)
-            self.parent_feature.children.append(new_feature)
-            if len(self.parent_feature.children) == 1:
-                (
-                    self.parent_feature.group_type_cardinality,
-                    self.parent_feature.group_instance_cardinality,
-                ) = derive_parent_group_cards_for_one_child(feature_card)
-            if len(self.parent_feature.children) == 2:
-                group_created = True
-                (
-                    self.parent_feature.group_type_cardinality,
-                    self.parent_feature.group_instance_cardinality,
-                ) = derive_parent_group_cards_for_multiple_children(
-                    [
-                        child.instance_cardinality
-                        for child in self.parent_feature.children
-                    ]
+            else:
+                edit = add_feature(
+                    self.feature_index,
+                    self.parent_feature,
+                    self.name_var.get(),
+                    self.feature_card_var.get(),
                 )
+        except ModelEditError as error:
+            messagebox.showerror("Input Error", str(error))
+            return
 
-        self.update_model_state_callback()
+        if edit.feature is not None:
+            self.add_expanded_feature_callback(edit.feature)
+        self.apply_operation_callback(edit.operation)
         self.dialog.destroy()
-        if group_created:
+        if edit.group_created:
             messagebox.showinfo(
                 "Group Created",
                 "A new group was created. You can edit its cardinalities now.",
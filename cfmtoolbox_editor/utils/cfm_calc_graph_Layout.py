@@ -5,15 +5,24 @@ is centered above its children.
 
 Classes:
     Point: A data class representing a point with x and y coordinates.
+    LayoutCancelledError: Raised when a layout computation is cancelled.
+    LayoutCache: Remembers the contours of subtrees between layout computations.
     GraphLayoutCalculator: A class to calculate the layout positions of features in a feature model.
+
+Functions:
+    estimate_node_width: Roughly estimates the width of a node from the length of the feature name.
 """
 
-from typing import List, Tuple
+import threading
+from typing import Callable, List, NamedTuple, Tuple
 from math import ceil, floor
 from dataclasses import dataclass
 
 from cfmtoolbox import CFM, Feature
 
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+from cfmtoolbox_editor.utils.cfm_profiler import profiled
+
 
 @dataclass
 class Point:
@@ -21,6 +30,78 @@ class Point:
     y: int
 
 
+class LayoutCancelledError(Exception):
+    """
+    Raised by GraphLayoutCalculator.compute_positions if the computation has been cancelled.
+    """
+
+
+# Number of features processed between two checks for cancellation
+_CANCELLATION_CHECK_INTERVAL = 1024
+
+# Storing the contour of a subtree copies one entry per level. Higher subtrees are not cached, otherwise every
+# layout of a long chain of features would take quadratic time; they are merged again like without a cache.
+_MAX_CACHED_HEIGHT = 64
+
+
+class _SubtreeLayout(NamedTuple):
+    key: tuple  # (name, stable ids of the shown children) of the root of the subtree
+    left_contour: tuple[int, ...]
+    right_contour: tuple[int, ...]
+    child_shifts: tuple[int, ...]
+
+
+class LayoutCache:
+    """
+    Remembers the contour of every subtree of up to 64 levels and the shifts of its children between layout
+    computations. A subtree is only merged again if the name or the shown children of its root changed, or if one of
+    its subtrees was merged again. After an edit, the contours are therefore only recomputed along the path from the
+    changed feature to the root.
+
+    The entries are keyed by the stable feature ids. The cache assumes that the widths of the nodes only depend on
+    the names, it has to be cleared if the node widths change otherwise, e.g. after a font change.
+    """
+
+    def __init__(self):
+        self.entries: dict[int, _SubtreeLayout] = {}
+        self.max_node_width: int | None = None
+        self.lock = threading.Lock()
+        """Held while the cache is used, so layouts computed in different threads do not interfere."""
+
+    def clear(self):
+        """
+        Forget all subtree layouts.
+        """
+        self.entries = {}
+
+    def contour(self, uid: int) -> Tuple[List[int], List[int]]:
+        """
+        Get a copy of the cached contour of a subtree, which may be changed by merging it.
+
+        Args:
+            uid (int): The stable id of the root of the subtree.
+
+        Returns:
+            Tuple[List[int], List[int]]: The left and right contour, deepest level first.
+        """
+        entry = self.entries[uid]
+        return list(entry.left_contour), list(entry.right_contour)
+
+
+def estimate_node_width(name: str) -> float:
+    """
+    Roughly estimates the width of a node from the length of the feature name. This works for a normal distribution
+    of letters, but is too small for names containing only m's for example. Used if no measured widths are available.
+
+    Args:
+        name (str): The name of the feature.
+
+    Returns:
+        float: The estimated width of the node in pixels.
+    """
+    return 6 * len(name)
+
+
 class GraphLayoutCalculator:
     """
     This class uses an adaption of the Reingold-Tilford algorithm to calculate the positions of the features in a
@@ -29,15 +110,28 @@ class GraphLayoutCalculator:
     """
 
     def __init__(
-        self, cfm: CFM, expanded_features: dict[int, bool], max_node_width: int
+        self,
+        cfm: CFM,
+        expanded_features: dict[int, bool],
+        max_node_width: int,
+        node_width: Callable[[str], float] = estimate_node_width,
+        is_cancelled: Callable[[], bool] | None = None,
+        cache: LayoutCache | None = None,
     ):
         """
         Initialize the GraphLayoutCalculator with the specified parameters.
 
         Args:
             cfm (CFM): The feature model to calculate the layout for.
-            expanded_features (dict[int, bool]): Dictionary to track expanded/collapsed state of features.
+            expanded_features (dict[int, bool]): The expanded/collapsed states of the features, keyed by their stable
+                ids (see feature_uid). Features without an entry are expanded.
             max_node_width (int): The maximum width of a node in the graph. If the text is longer, it will be cut off.
+            node_width (Callable[[str], float], optional): Returns the width in pixels of the node of a feature with
+                the given name. Defaults to a rough estimate from the length of the name.
+            is_cancelled (Callable[[], bool], optional): Polled regularly while the positions are computed, e.g. in a
+                background thread. If it returns True, the computation stops with a LayoutCancelledError.
+            cache (LayoutCache, optional): Contours of subtrees from earlier computations for the same feature model.
+                Only subtrees that changed since are merged again.
         """
         self.cfm = cfm
         """The feature model to calculate the layout for."""
@@ -48,16 +142,22 @@ class GraphLayoutCalculator:
         self.max_node_width: int = max_node_width
         """The maximum width of a node in the graph. If the text is longer, it will be cut off."""
 
-        self.pos = {id(feature): Point(0, 0) for feature in cfm.features}
-        """The final positions of the features in the feature model."""
+        self.pos = {feature_uid(feature): Point(0, 0) for feature in cfm.features}
+        """The final positions of the features in the feature model, keyed by the stable ids of the features."""
 
-        self.shift = {id(feature): 0 for feature in cfm.features}
+        self.shift = {feature_uid(feature): 0 for feature in cfm.features}
         """The x shifts of the features relative to their parent."""
 
-        # TODO: This works for a normal distribution of letters. But it is too small for feature names containing only
-        #  m's for example. A better solution would be to calculate the width of the text in pixels if possible.
-        self.scale_text = 3
+        self.node_width = node_width
+        """Returns the width in pixels of the node of a feature with the given name."""
 
+        self.is_cancelled = is_cancelled
+        """Returns whether the computation has been cancelled."""
+
+        self.cache = cache
+        """Contours of unchanged subtrees from earlier computations."""
+
+    @profiled("compute_positions")
     def compute_positions(self) -> dict[int, Point]:
         """
         Computes the coordinates of all features with the Reingold-Tilford algorithm. The dictionary can be accessed
@@ -65,155 +165,259 @@ class GraphLayoutCalculator:
 
         Returns:
             dict[int, Point]: The computed positions of the features.
+
+        Raises:
+            LayoutCancelledError: If is_cancelled returned True during the computation.
         """
+        self._check_cancelled()
         self._compute_y(self.cfm.root, 0)
-        self._compute_shift(self.cfm.root)
+        if self.cache is None:
+            self._compute_shift(self.cfm.root)
+        else:
+            with self.cache.lock:
+                if self.cache.max_node_width != self.max_node_width:
+                    self.cache.clear()
+                    self.cache.max_node_width = self.max_node_width
+                self._compute_shift(self.cfm.root)
+                if len(self.cache.entries) > 2 * len(self.pos) + 1024:
+                    # Forget the subtrees of features that no longer exist or are hidden
+                    self.cache.entries = {
+                        uid: entry
+                        for uid, entry in self.cache.entries.items()
+                        if uid in self.pos
+                    }
+        self._check_cancelled()
         self._compute_x(self.cfm.root)
         return self.pos
 
+    def _check_cancelled(self):
+        if self.is_cancelled is not None and self.is_cancelled():
+            raise LayoutCancelledError()
+
     def _compute_y(self, feature: Feature, depth: int):
         """
-        The leveled y coordinate is calculated by a simple breadth-first traversal.
+        The leveled y coordinate is calculated by a simple depth-first traversal with an explicit stack, so the depth
+        of the tree is not limited by the recursion limit.
 
         Args:
-            feature (Feature): The current feature to calculate the y-coordinate for.
-            depth (int): The current depth in the tree.
+            feature (Feature): The feature to start the traversal at.
+            depth (int): The depth of the feature in the tree.
         """
-        self.pos[id(feature)].y = depth * 100 + 50
-        if self.expanded_features[id(feature)]:
-            for child in feature.children:
-                self._compute_y(child, depth + 1)
+        stack = [(feature, depth)]
+        while stack:
+            current, current_depth = stack.pop()
+            self.pos[feature_uid(current)].y = current_depth * 100 + 50
+            if self.expanded_features.get(feature_uid(current), True):
+                stack.extend((child, current_depth + 1) for child in current.children)
 
     def _compute_shift(self, feature: Feature) -> Tuple[List[int], List[int]]:
         """
-        The shifts are calculated recursively from bottom to top. For each subtree, a contour is calculated that
-        describes the left and right boundary of the subtree. These subtrees are then placed as close to each other as
-        possible without overlapping. The parent is placed in the middle of the children and the shifts of the children
-        are calculated relative to the parent. The method returns the contour of the subtree and the shift is saved in
-        the according field.
+        The shifts are calculated from bottom to top in a post-order traversal with an explicit stack. For each
+        subtree, a contour is calculated that describes the left and right boundary of the subtree. These subtrees are
+        then placed as close to each other as possible without overlapping. The parent is placed in the middle of the
+        children and the shifts of the children are calculated relative to the parent. The method returns the contour
+        of the subtree and the shift is saved in the according field.
+
+        With a cache, subtrees whose root has the same name and shown children as in the cached layout, and whose
+        subtrees are all unchanged, are not merged again: the shifts of their children are taken from the cache, and
+        their contours are only copied from the cache if their parent has to be merged.
+
+        Args:
+            feature (Feature): The root of the subtree to calculate the shifts for.
+
+        Returns:
+            Tuple[List[int], List[int]]: The left and right contour of the subtree rooted at the feature, deepest level
+                first.
+        """
+        # Contours of the subtrees whose parents have not been processed yet. None stands for an unchanged subtree
+        # whose contour is in the cache.
+        contours: dict[int, Tuple[List[int], List[int]] | None] = {}
+        stack = [(feature, False)]
+        steps = 0
+        while stack:
+            steps += 1
+            if steps % _CANCELLATION_CHECK_INTERVAL == 0:
+                self._check_cancelled()
+            current, children_done = stack.pop()
+            uid = feature_uid(current)
+            children = current.children if self.expanded_features.get(uid, True) else []
+            if children and not children_done:
+                stack.append((current, True))
+                stack.extend((child, False) for child in children)
+                continue
+
+            child_uids = tuple(feature_uid(child) for child in children)
+            children_contours = [contours.pop(child_uid) for child_uid in child_uids]
+            if self.cache is None:
+                # Without a cache, all contours are computed
+                contours[uid] = self._compute_contour(
+                    current,
+                    [contour for contour in children_contours if contour is not None],
+                )
+                continue
+
+            key = (current.name, child_uids)
+            entry = self.cache.entries.get(uid)
+            if (
+                entry is not None
+                and entry.key == key
+                and all(contour is None for contour in children_contours)
+            ):
+                self.shift.update(zip(child_uids, entry.child_shifts))
+                contours[uid] = None
+                continue
+
+            contour = self._compute_contour(
+                current,
+                [
+                    self.cache.contour(child_uid)
+                    if child_contour is None
+                    else child_contour
+                    for child_uid, child_contour in zip(child_uids, children_contours)
+                ],
+            )
+            if len(contour[0]) <= _MAX_CACHED_HEIGHT:
+                self.cache.entries[uid] = _SubtreeLayout(
+                    key,
+                    tuple(contour[0]),
+                    tuple(contour[1]),
+                    tuple(self.shift[child_uid] for child_uid in child_uids),
+                )
+            else:
+                self.cache.entries.pop(uid, None)
+            contours[uid] = contour
+
+        root_contour = contours[feature_uid(feature)]
+        if root_contour is None:
+            assert self.cache is not None
+            return self.cache.contour(feature_uid(feature))
+        return root_contour
+
+    def _compute_contour(
+        self, feature: Feature, children_contours: List[Tuple[List[int], List[int]]]
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Merges the contours of the children of a feature and calculates their shifts relative to the feature.
+
+        A contour holds one entry per level of the subtree: the boundary of the top level relative to the root of the
+        subtree, followed by the offset of each level to the level above. The entries are stored with the deepest
+        level first, so merging two contours only touches the levels both subtrees share while the remaining deeper
+        levels of the longer contour are reused in place. Every merge therefore costs O(min(height_1, height_2)) and
+        the whole computation is linear in the number of features.
 
         Args:
             feature (Feature): The current feature to calculate the shift for.
+            children_contours (List[Tuple[List[int], List[int]]]): The contours of the children of the feature, empty
+                if the feature is collapsed or a leaf. The contours are reused for the contour of the feature.
 
         Returns:
-            Tuple[List[int], List[int]]: The left and right contour of the subtree rooted at the feature.
+            Tuple[List[int], List[int]]: The left and right contour of the subtree rooted at the feature, deepest level
+                first.
         """
+        half_node_width = self.node_width(feature.name) / 2
+        half_width = ceil(min(half_node_width, self.max_node_width // 2))
         left_contour, right_contour = (
-            [
-                floor(
-                    max(-self.scale_text * len(feature.name), -self.max_node_width // 2)
-                )
-            ],
-            [ceil(min(self.scale_text * len(feature.name), self.max_node_width // 2))],
+            [floor(max(-half_node_width, -self.max_node_width // 2))],
+            [half_width],
         )
         children = feature.children
-        if (
-            not self.expanded_features[id(feature)]
-            or not children
-            or len(children) == 0
-        ):
+        if not children_contours:
             return left_contour, right_contour
 
         else:
-            children_contours = {}
-            for child in children:
-                children_contours[id(child)] = self._compute_shift(child)
+            first_child_left = children_contours[0][0][-1]
+            last_child_right = children_contours[-1][1][-1]
 
             # d[i] is the distance between the (i-1)-th and the i-th child
             d = [0 for _ in range(len(children))]
-            current_right_contour = children_contours[id(children[0])][1]
-            current_left_contour = children_contours[id(children[0])][0]
+            current_left_contour, current_right_contour = children_contours[0]
 
-            # Recursively merge the subtrees from left to right and update the right contour to avoid overlapping
+            # Merge the subtrees from left to right and update the right contour to avoid overlapping
             # non-neighbouring subtrees.
             for i in range(1, len(children)):
                 sum_left = 0
                 sum_right = 0
-                next_left_contour = children_contours[id(children[i])][0]
+                next_left_contour, next_right_contour = children_contours[i]
 
                 # Make sure the contours never overlap
                 for j in range(
-                    0, min(len(current_right_contour), len(next_left_contour))
+                    1, min(len(current_right_contour), len(next_left_contour)) + 1
                 ):
-                    sum_left += next_left_contour[j]
-                    sum_right += current_right_contour[j]
+                    sum_left += next_left_contour[-j]
+                    sum_right += current_right_contour[-j]
                     d[i] = max(d[i], sum_right - sum_left)
                 # add padding
                 d[i] += 50
 
                 # update contours of subtrees merged so far
-                new_right_contour = children_contours[id(children[i])][1]
-                current_height_right = len(new_right_contour)
+                current_height_right = len(next_right_contour)
                 if len(current_right_contour) > current_height_right:
-                    # old contour still visible
-                    new_right_contour.append(
-                        -sum(new_right_contour)
+                    # old contour still visible below the new subtree
+                    transition = (
+                        -sum(next_right_contour)
                         - d[i]
-                        + sum(current_right_contour[0 : current_height_right + 1])
+                        + sum(current_right_contour[-(current_height_right + 1) :])
                     )
-                    new_right_contour.extend(
-                        current_right_contour[
-                            current_height_right + 1 : len(current_right_contour)
-                        ]
-                    )
-                current_right_contour = new_right_contour
+                    del current_right_contour[-(current_height_right + 1) :]
+                    current_right_contour.append(transition)
+                    current_right_contour.extend(next_right_contour)
+                else:
+                    current_right_contour = next_right_contour
 
                 current_height_left = len(current_left_contour)
-                if (len(next_left_contour)) > current_height_left:
-                    # new contour visible
-                    current_left_contour.append(
+                if len(next_left_contour) > current_height_left:
+                    # new contour visible below the subtrees merged so far
+                    transition = (
                         -sum(current_left_contour)
                         + d[i]
-                        + sum(next_left_contour[0 : current_height_left + 1])
-                    )
-                    current_left_contour.extend(
-                        next_left_contour[
-                            current_height_left + 1 : len(next_left_contour)
-                        ]
+                        + sum(next_left_contour[-(current_height_left + 1) :])
                     )
+                    del next_left_contour[-(current_height_left + 1) :]
+                    next_left_contour.append(transition)
+                    next_left_contour.extend(current_left_contour)
+                    current_left_contour = next_left_contour
 
             total_distance = sum(d)
 
             accumulated_distance = 0
             for i in range(len(children)):
                 accumulated_distance += d[i]
-                self.shift[id(children[i])] = accumulated_distance - ceil(
+                self.shift[feature_uid(children[i])] = accumulated_distance - ceil(
                     total_distance / 2
                 )
 
-            left_contour.append(
-                self.shift[id(children[0])]
-                + children_contours[id(children[0])][0][0]
-                + ceil(
-                    min(self.scale_text * len(feature.name), self.max_node_width // 2)
-                )
+            # The top level of the merged children becomes the second level of this subtree.
+            current_left_contour.pop()
+            current_left_contour.append(
+                self.shift[feature_uid(children[0])] + first_child_left + half_width
             )
-            left_contour.extend(current_left_contour[1:])
+            current_left_contour.extend(left_contour)
 
-            right_contour.append(
-                self.shift[id(children[-1])]
-                + children_contours[id(children[-1])][1][0]
-                - ceil(
-                    min(self.scale_text * len(feature.name), self.max_node_width // 2)
-                )
+            current_right_contour.pop()
+            current_right_contour.append(
+                self.shift[feature_uid(children[-1])] + last_child_right - half_width
             )
-            right_contour.extend(current_right_contour[1:])
+            current_right_contour.extend(right_contour)
 
-            return left_contour, right_contour
+            return current_left_contour, current_right_contour
 
     def _compute_x(self, feature: Feature):
         """
-        The x coordinate is calculated by a simple depth-first traversal.
+        The x coordinate is calculated by a simple depth-first traversal with an explicit stack.
 
         Args:
-            feature (Feature): The current feature to calculate the x-coordinate for.
+            feature (Feature): The feature to start the traversal at.
         """
-        parent = feature.parent
-        if parent is None:
-            self.pos[id(feature)].x = 400
-        else:
-            self.pos[id(feature)].x = self.pos[id(parent)].x + self.shift[id(feature)]
+        stack = [feature]
+        while stack:
+            current = stack.pop()
+            parent = current.parent
+            if parent is None:
+                self.pos[feature_uid(current)].x = 400
+            else:
+                self.pos[feature_uid(current)].x = (
+                    self.pos[feature_uid(parent)].x + self.shift[feature_uid(current)]
+                )
 
-        if self.expanded_features[id(feature)]:
-            for child in feature.children:
-                self._compute_x(child)
+            if self.expanded_features.get(feature_uid(current), True):
+                stack.extend(current.children)
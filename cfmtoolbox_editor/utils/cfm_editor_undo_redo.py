@@ -2,59 +2,250 @@
 This module defines the UndoRedoManager class, which is responsible for managing the undo and redo
 functionality for the feature model editor.
 
+The history is a log of reversible operations (see cfm_operations). Undoing an operation applies its inverse to the
+current feature model, redoing it applies the operation again, so an edit costs memory proportional to the edit and
+not to the size of the model. States added without an operation are stored as persistent snapshots (see
+cfm_snapshots), which share all unchanged subtrees with the previous snapshot. The features changed by the operations
+since the previous snapshot are tracked, so a snapshot only visits the changed paths if the features changed without
+an operation are given as well. A snapshot is only turned into a feature model when a state is restored from it.
+
+The history is bounded by a maximum number of entries and by an approximate memory budget. When either is exceeded,
+the oldest entries are evicted first. The initial state is kept outside of the history, so the model can always be
+reset to it.
+
 Classes:
     UndoRedoManager: A class to manage the undo and redo stacks for the feature model editor.
 """
 
-from copy import deepcopy
-from cfmtoolbox import CFM
+from typing import Callable, Iterable
+
+from cfmtoolbox import CFM, Feature
+
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_operations import Operation, ReplaceModel
+from cfmtoolbox_editor.utils.cfm_profiler import profiled
+from cfmtoolbox_editor.utils.cfm_snapshots import ModelSnapshot, mark_changed
+from cfmtoolbox_editor.utils.cfm_utils import estimate_size
+
+HistoryEntry = Operation | ModelSnapshot
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _apply(operation: Operation, cfm: CFM, index: FeatureIndex | None):
+    operation.apply(cfm, index)
 
 
 class UndoRedoManager:
-    def __init__(self):
+    def __init__(
+        self,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        apply: Callable[[Operation, CFM, FeatureIndex | None], None] | None = None,
+    ):
         """
         Initialize the UndoRedoManager with empty undo and redo stacks.
+
+        Args:
+            max_entries (int, optional): The maximum number of entries kept in the undo and redo stacks together.
+                None disables the limit.
+            max_bytes (int, optional): The approximate number of bytes the entries of the undo and redo stacks may
+                use together. None disables the limit.
+            apply (Callable[[Operation, CFM, FeatureIndex | None], None], optional): Applies the operations of
+                undo, redo and reset to the current state, e.g. to record them in a journal (see cfm_journal).
+                Defaults to Operation.apply.
         """
-        self.undo_stack: list[CFM] = []
-        self.redo_stack: list[CFM] = []
-        self.initial_state: CFM | None = None
+        self.undo_stack: list[HistoryEntry] = []
+        self.redo_stack: list[HistoryEntry] = []
+        self.initial_state: ModelSnapshot | None = None
+        self.current_state: CFM | None = None
+        # The snapshot taken last, later snapshots share their unchanged nodes with it
+        self._latest_snapshot: ModelSnapshot | None = None
+        # The model the latest snapshot was taken of, and the ids of its features changed since then together with
+        # their ancestors (see mark_changed), None if they are not known
+        self._snapshot_model: CFM | None = None
+        self._changed: set[int] | None = None
+        self._constraints_changed = False
+        # The oldest snapshot of the history, which is charged with the size of all of its nodes
+        self._base_snapshot: ModelSnapshot | None = None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.apply = apply or _apply
+        self.history_size = 0
+        self._entry_sizes: dict[int, int] = {}
 
-    def add_state(self, cfm: CFM):
+    @profiled("add_state")
+    def add_state(
+        self,
+        cfm: CFM,
+        operation: Operation | None = None,
+        index: FeatureIndex | None = None,
+        changed: Iterable[Feature] | None = None,
+    ):
         """
         Add a new state to the undo stack and clear the redo stack.
 
         Args:
             cfm (CFM): The current state of the feature model.
+            operation (Operation, optional): The operation that led to the current state and has already been
+                applied to it. If omitted, a snapshot of the feature model is stored instead.
+            index (FeatureIndex, optional): An index of the current state, which is used to look up the features
+                changed by the operation. Without an index, the next snapshot compares the whole model.
+            changed (Iterable[Feature], optional): Without an operation, the features whose name, cardinalities or
+                children were changed since the last state was added, given only if the constraints were not changed.
+                The snapshot then only visits the paths from the changed features to the root. If omitted, the
+                snapshot compares the whole model.
         """
-        self.undo_stack.append(deepcopy(cfm))
+        for entry in self.redo_stack:
+            self._forget(entry)
         self.redo_stack.clear()
+        if cfm is not self._snapshot_model:
+            self._changed = None
+        if operation is None:
+            if changed is None:
+                self._changed = None
+            elif self._changed is not None:
+                mark_changed(self._changed, changed)
+            self._push(self._snapshot(cfm))
+        else:
+            self._track(operation, index)
+            self._push(operation)
+        self.current_state = cfm
+        self._evict()
 
-    def undo(self) -> CFM | None:
+    def undo(self, index: FeatureIndex | None = None) -> CFM | None:
         """
         Undo the last action and return the previous state.
 
+        Args:
+            index (FeatureIndex, optional): An index of the current state. An undone operation is reverted on the
+                current state, using and updating the index. If the state has to be restored from a snapshot, a new
+                feature model is returned instead and the index is left as it is.
+
         Returns:
             CFM | None: The previous state of the feature model, or None if no undo is possible.
         """
         if len(self.undo_stack) > 1:
-            current_state = self.undo_stack.pop()
-            self.redo_stack.append(current_state)
-            return deepcopy(self.undo_stack[-1])
+            entry = self.undo_stack.pop()
+            self.redo_stack.append(entry)
+            if isinstance(entry, Operation) and self.current_state is not None:
+                inverse = entry.invert()
+                self.apply(inverse, self.current_state, index)
+                self._track(inverse, index)
+            else:
+                self.current_state = self._restore_state()
+            return self.current_state
         return None
 
-    def redo(self) -> CFM | None:
+    def redo(self, index: FeatureIndex | None = None) -> CFM | None:
         """
         Redo the last undone action and return the state.
 
+        Args:
+            index (FeatureIndex, optional): An index of the current state, see undo.
+
         Returns:
             CFM | None: The redone state of the feature model, or None if no redo is possible.
         """
         if self.redo_stack:
-            state = self.redo_stack.pop()
-            self.undo_stack.append(state)
-            return deepcopy(state)
+            entry = self.redo_stack.pop()
+            self.undo_stack.append(entry)
+            if isinstance(entry, Operation) and self.current_state is not None:
+                self.apply(entry, self.current_state, index)
+                self._track(entry, index)
+            else:
+                self.current_state = self._restore_state()
+                self._drop_unreachable_entries()
+            return self.current_state
         return None
 
+    def _restore_state(self) -> CFM:
+        # Rebuild the state at the top of the undo stack from the closest snapshot below it. The restored state is a
+        # new model, whose differences to the latest snapshot are not tracked.
+        self._changed = None
+        for index in range(len(self.undo_stack) - 1, -1, -1):
+            snapshot = self.undo_stack[index]
+            if isinstance(snapshot, ModelSnapshot):
+                state = snapshot.to_cfm()
+                for operation in self.undo_stack[index + 1 :]:
+                    assert isinstance(operation, Operation)
+                    operation.apply(state)
+                return state
+        raise ValueError("The undo history contains no snapshot to restore from.")
+
+    def _snapshot(self, cfm: CFM) -> ModelSnapshot:
+        self._latest_snapshot = ModelSnapshot.from_cfm(
+            cfm, self._latest_snapshot, self._changed, self._constraints_changed
+        )
+        self._snapshot_model = cfm
+        self._changed = set()
+        self._constraints_changed = False
+        return self._latest_snapshot
+
+    def _track(self, operation: Operation, index: FeatureIndex | None):
+        # Marks the features changed by an operation that has just been applied to the current state
+        if self._changed is None:
+            return
+        names = operation.changed_names()
+        if names is None or index is None:
+            self._changed = None
+            return
+        self._constraints_changed |= operation.changes_constraints()
+        features = (index.get(name) for name in names)
+        # Features removed by a later part of a composite operation are no longer found, their parents are marked
+        mark_changed(
+            self._changed, (feature for feature in features if feature is not None)
+        )
+
+    def _push(self, entry: HistoryEntry):
+        self.undo_stack.append(entry)
+        # A snapshot is charged with the nodes it does not share with the previous snapshot
+        size = entry.size if isinstance(entry, ModelSnapshot) else estimate_size(entry)
+        self._entry_sizes[id(entry)] = size
+        self.history_size += size
+        self._drop_unreachable_entries()
+
+    def _forget(self, entry: HistoryEntry):
+        self.history_size -= self._entry_sizes.pop(id(entry), 0)
+
+    def _evict(self):
+        # The current state (top of the undo stack) is always kept
+        while len(self.undo_stack) > 1 and (
+            (
+                self.max_entries is not None
+                and len(self.undo_stack) + len(self.redo_stack) > self.max_entries
+            )
+            or (self.max_bytes is not None and self.history_size > self.max_bytes)
+        ):
+            self._forget(self.undo_stack.pop(0))
+            self._drop_unreachable_entries()
+
+    def _drop_unreachable_entries(self):
+        # Undoing a snapshot rebuilds the state from an older snapshot. Entries below the oldest snapshot can
+        # therefore never be reached again and are dropped.
+        oldest_snapshot = next(
+            (
+                i
+                for i, entry in enumerate(self.undo_stack)
+                if isinstance(entry, ModelSnapshot)
+            ),
+            0,
+        )
+        for entry in self.undo_stack[:oldest_snapshot]:
+            self._forget(entry)
+        del self.undo_stack[:oldest_snapshot]
+
+        base = self.undo_stack[0] if self.undo_stack else None
+        if not isinstance(base, ModelSnapshot):
+            self._base_snapshot = None
+        elif base is not self._base_snapshot:
+            # The snapshots it shared nodes with are gone, so all of its nodes are charged to the history now
+            self._base_snapshot = base
+            full_size = base.full_size()
+            self.history_size += full_size - self._entry_sizes.get(id(base), 0)
+            self._entry_sizes[id(base)] = full_size
+
     def set_initial_state(self, cfm: CFM):
         """
         Set the initial state of the feature model.
@@ -62,15 +253,29 @@ class UndoRedoManager:
         Args:
             cfm (CFM): The initial state of the feature model.
         """
-        self.initial_state = deepcopy(cfm)
+        self.initial_state = self._snapshot(cfm)
 
-    def reset(self) -> CFM:
+    def reset(self, index: FeatureIndex | None = None) -> CFM:
         """
-        Reset the feature model to its initial state.
+        Reset the feature model to its initial state. The reset is recorded in the history and can be undone.
+
+        Args:
+            index (FeatureIndex, optional): An index of the current state, which is rebuilt for the reset state.
 
         Returns:
             CFM: The initial state of the feature model.
         """
         assert self.initial_state is not None
-        self.add_state(self.initial_state)
-        return deepcopy(self.initial_state)
+        initial_state = self.initial_state.to_cfm()
+        if self.current_state is None:
+            self.add_state(initial_state)
+            return initial_state
+        operation = ReplaceModel(
+            self.current_state.root,
+            self.current_state.constraints,
+            initial_state.root,
+            initial_state.constraints,
+        )
+        self.apply(operation, self.current_state, index)
+        self.add_state(self.current_state, operation)
+        return self.current_state
@@ -0,0 +1,274 @@
+"""
+This module defines the FeatureIndex class, which provides constant-time lookups of the features of a feature model by
+name and by a stable id, of the constraints that involve a feature, and of the positions of the constraints. The index
+is kept up to date incrementally by the edit operations (see cfm_operations) and rebuilt when a whole model is loaded,
+e.g. after undo or redo.
+
+Classes:
+    FeatureIndex: An index of the features of a feature model by name and by stable id, and of their constraints.
+
+Functions:
+    feature_uid: Gets the stable id of a feature.
+    set_feature_uid: Sets the stable id of a feature.
+"""
+
+from itertools import count
+
+from cfmtoolbox import CFM, Constraint, Feature
+
+# Name of the attribute the stable id is stored in. Being an attribute of the feature, the id is kept by copies of the
+# feature (copy_subtree, deepcopy), so a feature restored from the undo history has the same id as before.
+_UID_ATTRIBUTE = "_cfm_editor_uid"
+_uids = count(1)
+
+
+def feature_uid(feature: Feature) -> int:
+    """
+    Gets the stable id of a feature. The id is assigned on first use and is kept when the feature is renamed, moved
+    or copied.
+
+    Args:
+        feature (Feature): The feature.
+
+    Returns:
+        int: The stable id of the feature.
+    """
+    uid = getattr(feature, _UID_ATTRIBUTE, None)
+    if uid is None:
+        uid = next(_uids)
+        setattr(feature, _UID_ATTRIBUTE, uid)
+    return uid
+
+
+def set_feature_uid(feature: Feature, uid: int):
+    """
+    Sets the stable id of a feature, e.g. of a feature recreated from a snapshot of the model (see cfm_snapshots).
+
+    Args:
+        feature (Feature): The feature.
+        uid (int): The stable id, as returned by feature_uid for the feature the snapshot was taken of.
+    """
+    setattr(feature, _UID_ATTRIBUTE, uid)
+
+
+class FeatureIndex:
+    def __init__(self, cfm: CFM | None = None):
+        """
+        Initialize the FeatureIndex, optionally with the features of a feature model.
+
+        Args:
+            cfm (CFM, optional): The feature model to index.
+        """
+        self._by_name: dict[str, Feature] = {}
+        self._by_uid: dict[int, Feature] = {}
+        # Stable id of a feature -> id(constraint) -> constraints involving the feature
+        self._constraints: dict[int, dict[int, Constraint]] = {}
+        # id(constraint) -> position in the list of constraints. Only the positions below _valid_positions are up to
+        # date, inserting or removing a constraint shifts the constraints behind it.
+        self._constraint_positions: dict[int, int] = {}
+        self._valid_positions = 0
+        if cfm is not None:
+            self.rebuild(cfm)
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def rebuild(self, cfm: CFM):
+        """
+        Index all features and constraints of a feature model, replacing the current content of the index.
+
+        Args:
+            cfm (CFM): The feature model to index.
+        """
+        self._by_name = {}
+        self._by_uid = {}
+        self._constraints = {}
+        self.add_subtree(cfm.root)
+        for constraint in cfm.constraints:
+            self.add_constraint(constraint)
+        self._constraint_positions = {}
+        self._number_constraints(cfm.constraints, 0)
+
+    def add_subtree(self, feature: Feature):
+        """
+        Add a feature and all of its descendants to the index.
+
+        Args:
+            feature (Feature): The root of the added subtree.
+        """
+        stack = [feature]
+        while stack:
+            current = stack.pop()
+            self._by_name[current.name] = current
+            self._by_uid[feature_uid(current)] = current
+            stack.extend(current.children)
+
+    def remove_subtree(self, feature: Feature):
+        """
+        Remove a feature and all of its descendants from the index. Their constraints are removed separately by
+        remove_constraint.
+
+        Args:
+            feature (Feature): The root of the removed subtree.
+        """
+        stack = [feature]
+        while stack:
+            current = stack.pop()
+            self._by_name.pop(current.name, None)
+            self._by_uid.pop(feature_uid(current), None)
+            stack.extend(current.children)
+
+    def rename(self, feature: Feature, old_name: str):
+        """
+        Update the index after a feature has been renamed.
+
+        Args:
+            feature (Feature): The renamed feature.
+            old_name (str): The name of the feature before it was renamed.
+        """
+        if self._by_name.get(old_name) is feature:
+            del self._by_name[old_name]
+        self._by_name[feature.name] = feature
+
+    def add_constraint(self, constraint: Constraint, position: int | None = None):
+        """
+        Add a constraint to the constraints of the features it involves.
+
+        Args:
+            constraint (Constraint): The constraint.
+            position (int, optional): The position the constraint has been inserted at into the list of constraints,
+                if it has been inserted.
+        """
+        if position is not None:
+            self._valid_positions = min(self._valid_positions, position)
+        for feature in (constraint.first_feature, constraint.second_feature):
+            self._constraints.setdefault(feature_uid(feature), {})[id(constraint)] = (
+                constraint
+            )
+
+    def remove_constraint(self, constraint: Constraint, position: int | None = None):
+        """
+        Remove a constraint from the constraints of the features it involves.
+
+        Args:
+            constraint (Constraint): The constraint.
+            position (int, optional): The position the constraint has been removed from in the list of constraints,
+                if it has been removed.
+        """
+        if position is not None:
+            self._constraint_positions.pop(id(constraint), None)
+            self._valid_positions = min(self._valid_positions, position)
+        for feature in (constraint.first_feature, constraint.second_feature):
+            constraints = self._constraints.get(feature_uid(feature))
+            if constraints is not None:
+                constraints.pop(id(constraint), None)
+                if not constraints:
+                    del self._constraints[feature_uid(feature)]
+
+    def constraints_of(self, feature: Feature) -> list[Constraint]:
+        """
+        Get the constraints that involve a feature.
+
+        Args:
+            feature (Feature): The feature.
+
+        Returns:
+            list[Constraint]: The constraints in which the feature is the first or the second feature.
+        """
+        return list(self._constraints.get(feature_uid(feature), {}).values())
+
+    def constraint_position(
+        self, constraints: list[Constraint], constraint: Constraint
+    ) -> int:
+        """
+        Get the position of a constraint in the list of constraints of the model. The positions are renumbered from
+        the first constraint inserted or removed since the last lookup, so looking up constraints in front of all
+        changes takes constant time.
+
+        Args:
+            constraints (list[Constraint]): The constraints of the indexed model.
+            constraint (Constraint): The constraint, which has to be one of the constraints.
+
+        Returns:
+            int: The position of the constraint.
+        """
+        position = self._constraint_positions.get(id(constraint))
+        if position is None or position >= self._valid_positions:
+            self._number_constraints(constraints, self._valid_positions)
+            position = self._constraint_positions.get(id(constraint))
+        if position is None or constraints[position] is not constraint:
+            # The list has been changed without the index, number it anew
+            self._number_constraints(constraints, 0)
+            position = self._constraint_positions[id(constraint)]
+        return position
+
+    def _number_constraints(self, constraints: list[Constraint], start: int):
+        positions = self._constraint_positions
+        for position in range(start, len(constraints)):
+            positions[id(constraints[position])] = position
+        self._valid_positions = len(constraints)
+
+    def get(self, name: str) -> Feature | None:
+        """
+        Get a feature by its name.
+
+        Args:
+            name (str): The name of the feature.
+
+        Returns:
+            Feature | None: The feature with the name, or None if the model contains no such feature.
+        """
+        return self._by_name.get(name)
+
+    def get_by_uid(self, uid: int) -> Feature | None:
+        """
+        Get a feature by its stable id.
+
+        Args:
+            uid (int): The stable id of the feature, see feature_uid.
+
+        Returns:
+            Feature | None: The feature with the id, or None if the model contains no such feature.
+        """
+        return self._by_uid.get(uid)
+
+    @staticmethod
+    def path(feature: Feature) -> list[Feature]:
+        """
+        Get the path from the root of the model to a feature by following the parent references.
+
+        Args:
+            feature (Feature): The feature.
+
+        Returns:
+            list[Feature]: The features from the root to the given feature.
+        """
+        path = []
+        current: Feature | None = feature
+        while current is not None:
+            path.append(current)
+            current = current.parent
+        path.reverse()
+        return path
+
+    @staticmethod
+    def subtree(feature: Feature) -> list[Feature]:
+        """
+        Get a feature and all of its descendants.
+
+        Args:
+            feature (Feature): The root of the subtree.
+
+        Returns:
+            list[Feature]: The features of the subtree in pre-order.
+        """
+        features = []
+        stack = [feature]
+        while stack:
+            current = stack.pop()
+            features.append(current)
+            stack.extend(reversed(current.children))
+        return features
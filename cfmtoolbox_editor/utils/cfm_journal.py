@@ -0,0 +1,740 @@
+"""
+This module defines the edit journal, which protects the edits of a session against crashes of the editor. Every
+operation applied to the model (see cfm_operations) is appended to a sidecar file next to the model, e.g.
+"model.uvl.journal". When the editor is closed, the fingerprint of the final state is recorded; a journal whose final
+state is the model that is opened again has been saved and is dropped. If the editor crashes or the export fails, the
+edits of the journal can be replayed onto the model when it is opened again.
+
+The journal is a text file with one JSON record per line: a header with the fingerprint of the model the journal was
+started on, followed by the recorded operations and, once closed, the fingerprint of the final state. Records are
+written through a buffer, and the file is synced to disk (fsync) at most once per sync interval, so a burst of edits
+costs a single sync. A crash can therefore lose the edits of the last interval, but never corrupts the earlier ones: an
+incomplete last line is ignored when the journal is read.
+
+To keep the journal and the time to replay it bounded, it is periodically compacted: the file is atomically replaced
+by the header and a checkpoint, i.e. the whole model in its current state. A checkpoint is written once the records
+since the last one are larger than it, so the cost of the compaction is spread over the edits even for large models.
+Replaying a journal replaces the model by the last checkpoint and applies the operations recorded after it.
+
+Classes:
+    JournalError: Raised if a journal cannot be written, read or replayed.
+    JournalContents: The records of a journal that are needed to replay it.
+    Journal: Records operations in a journal file and compacts it.
+
+Functions:
+    journal_path: Gets the path of the journal of a model file.
+    model_to_dict: Converts a feature model to the JSON format of the journal.
+    model_from_dict: Creates a feature model from the JSON format of the journal.
+    model_fingerprint: Computes a hash identifying the content of a feature model.
+    operation_to_dict: Converts an operation to the JSON format of the journal.
+    operation_from_dict: Creates an operation from the JSON format of the journal.
+    apply_and_serialize: Applies an operation and converts it to the JSON format of the journal.
+    read_journal: Reads the records of a journal that are needed to replay it.
+    replay_journal: Applies the records of a journal to a feature model.
+"""
+
+import functools
+import gc
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator
+
+from cfmtoolbox import CFM, Cardinality, Constraint, Feature, Interval
+
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_operations import (
+    AddConstraint,
+    AddFeature,
+    CompositeOperation,
+    EditConstraint,
+    MoveFeature,
+    Operation,
+    RemoveConstraint,
+    RemoveFeature,
+    RenameFeature,
+    ReplaceModel,
+    SetCardinality,
+    find_feature,
+)
+from cfmtoolbox_editor.utils.cfm_utils import (
+    cardinality_to_edit_str,
+    edit_str_to_cardinality,
+)
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_VERSION = 1
+
+DEFAULT_SYNC_INTERVAL = 1.0
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+
+_BUFFER_SIZE = 64 * 1024
+
+
+class JournalError(ValueError):
+    """
+    Raised if a journal cannot be written, read or replayed. The message is meant to be shown to the user.
+    """
+
+
+def journal_path(model_path: Path) -> Path:
+    """
+    Gets the path of the journal of a model file, which is next to the model file.
+
+    Args:
+        model_path (Path): The path of the model file.
+
+    Returns:
+        Path: The path of the journal.
+    """
+    return model_path.with_name(model_path.name + JOURNAL_SUFFIX)
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # Converting a large model creates many small containers without cycles. Without the pause, they trigger
+    # repeated collections that traverse the whole model, which takes longer than the conversion itself.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_intervals(text: str) -> tuple[tuple[int, int | None], ...]:
+    # Models use few distinct cardinalities, so most of them are parsed only once
+    if not text:
+        return ()
+    return tuple(
+        (interval.lower, interval.upper)
+        for interval in edit_str_to_cardinality(text).intervals
+    )
+
+
+def _cardinality_from_str(text: str) -> Cardinality:
+    return Cardinality(
+        [Interval(lower, upper) for lower, upper in _parse_intervals(text)]
+    )
+
+
+def _features_to_list(root: Feature) -> list[list[Any]]:
+    # The features of a subtree in pre-order, every feature with the position of its parent in the list
+    features: list[list[Any]] = []
+    stack: list[tuple[Feature, int]] = [(root, -1)]
+    while stack:
+        feature, parent = stack.pop()
+        position = len(features)
+        features.append(
+            [
+                feature.name,
+                parent,
+                cardinality_to_edit_str(feature.instance_cardinality),
+                cardinality_to_edit_str(feature.group_type_cardinality),
+                cardinality_to_edit_str(feature.group_instance_cardinality),
+            ]
+        )
+        stack.extend((child, position) for child in reversed(feature.children))
+    return features
+
+
+def _features_from_list(features: list[list[Any]]) -> list[Feature]:
+    created: list[Feature] = []
+    for name, parent, instance, group_type, group_instance in features:
+        feature = Feature(
+            name=name,
+            instance_cardinality=_cardinality_from_str(instance),
+            group_type_cardinality=_cardinality_from_str(group_type),
+            group_instance_cardinality=_cardinality_from_str(group_instance),
+            parent=created[parent] if parent >= 0 else None,
+            children=[],
+        )
+        if parent >= 0:
+            created[parent].children.append(feature)
+        created.append(feature)
+    return created
+
+
+def _constraint_to_list(constraint: Constraint) -> list[Any]:
+    return [
+        constraint.require,
+        constraint.first_feature.name,
+        cardinality_to_edit_str(constraint.first_cardinality),
+        constraint.second_feature.name,
+        cardinality_to_edit_str(constraint.second_cardinality),
+    ]
+
+
+def _constraint_from_list(
+    constraint: list[Any], find: Callable[[str], Feature]
+) -> Constraint:
+    require, first_name, first_cardinality, second_name, second_cardinality = constraint
+    return Constraint(
+        require=require,
+        first_feature=find(first_name),
+        first_cardinality=_cardinality_from_str(first_cardinality),
+        second_feature=find(second_name),
+        second_cardinality=_cardinality_from_str(second_cardinality),
+    )
+
+
+def model_to_dict(cfm: CFM) -> dict[str, Any]:
+    """
+    Converts a feature model to the JSON format of the journal.
+
+    Args:
+        cfm (CFM): The feature model.
+
+    Returns:
+        dict[str, Any]: The features in pre-order and the constraints, with the features referenced by name.
+    """
+    with _gc_paused():
+        return {
+            "features": _features_to_list(cfm.root),
+            "constraints": [_constraint_to_list(c) for c in cfm.constraints],
+        }
+
+
+def model_from_dict(data: dict[str, Any]) -> CFM:
+    """
+    Creates a feature model from the JSON format of the journal.
+
+    Args:
+        data (dict[str, Any]): The model as created by model_to_dict.
+
+    Returns:
+        CFM: The feature model.
+
+    Raises:
+        JournalError: If a constraint references a feature that is not part of the model.
+    """
+    with _gc_paused():
+        features = _features_from_list(data["features"])
+    by_name = {feature.name: feature for feature in features}
+
+    def find(name: str) -> Feature:
+        if name not in by_name:
+            raise JournalError(f"Unknown feature in a constraint: {name}")
+        return by_name[name]
+
+    constraints = [_constraint_from_list(c, find) for c in data["constraints"]]
+    return CFM(root=features[0], constraints=constraints)
+
+
+def model_fingerprint(cfm: CFM) -> str:
+    """
+    Computes a hash identifying the content of a feature model, which is used to check that a journal belongs to the
+    model it is replayed onto.
+
+    Args:
+        cfm (CFM): The feature model.
+
+    Returns:
+        str: The SHA-256 hash of the model in the JSON format of the journal.
+    """
+    with _gc_paused():
+        encoded = json.dumps(model_to_dict(cfm), separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def operation_to_dict(operation: Operation) -> dict[str, Any]:
+    """
+    Converts an operation that has just been applied to a model to the JSON format of the journal. Removed features
+    and constraints are not stored, they are taken from the model again when the operation is replayed. Composite
+    operations whose parts change the features added by earlier parts are converted by apply_and_serialize instead.
+
+    Args:
+        operation (Operation): The operation.
+
+    Returns:
+        dict[str, Any]: The type of the operation ("op") and its arguments.
+
+    Raises:
+        JournalError: If the type of the operation is not supported.
+    """
+    if isinstance(operation, CompositeOperation):
+        return {
+            "op": "composite",
+            "operations": [operation_to_dict(op) for op in operation.operations],
+        }
+    if isinstance(operation, AddFeature):
+        return {
+            "op": "add_feature",
+            "parent": operation.parent_name,
+            "index": operation.index,
+            "features": _features_to_list(operation.feature),
+        }
+    if isinstance(operation, RemoveFeature):
+        return {
+            "op": "remove_feature",
+            "parent": operation.parent_name,
+            "index": operation.index,
+        }
+    if isinstance(operation, MoveFeature):
+        return {
+            "op": "move_feature",
+            "old_parent": operation.old_parent_name,
+            "old_index": operation.old_index,
+            "new_parent": operation.new_parent_name,
+            "new_index": operation.new_index,
+        }
+    if isinstance(operation, RenameFeature):
+        return {
+            "op": "rename_feature",
+            "old": operation.old_name,
+            "new": operation.new_name,
+        }
+    if isinstance(operation, SetCardinality):
+        return {
+            "op": "set_cardinality",
+            "feature": operation.feature_name,
+            "attribute": operation.attribute,
+            "old": cardinality_to_edit_str(operation.old_cardinality),
+            "new": cardinality_to_edit_str(operation.new_cardinality),
+        }
+    if isinstance(operation, AddConstraint):
+        return {
+            "op": "add_constraint",
+            "index": operation.index,
+            "constraint": _constraint_to_list(operation.constraint),
+        }
+    if isinstance(operation, RemoveConstraint):
+        return {"op": "remove_constraint", "index": operation.index}
+    if isinstance(operation, EditConstraint):
+        return {
+            "op": "edit_constraint",
+            "index": operation.index,
+            "old": _constraint_to_list(operation.old_constraint),
+            "new": _constraint_to_list(operation.new_constraint),
+        }
+    if isinstance(operation, ReplaceModel):
+        return {
+            "op": "replace_model",
+            "model": model_to_dict(
+                CFM(root=operation.new_root, constraints=operation.new_constraints)
+            ),
+        }
+    raise JournalError(f"Unsupported operation: {type(operation).__name__}")
+
+
+def operation_from_dict(
+    data: dict[str, Any], cfm: CFM, index: FeatureIndex | None = None
+) -> Operation:
+    """
+    Creates an operation from the JSON format of the journal. The features referenced by constraints are looked up
+    in the model, so the model has to be in the state the operation was recorded in.
+
+    Args:
+        data (dict[str, Any]): The operation as created by operation_to_dict.
+        cfm (CFM): The feature model the operation will be applied to.
+        index (FeatureIndex, optional): An index of the features of the model.
+
+    Returns:
+        Operation: The operation, which has not been applied yet.
+
+    Raises:
+        JournalError: If the type of the operation is unknown.
+    """
+
+    def find(name: str) -> Feature:
+        return find_feature(cfm, name, index)
+
+    kind = data["op"]
+    if kind == "composite":
+        # The operations of a composite operation depend on each other, they are created while it is applied
+        return _ReplayedComposite(data["operations"])
+    if kind == "add_feature":
+        feature = _features_from_list(data["features"])[0]
+        return AddFeature(data["parent"], data["index"], feature)
+    if kind == "remove_feature":
+        return RemoveFeature(data["parent"], data["index"])
+    if kind == "move_feature":
+        return MoveFeature(
+            data["old_parent"], data["old_index"], data["new_parent"], data["new_index"]
+        )
+    if kind == "rename_feature":
+        return RenameFeature(data["old"], data["new"])
+    if kind == "set_cardinality":
+        return SetCardinality(
+            data["feature"],
+            data["attribute"],
+            _cardinality_from_str(data["old"]),
+            _cardinality_from_str(data["new"]),
+        )
+    if kind == "add_constraint":
+        return AddConstraint(
+            data["index"], _constraint_from_list(data["constraint"], find)
+        )
+    if kind == "remove_constraint":
+        return RemoveConstraint(data["index"])
+    if kind == "edit_constraint":
+        return EditConstraint(
+            data["index"],
+            _constraint_from_list(data["old"], find),
+            _constraint_from_list(data["new"], find),
+        )
+    if kind == "replace_model":
+        new = model_from_dict(data["model"])
+        return ReplaceModel(cfm.root, cfm.constraints, new.root, new.constraints)
+    raise JournalError(f"Unknown operation: {kind}")
+
+
+class _ReplayedComposite(CompositeOperation):
+    """
+    A composite operation read from a journal, whose operations are created one after the other while it is applied.
+    """
+
+    def __init__(self, records: list[dict[str, Any]]):
+        super().__init__([])
+        # The records of the operations that have not been created yet
+        self.records = records
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        if not self.records:
+            super().apply(cfm, index)
+            return
+        for record in self.records:
+            operation = operation_from_dict(record, cfm, index)
+            operation.apply(cfm, index)
+            self.operations.append(operation)
+        self.records = []
+
+
+def apply_and_serialize(
+    operation: Operation, cfm: CFM, index: FeatureIndex | None = None
+) -> dict[str, Any] | None:
+    """
+    Applies an operation to a feature model and converts it to the JSON format of the journal. The parts of a
+    composite operation are converted one by one, right after they have been applied, because later parts may change
+    the features added by earlier ones, e.g. when a deleted feature is restored and its children are moved back.
+
+    Args:
+        operation (Operation): The operation to apply.
+        cfm (CFM): The feature model to change.
+        index (FeatureIndex, optional): An index of the features of the model, see Operation.apply.
+
+    Returns:
+        dict[str, Any] | None: The operation as created by operation_to_dict, or None if the operation (or a part
+        of it) is not supported by the journal. The operation is applied in any case.
+    """
+    if isinstance(operation, _ReplayedComposite) and operation.records:
+        records = operation.records
+        operation.apply(cfm, index)
+        return {"op": "composite", "operations": records}
+    if isinstance(operation, CompositeOperation):
+        parts = [apply_and_serialize(part, cfm, index) for part in operation.operations]
+        if any(part is None for part in parts):
+            return None
+        return {"op": "composite", "operations": parts}
+    operation.apply(cfm, index)
+    try:
+        return operation_to_dict(operation)
+    except JournalError:
+        return None
+
+
+@dataclass
+class JournalContents:
+    """
+    The records of a journal that are needed to replay it.
+
+    Attributes:
+        base (str): The fingerprint of the model the journal was started on, see model_fingerprint.
+        records (list[dict[str, Any]]): The last checkpoint, if any, followed by the operations recorded after it.
+        end (str, optional): The fingerprint of the final state of the model, if the journal was closed normally.
+    """
+
+    base: str
+    records: list[dict[str, Any]] = field(default_factory=list)
+    end: str | None = None
+
+    @property
+    def edits(self) -> int:
+        """The number of operations recorded after the last checkpoint."""
+        return sum(1 for record in self.records if "op" in record)
+
+
+def read_journal(path: Path) -> JournalContents:
+    """
+    Reads the records of a journal that are needed to replay it. Records before the last checkpoint are skipped, and
+    an incomplete last line, e.g. from a crash while the record was written, is ignored.
+
+    Args:
+        path (Path): The path of the journal.
+
+    Returns:
+        JournalContents: The fingerprints of the model and the records to replay.
+
+    Raises:
+        JournalError: If the journal has no valid header or a record other than the last one is damaged.
+        OSError: If the journal cannot be read.
+    """
+    lines = path.read_bytes().split(b"\n")
+    try:
+        header = json.loads(lines[0])
+        version, base = header["journal"], header["base"]
+    except (ValueError, TypeError, KeyError) as error:
+        raise JournalError(f"{path} is not an edit journal.") from error
+    if version != JOURNAL_VERSION:
+        raise JournalError(f"Unsupported version of the journal {path}: {version}")
+    contents = JournalContents(base)
+
+    last = len(lines) - 1
+    with _gc_paused():
+        for number, line in enumerate(lines[1:], start=1):
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                if number == last:
+                    break
+                raise JournalError(
+                    f"Line {number + 1} of {path} is damaged."
+                ) from error
+            if "end" in record:
+                contents.end = record["end"]
+                continue
+            contents.end = None
+            if "checkpoint" in record:
+                contents.records = [record]
+            else:
+                contents.records.append(record)
+    return contents
+
+
+def replay_journal(
+    cfm: CFM, records: list[dict[str, Any]], index: FeatureIndex | None = None
+) -> list[Operation]:
+    """
+    Applies the records of a journal to a feature model. A checkpoint replaces the content of the model, the
+    operations are applied one after the other.
+
+    Args:
+        cfm (CFM): The feature model, in the state the journal was started on.
+        records (list[dict[str, Any]]): The records to replay, see read_journal.
+        index (FeatureIndex, optional): An index of the features of the model, which is used for the lookups and
+            updated to the changes.
+
+    Returns:
+        list[Operation]: The applied operations, a checkpoint is applied as a ReplaceModel operation.
+
+    Raises:
+        JournalError: If a record cannot be applied to the model. The records before it have been applied.
+    """
+    applied: list[Operation] = []
+    with _gc_paused():
+        for number, record in enumerate(records, start=1):
+            try:
+                if "checkpoint" in record:
+                    operation = operation_from_dict(
+                        {"op": "replace_model", "model": record["checkpoint"]},
+                        cfm,
+                        index,
+                    )
+                else:
+                    operation = operation_from_dict(record, cfm, index)
+                operation.apply(cfm, index)
+            except JournalError:
+                raise
+            except (ValueError, LookupError, TypeError) as error:
+                raise JournalError(
+                    f"Edit {number} of the journal cannot be applied: {error}"
+                ) from error
+            applied.append(operation)
+    return applied
+
+
+def _encode(record: dict[str, Any]) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _sync_directory(directory: Path):
+    # Makes the replacement of a file durable, not supported on all platforms
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class Journal:
+    def __init__(
+        self,
+        path: Path,
+        base: str,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        checkpoint_interval: int | None = DEFAULT_CHECKPOINT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Start a new journal, replacing an existing file at the path.
+
+        Args:
+            path (Path): The path of the journal.
+            base (str): The fingerprint of the model the journal is started on, see model_fingerprint.
+            sync_interval (float, optional): The maximum time in seconds between writing a record and syncing it to
+                disk, as long as records are appended. Call sync to sync the records when no more edits follow.
+            checkpoint_interval (int, optional): The minimum number of operations after which the journal is
+                compacted into a checkpoint. The records since the last checkpoint must also be larger than the
+                checkpoint itself, so large models are compacted less often. None disables the compaction.
+            clock (Callable[[], float], optional): Returns the current time in seconds.
+
+        Raises:
+            OSError: If the journal cannot be written.
+        """
+        self.path = path
+        self.base = base
+        self.sync_interval = sync_interval
+        self.checkpoint_interval = checkpoint_interval
+        # The number of operations and their bytes appended since the last checkpoint
+        self.entries = 0
+        self._appended_bytes = 0
+        self._checkpoint_bytes = 0
+        # Whether records have been written since the last sync
+        self.pending = False
+        self._clock = clock
+        self._last_sync = clock()
+        self._file: BinaryIO | None = None
+        self._rewrite([_encode({"journal": JOURNAL_VERSION, "base": base})])
+
+    def apply(self, operation: Operation, cfm: CFM, index: FeatureIndex | None = None):
+        """
+        Apply an operation to the model and append it to the journal, see apply_and_serialize. If the operation is
+        not supported by the journal, a checkpoint of the model is written instead. The record is synced to disk if
+        the last sync is longer ago than the sync interval, and the journal is compacted when it is due (see
+        checkpoint_interval).
+
+        Args:
+            operation (Operation): The operation to apply.
+            cfm (CFM): The feature model to change.
+            index (FeatureIndex, optional): An index of the features of the model, see Operation.apply.
+
+        Raises:
+            JournalError: If a checkpoint is needed, but a constraint references a feature that is not part of the
+                model. The operation has been applied.
+            OSError: If the journal cannot be written. The operation has been applied.
+        """
+        record = apply_and_serialize(operation, cfm, index)
+        if record is None:
+            self.checkpoint(cfm)
+        else:
+            self._append(record, cfm)
+
+    def append(self, operation: Operation, cfm: CFM | None = None):
+        """
+        Append an operation right after it has been applied to the model, before later edits change the features
+        it added. Composite operations whose parts depend on each other have to be recorded with apply instead.
+
+        Args:
+            operation (Operation): The applied operation.
+            cfm (CFM, optional): The model in its current state. If given, the journal is compacted into a
+                checkpoint of the model when it is due, see checkpoint_interval.
+
+        Raises:
+            JournalError: If the type of the operation is not supported.
+            OSError: If the journal cannot be written.
+        """
+        self._append(operation_to_dict(operation), cfm)
+
+    def _append(self, record: dict[str, Any], cfm: CFM | None):
+        line = _encode(record)
+        self._write(line)
+        self.entries += 1
+        self._appended_bytes += len(line)
+        if (
+            cfm is not None
+            and self.checkpoint_interval is not None
+            and self.entries >= self.checkpoint_interval
+            and self._appended_bytes >= self._checkpoint_bytes
+        ):
+            self.checkpoint(cfm)
+        elif self._clock() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def checkpoint(self, cfm: CFM):
+        """
+        Compact the journal: the file is atomically replaced by the header and a checkpoint of the model, so the
+        journal stays valid if the editor crashes while it is compacted.
+
+        Args:
+            cfm (CFM): The model in its current state.
+
+        Raises:
+            JournalError: If a constraint references a feature that is not part of the model.
+            OSError: If the journal cannot be written.
+        """
+        checkpoint = _encode({"checkpoint": model_to_dict(cfm)})
+        self._rewrite(
+            [_encode({"journal": JOURNAL_VERSION, "base": self.base}), checkpoint]
+        )
+        self.entries = 0
+        self._appended_bytes = 0
+        self._checkpoint_bytes = len(checkpoint)
+
+    def sync(self):
+        """
+        Write the buffered records and sync the journal to disk, if records have been written since the last sync.
+
+        Raises:
+            OSError: If the journal cannot be written.
+        """
+        self._last_sync = self._clock()
+        if not self.pending or self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.pending = False
+
+    def close(self, remove: bool = False, end: str | None = None):
+        """
+        Sync and close the journal.
+
+        Args:
+            remove (bool, optional): Whether the journal file is deleted.
+            end (str, optional): The fingerprint of the final state of the model, see model_fingerprint. It is
+                recorded, so a journal whose edits have been saved can be recognized when the model is opened again.
+        """
+        if self._file is not None:
+            if not remove:
+                if end is not None:
+                    self._write(_encode({"end": end}))
+                self.sync()
+            self._file.close()
+            self._file = None
+        if remove:
+            self.path.unlink(missing_ok=True)
+
+    def _write(self, line: bytes):
+        if self._file is None:
+            raise JournalError(f"The journal {self.path} is closed.")
+        self._file.write(line)
+        self.pending = True
+
+    def _rewrite(self, lines: list[bytes]):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "wb") as file:
+            file.write(b"".join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        _sync_directory(self.path.parent)
+        self._file = open(self.path, "ab", buffering=_BUFFER_SIZE)
+        self.pending = False
+        self._last_sync = self._clock()
@@ -0,0 +1,200 @@
+"""
+This module defines the LayoutWorker class, which computes the layout of large feature models in a background thread,
+so that the editor stays responsive while the positions are calculated.
+
+The worker never reads the edited model. It lays out a snapshot of the shape of the shown tree (names, children and
+stable ids), taken on the Tk thread by layout_snapshot. The result, or the error of a failed computation, is handed back
+to the Tk thread by polling with after. Only the most recently submitted job is delivered: submitting a new job or
+cancelling cancels the older ones, a running computation is stopped at its next cancellation check.
+
+Classes:
+    LayoutWorker: Computes layouts in a background thread and delivers the latest result to the Tk thread.
+
+Functions:
+    layout_snapshot: Copies the shape of the shown part of a feature model for a layout computation.
+"""
+
+import queue
+import threading
+from copy import copy
+from typing import Callable
+
+from cfmtoolbox import CFM, Feature
+
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import (
+    GraphLayoutCalculator,
+    LayoutCache,
+    LayoutCancelledError,
+    Point,
+)
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+
+
+def layout_snapshot(cfm: CFM, expanded_features: dict[int, bool]) -> tuple[CFM, int]:
+    """
+    Copies the shape of the shown part of a feature model. The children of collapsed features are left out, so the
+    snapshot can be laid out without expansion states. The copied features keep their stable ids, so the positions
+    computed for the snapshot apply to the model.
+
+    Args:
+        cfm (CFM): The feature model.
+        expanded_features (dict[int, bool]): The expanded/collapsed states keyed by stable feature ids.
+
+    Returns:
+        tuple[CFM, int]: The snapshot and the number of features in it.
+    """
+    feature_uid(cfm.root)
+    root = copy(cfm.root)
+    root.parent = None
+    root.children = []
+    size = 1
+    stack: list[tuple[Feature, Feature]] = [(cfm.root, root)]
+    while stack:
+        feature, feature_copy = stack.pop()
+        if not expanded_features.get(feature_uid(feature), True):
+            continue
+        for child in feature.children:
+            feature_uid(child)
+            child_copy = copy(child)
+            child_copy.parent = feature_copy
+            child_copy.children = []
+            feature_copy.children.append(child_copy)
+            stack.append((child, child_copy))
+        size += len(feature.children)
+    return CFM(root=root, constraints=[]), size
+
+
+class LayoutWorker:
+    def __init__(self, widget, poll_interval: int = 15):
+        """
+        Initialize the LayoutWorker. The background thread is started when the first job is submitted.
+
+        Args:
+            widget: A Tk widget, used to poll for results with after.
+            poll_interval (int, optional): Milliseconds between two checks for a result.
+        """
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._generation = 0  # Generation of the latest job, older jobs are stale
+        self._pending: tuple | None = None  # Latest job that has not been started yet
+        self._thread: threading.Thread | None = None
+        self._results: queue.Queue = queue.Queue()
+        # Generation of the job whose result is awaited
+        self._expected: int | None = None
+        self._polling = False
+
+    @property
+    def busy(self) -> bool:
+        """
+        Whether the result of a submitted job is still awaited.
+        """
+        return self._expected is not None
+
+    def submit(
+        self,
+        snapshot: CFM,
+        max_node_width: int,
+        node_width: Callable[[str], float],
+        callback: Callable[[dict[int, Point]], None],
+        cache: LayoutCache | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ):
+        """
+        Compute the layout of a snapshot in the background and call the callback with the positions on the Tk thread.
+        Older jobs are cancelled.
+
+        Args:
+            snapshot (CFM): The snapshot to lay out, see layout_snapshot. It must not be changed afterwards.
+            max_node_width (int): The maximum width of a node.
+            node_width (Callable[[str], float]): Returns the width of the node of a feature. It is called from the
+                background thread and must therefore not use Tk.
+            callback (Callable[[dict[int, Point]], None]): Called with the positions keyed by stable feature ids.
+            cache (LayoutCache, optional): Contours of the subtrees from earlier layouts of the model.
+            on_error (Callable[[Exception], None], optional): Called with the error on the Tk thread if the layout
+                computation fails. Without it, the error is raised from the poll callback.
+        """
+        with self._lock:
+            self._generation += 1
+            self._expected = self._generation
+            self._pending = (
+                self._generation,
+                snapshot,
+                max_node_width,
+                node_width,
+                callback,
+                cache,
+                on_error,
+            )
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, daemon=True)
+                self._thread.start()
+        self._schedule_poll()
+
+    def cancel(self):
+        """
+        Cancel all submitted jobs, their results are not delivered.
+        """
+        with self._lock:
+            self._generation += 1
+            self._expected = None
+            self._pending = None
+
+    def _work(self):
+        while True:
+            with self._lock:
+                job = self._pending
+                self._pending = None
+                if job is None:
+                    self._thread = None
+                    return
+            (
+                generation,
+                snapshot,
+                max_node_width,
+                node_width,
+                callback,
+                cache,
+                on_error,
+            ) = job
+            try:
+                positions = GraphLayoutCalculator(
+                    snapshot,
+                    {},
+                    max_node_width,
+                    node_width,
+                    is_cancelled=lambda: generation != self._generation,
+                    cache=cache,
+                ).compute_positions()
+            except LayoutCancelledError:
+                continue
+            except Exception as error:
+                # Reported on the Tk thread
+                self._results.put((generation, error, on_error))
+                continue
+            self._results.put((generation, positions, callback))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        result = None
+        while True:
+            try:
+                generation, value, callback = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._expected:
+                result = (value, callback)
+
+        if result is not None:
+            self._expected = None
+            value, callback = result
+            if isinstance(value, Exception) and callback is None:
+                raise value
+            callback(value)
+        elif self._expected is not None:
+            self._schedule_poll()
@@ -0,0 +1,257 @@
+"""
+This module defines the MinimapRaster class, which renders the laid-out tree of a feature model into a small grayscale
+image for the minimap of the editor, without any canvas items per feature.
+
+Every shown feature is drawn as a point at its position, scaled down to the image, and a line to the point of its
+parent. Features whose point and parent point fall on the same pixels form the same shape, which is drawn only once:
+the image of a model with 100 000 features consists of far fewer shapes than features. Every pixel counts the shapes
+covering it, so shapes can be removed again without drawing the image from scratch. After a new layout, only the
+shapes of the features whose scaled positions or parents changed are removed and added; the whole image is only drawn
+again if the model no longer fits into the area mapped to the image.
+
+Classes:
+    MinimapRaster: A downsampled point/line render of the laid-out features that is updated incrementally.
+"""
+
+from array import array
+from typing import Iterable
+
+from cfmtoolbox import Feature
+
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import Point
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+from cfmtoolbox_editor.utils.cfm_profiler import profiled
+
+# Pixel coordinates of a feature and of its parent (-1, -1 for the root)
+Shape = tuple[int, int, int, int]
+
+# Coverage added by the point of a feature and by the pixels of the line to its parent, points are drawn darker
+_POINT_WEIGHT = 2
+_LINE_WEIGHT = 1
+# Gray value of a pixel by its coverage (capped at the last entry)
+_SHADES = bytes([255, 170, 120, 80, 40])
+
+
+class MinimapRaster:
+    def __init__(self, width: int, height: int, slack: float = 0.05):
+        """
+        Initialize an empty MinimapRaster.
+
+        Args:
+            width (int): The width of the image in pixels.
+            height (int): The height of the image in pixels.
+            slack (float, optional): The fraction of the model size added on every side of the mapped area when it is
+                chosen, so the model can grow a little without drawing the whole image again.
+        """
+        self.width = width
+        self.height = height
+        self.slack = slack
+        self.changed = False
+        """Whether the image changed since the last call of to_pgm."""
+        self.full_renders = 0
+        """The number of times the whole image was drawn from scratch."""
+        # Mapped area: x_pixel = (x - origin_x) * scale, likewise for y
+        self.origin_x = 0.0
+        self.origin_y = 0.0
+        self.scale = 0.0
+        self._mapped: tuple[float, float, float, float] | None = None
+        self._coverage = array("I", bytes(4 * width * height))
+        # Feature key (feature_uid) -> shape of the feature; shape -> number of features with the shape
+        self._feature_shapes: dict[int, Shape] = {}
+        self._shapes: dict[Shape, int] = {}
+
+    def to_pixel(self, x: float, y: float) -> tuple[int, int]:
+        """
+        Map a position of the layout to a pixel of the image.
+
+        Args:
+            x (float): The x-coordinate of the position.
+            y (float): The y-coordinate of the position.
+
+        Returns:
+            tuple[int, int]: The pixel, which may be outside the image.
+        """
+        return (
+            int((x - self.origin_x) * self.scale),
+            int((y - self.origin_y) * self.scale),
+        )
+
+    def to_position(self, pixel_x: float, pixel_y: float) -> tuple[float, float]:
+        """
+        Map a pixel of the image to a position of the layout.
+
+        Args:
+            pixel_x (float): The x-coordinate of the pixel.
+            pixel_y (float): The y-coordinate of the pixel.
+
+        Returns:
+            tuple[float, float]: The position.
+        """
+        scale = self.scale or 1.0
+        return self.origin_x + pixel_x / scale, self.origin_y + pixel_y / scale
+
+    @profiled("minimap_update")
+    def update(self, features: Iterable[Feature], positions: dict[int, Point]):
+        """
+        Update the image to a new layout of the shown features.
+
+        Args:
+            features (Iterable[Feature]): The shown features.
+            positions (dict[int, Point]): The positions of (at least) the shown features, keyed by stable feature ids.
+        """
+        if not positions:
+            self._clear()
+            return
+        xs = [position.x for position in positions.values()]
+        ys = [position.y for position in positions.values()]
+        bounds = (min(xs), min(ys), max(xs), max(ys))
+        if self._needs_remapping(bounds):
+            self._map(bounds)
+
+        origin_x, origin_y, scale = self.origin_x, self.origin_y, self.scale
+        old_shapes = self._feature_shapes
+        feature_shapes: dict[int, Shape] = {}
+        for feature in features:
+            uid = feature_uid(feature)
+            position = positions[uid]
+            parent = feature.parent
+            parent_position = (
+                positions.get(feature_uid(parent)) if parent is not None else None
+            )
+            if parent_position is None:
+                shape = (
+                    int((position.x - origin_x) * scale),
+                    int((position.y - origin_y) * scale),
+                    -1,
+                    -1,
+                )
+            else:
+                shape = (
+                    int((position.x - origin_x) * scale),
+                    int((position.y - origin_y) * scale),
+                    int((parent_position.x - origin_x) * scale),
+                    int((parent_position.y - origin_y) * scale),
+                )
+            feature_shapes[uid] = shape
+            old_shape = old_shapes.pop(uid, None)
+            if old_shape != shape:
+                if old_shape is not None:
+                    self._remove_shape(old_shape)
+                self._add_shape(shape)
+        # The remaining old shapes belong to features that are no longer shown
+        for old_shape in old_shapes.values():
+            self._remove_shape(old_shape)
+        self._feature_shapes = feature_shapes
+
+    def _needs_remapping(self, bounds: tuple[float, float, float, float]) -> bool:
+        if self._mapped is None:
+            return True
+        x_min, y_min, x_max, y_max = bounds
+        mapped_x_min, mapped_y_min, mapped_x_max, mapped_y_max = self._mapped
+        if (
+            x_min < mapped_x_min
+            or y_min < mapped_y_min
+            or x_max > mapped_x_max
+            or y_max > mapped_y_max
+        ):
+            return True
+        # Remap if the model shrank so much that it would use less than half of the image
+        return (x_max - x_min) < (mapped_x_max - mapped_x_min) / 2 and (
+            y_max - y_min
+        ) < (mapped_y_max - mapped_y_min) / 2
+
+    def _map(self, bounds: tuple[float, float, float, float]):
+        # Choose the mapped area with slack and draw the whole image again
+        x_min, y_min, x_max, y_max = bounds
+        slack_x = max((x_max - x_min) * self.slack, 1)
+        slack_y = max((y_max - y_min) * self.slack, 1)
+        self._mapped = (
+            x_min - slack_x,
+            y_min - slack_y,
+            x_max + slack_x,
+            y_max + slack_y,
+        )
+        mapped_width = x_max - x_min + 2 * slack_x
+        mapped_height = y_max - y_min + 2 * slack_y
+        # The aspect ratio is kept, the scaled model is centered in the image
+        self.scale = min(
+            (self.width - 1) / mapped_width, (self.height - 1) / mapped_height
+        )
+        self.origin_x = (
+            x_min
+            - slack_x
+            - (self.width - 1 - mapped_width * self.scale) / 2 / self.scale
+        )
+        self.origin_y = (
+            y_min
+            - slack_y
+            - (self.height - 1 - mapped_height * self.scale) / 2 / self.scale
+        )
+        self._clear()
+        self.full_renders += 1
+
+    def _clear(self):
+        self._coverage = array("I", bytes(4 * self.width * self.height))
+        self._feature_shapes = {}
+        self._shapes = {}
+        self.changed = True
+
+    def _add_shape(self, shape: Shape):
+        count = self._shapes.get(shape, 0)
+        if count == 0:
+            self._draw_shape(shape, 1)
+        self._shapes[shape] = count + 1
+
+    def _remove_shape(self, shape: Shape):
+        count = self._shapes[shape] - 1
+        if count == 0:
+            del self._shapes[shape]
+            self._draw_shape(shape, -1)
+        else:
+            self._shapes[shape] = count
+
+    def _draw_shape(self, shape: Shape, sign: int):
+        x, y, parent_x, parent_y = shape
+        coverage, width, height = self._coverage, self.width, self.height
+        if parent_x >= 0:
+            # Bresenham line from the parent to the feature
+            dx, dy = abs(x - parent_x), -abs(y - parent_y)
+            step_x = 1 if parent_x < x else -1
+            step_y = 1 if parent_y < y else -1
+            error = dx + dy
+            line_x, line_y = parent_x, parent_y
+            while True:
+                if 0 <= line_x < width and 0 <= line_y < height:
+                    coverage[line_y * width + line_x] += sign * _LINE_WEIGHT
+                if line_x == x and line_y == y:
+                    break
+                doubled = 2 * error
+                if doubled >= dy:
+                    error += dy
+                    line_x += step_x
+                if doubled <= dx:
+                    error += dx
+                    line_y += step_y
+        if 0 <= x < width and 0 <= y < height:
+            coverage[y * width + x] += sign * _POINT_WEIGHT
+        self.changed = True
+
+    def pixels(self) -> bytes:
+        """
+        Get the gray values of the image, row by row, one byte per pixel (255 is white).
+
+        Returns:
+            bytes: The gray values.
+        """
+        last = len(_SHADES) - 1
+        return bytes(_SHADES[min(value, last)] for value in self._coverage)
+
+    def to_pgm(self) -> bytes:
+        """
+        Encode the image as a binary PGM (portable graymap) image, which the PPM format of Tk photo images loads.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        self.changed = False
+        return b"P5 %d %d 255\n" % (self.width, self.height) + self.pixels()
@@ -0,0 +1,622 @@
+"""
+This module defines the edits a user can make to a feature model, independently of the user interface. Every edit
+validates its input and creates the operation (see cfm_operations) that applies it to the model, including the
+adjustments of the group cardinalities of the parent: a feature that becomes the only child of its parent determines
+the group cardinalities of the parent, and a parent that gets a second child becomes a group with derived
+cardinalities. The dialogs of the editor and the headless edit scripts use the same edits, so a script changes a
+model exactly like the corresponding inputs in the editor.
+
+The module does not use tkinter, so feature models can be edited on machines without a display, e.g. by the
+edit-script command.
+
+Classes:
+    ModelEditError: Raised if the input of an edit is invalid.
+    ModelEdit: The operation applying an edit, together with information for the user interface.
+    ModelEditor: Applies a batch of edits to a feature model, referring to the features by name.
+
+Functions:
+    parse_cardinality: Converts intervals in the edit format to a cardinality.
+    add_feature: Creates the edit adding a feature.
+    edit_feature: Creates the edit renaming a feature and changing its cardinalities.
+    delete_feature: Creates the edit deleting a feature, together with its subtree or transferring its children.
+    create_constraint: Creates a constraint between two features.
+    add_constraint: Creates the edit adding a constraint.
+    load_edit_script: Reads the edits of an edit script.
+"""
+
+import inspect
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, get_args
+
+from cfmtoolbox import CFM, Cardinality, Constraint, Feature, Interval
+
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_operations import (
+    AddConstraint,
+    AddFeature,
+    CompositeOperation,
+    MoveFeature,
+    Operation,
+    RemoveFeature,
+    RenameFeature,
+    SetCardinality,
+    remove_constraints_of,
+)
+from cfmtoolbox_editor.utils.cfm_utils import (
+    derive_parent_group_cards_for_multiple_children,
+    derive_parent_group_cards_for_one_child,
+    edit_str_to_cardinality,
+)
+
+
+class ModelEditError(ValueError):
+    """
+    Raised if the input of an edit is invalid. The message is meant to be shown to the user.
+    """
+
+
+@dataclass
+class ModelEdit:
+    """
+    The operation applying an edit to a feature model.
+
+    Attributes:
+        operation: The operation to apply.
+        group_created: Whether a parent feature becomes a group, whose derived cardinalities the user may want to edit.
+        feature: The added feature, if the edit adds one. The model gets a copy of it with the same stable id.
+    """
+
+    operation: CompositeOperation
+    group_created: bool = False
+    feature: Feature | None = None
+
+
+def parse_cardinality(
+    raw_cardinality: Cardinality | str, description: str
+) -> Cardinality:
+    """
+    Converts intervals in the edit format (e.g. '1,2; 5,*') to a cardinality. Cardinalities are passed through.
+
+    Args:
+        raw_cardinality (Cardinality | str): The intervals to parse, or a cardinality.
+        description (str): What the cardinality is, used in the error message.
+
+    Returns:
+        Cardinality: The parsed cardinality.
+
+    Raises:
+        ModelEditError: If the intervals are not formatted correctly.
+    """
+    if isinstance(raw_cardinality, Cardinality):
+        return raw_cardinality
+    try:
+        return edit_str_to_cardinality(raw_cardinality.strip())
+    except ValueError:
+        raise ModelEditError(
+            f"Invalid {description} format. Use 'min,max' or 'min,*' for intervals."
+        ) from None
+
+
+def _instance_cardinality(raw_cardinality: Cardinality | str) -> Cardinality:
+    # An empty feature cardinality allows any number of instances
+    if isinstance(raw_cardinality, str) and not raw_cardinality.strip():
+        return Cardinality([Interval(0, None)])
+    return parse_cardinality(raw_cardinality, "feature cardinality")
+
+
+def _check_name(index: FeatureIndex, name: str, old_name: str | None = None) -> str:
+    name = name.strip()
+    if not name:
+        raise ModelEditError("Feature name cannot be empty.")
+    if name in index and name != old_name:
+        raise ModelEditError("Feature name must be unique.")
+    return name
+
+
+def _set_cardinality(
+    feature: Feature, attribute: str, cardinality: Cardinality
+) -> SetCardinality:
+    return SetCardinality(
+        feature.name, attribute, getattr(feature, attribute), cardinality
+    )
+
+
+def _set_group_cardinalities(
+    feature: Feature, group_cards: tuple[Cardinality, Cardinality]
+) -> list[Operation]:
+    group_type_card, group_instance_card = group_cards
+    return [
+        _set_cardinality(feature, "group_type_cardinality", group_type_card),
+        _set_cardinality(feature, "group_instance_cardinality", group_instance_card),
+    ]
+
+
+def add_feature(
+    index: FeatureIndex,
+    parent_feature: Feature,
+    name: str,
+    instance_cardinality: Cardinality | str = "",
+) -> ModelEdit:
+    """
+    Creates the edit adding a feature as the last child of a parent feature. If the feature is the only child, the
+    group cardinalities of the parent are derived from it; if it is the second child, the parent becomes a group.
+
+    Args:
+        index (FeatureIndex): The index of the features of the model, used to check that the name is unique.
+        parent_feature (Feature): The parent of the new feature.
+        name (str): The name of the new feature.
+        instance_cardinality (Cardinality | str, optional): The feature cardinality. Empty allows any number of
+            instances.
+
+    Returns:
+        ModelEdit: The edit, with the new feature.
+
+    Raises:
+        ModelEditError: If the name is empty or not unique, or the cardinality is invalid.
+    """
+    name = _check_name(index, name)
+    feature_card = _instance_cardinality(instance_cardinality)
+
+    new_feature = Feature(
+        name=name,
+        instance_cardinality=feature_card,
+        group_type_cardinality=Cardinality([]),
+        group_instance_cardinality=Cardinality([]),
+        parent=parent_feature,
+        children=[],
+    )
+    siblings = parent_feature.children
+    operations: list[Operation] = [
+        AddFeature(parent_feature.name, len(siblings), new_feature)
+    ]
+    group_created = False
+    if len(siblings) == 0:
+        operations += _set_group_cardinalities(
+            parent_feature, derive_parent_group_cards_for_one_child(feature_card)
+        )
+    if len(siblings) == 1:
+        group_created = True
+        operations += _set_group_cardinalities(
+            parent_feature,
+            derive_parent_group_cards_for_multiple_children(
+                [siblings[0].instance_cardinality, feature_card]
+            ),
+        )
+    return ModelEdit(CompositeOperation(operations), group_created, new_feature)
+
+
+def edit_feature(
+    index: FeatureIndex,
+    feature: Feature,
+    name: str | None = None,
+    instance_cardinality: Cardinality | str | None = None,
+    group_type_cardinality: Cardinality | str | None = None,
+    group_instance_cardinality: Cardinality | str | None = None,
+) -> ModelEdit:
+    """
+    Creates the edit renaming a feature and changing its cardinalities. If the feature is the only child of its
+    parent, the group cardinalities of the parent are derived from the feature cardinality again. Values that are
+    None are left unchanged.
+
+    Args:
+        index (FeatureIndex): The index of the features of the model, used to check that the name is unique.
+        feature (Feature): The feature to edit.
+        name (str, optional): The new name.
+        instance_cardinality (Cardinality | str, optional): The new feature cardinality. Empty allows any number of
+            instances.
+        group_type_cardinality (Cardinality | str, optional): The new group type cardinality, only for groups.
+        group_instance_cardinality (Cardinality | str, optional): The new group instance cardinality, only for groups.
+
+    Returns:
+        ModelEdit: The edit.
+
+    Raises:
+        ModelEditError: If the name is empty or not unique, a cardinality is invalid, or group cardinalities are given
+            for a feature that is not a group.
+    """
+    if name is not None:
+        name = _check_name(index, name, feature.name)
+    feature_card = (
+        feature.instance_cardinality
+        if instance_cardinality is None
+        else _instance_cardinality(instance_cardinality)
+    )
+    group_cards = [group_type_cardinality, group_instance_cardinality]
+    if len(feature.children) <= 1 and any(card is not None for card in group_cards):
+        raise ModelEditError(
+            "Group cardinalities can only be set for features with more than one child."
+        )
+    group_type_card, group_instance_card = [
+        None if card is None else parse_cardinality(card, description)
+        for card, description in zip(
+            group_cards, ["group type cardinality", "group instance cardinality"]
+        )
+    ]
+
+    operations: list[Operation] = []
+    if instance_cardinality is not None:
+        operations.append(
+            _set_cardinality(feature, "instance_cardinality", feature_card)
+        )
+    if group_type_card is not None:
+        operations.append(
+            _set_cardinality(feature, "group_type_cardinality", group_type_card)
+        )
+    if group_instance_card is not None:
+        operations.append(
+            _set_cardinality(feature, "group_instance_cardinality", group_instance_card)
+        )
+    if feature.parent is not None and len(feature.parent.children) == 1:
+        operations += _set_group_cardinalities(
+            feature.parent, derive_parent_group_cards_for_one_child(feature_card)
+        )
+    # Renamed last, the operations above refer to the feature by its current name
+    if name is not None and name != feature.name:
+        operations.append(RenameFeature(feature.name, name))
+    return ModelEdit(CompositeOperation(operations))
+
+
+def delete_feature(
+    cfm: CFM, index: FeatureIndex, feature: Feature, delete_subtree: bool
+) -> ModelEdit:
+    """
+    Creates the edit deleting a feature. Either the whole subtree is deleted, or the children are transferred to the
+    parent of the feature. The constraints involving a deleted feature are deleted too, and the group cardinalities
+    of the parent are adjusted to its remaining children.
+
+    Args:
+        cfm (CFM): The feature model.
+        index (FeatureIndex): The index of the features and constraints of the model.
+        feature (Feature): The feature to delete.
+        delete_subtree (bool): If True, delete the entire subtree. If False, transfer the children to the parent.
+
+    Returns:
+        ModelEdit: The edit.
+
+    Raises:
+        ModelEditError: If the feature is the root feature.
+    """
+    parent = feature.parent
+    if not parent:
+        raise ModelEditError("Cannot delete root feature.")
+
+    former_number_of_children = len(parent.children)
+    position = next(i for i, f in enumerate(parent.children) if f is feature)
+    children = feature.children
+
+    if delete_subtree:
+        # Remove all constraints that involve the feature or any of its descendants
+        operations = remove_constraints_of(cfm, FeatureIndex.subtree(feature), index)
+        remaining_children = (
+            parent.children[:position] + parent.children[position + 1 :]
+        )
+    else:
+        # Remove constraints involving the feature itself and transfer children to the parent
+        operations = remove_constraints_of(cfm, [feature], index)
+        operations += [
+            MoveFeature(feature.name, 0, parent.name, position + offset)
+            for offset in range(len(children))
+        ]
+        remaining_children = (
+            parent.children[:position] + children + parent.children[position + 1 :]
+        )
+
+    operations.append(
+        RemoveFeature(parent.name, position + (0 if delete_subtree else len(children)))
+    )
+
+    group_created = False
+    group_cards = None
+    if len(remaining_children) == 0:
+        group_cards = (Cardinality([]), Cardinality([]))
+    elif len(remaining_children) == 1:
+        group_cards = derive_parent_group_cards_for_one_child(
+            remaining_children[0].instance_cardinality
+        )
+    elif len(remaining_children) == 2 and former_number_of_children < 2:
+        group_cards = derive_parent_group_cards_for_multiple_children(
+            [child.instance_cardinality for child in remaining_children]
+        )
+        group_created = True
+    if group_cards:
+        operations += _set_group_cardinalities(parent, group_cards)
+    return ModelEdit(CompositeOperation(operations), group_created)
+
+
+def create_constraint(
+    first_feature: Feature,
+    first_cardinality: Cardinality | str,
+    second_feature: Feature,
+    second_cardinality: Cardinality | str,
+    require: bool,
+) -> Constraint:
+    """
+    Creates a constraint between two features.
+
+    Args:
+        first_feature (Feature): The first feature.
+        first_cardinality (Cardinality | str): The cardinality of the first feature.
+        second_feature (Feature): The second feature.
+        second_cardinality (Cardinality | str): The cardinality of the second feature.
+        require (bool): True for a requires constraint, False for an excludes constraint.
+
+    Returns:
+        Constraint: The new constraint.
+
+    Raises:
+        ModelEditError: If both features are the same, or a cardinality is invalid.
+    """
+    if first_feature is second_feature:
+        raise ModelEditError("The first and second features cannot be the same.")
+    try:
+        first_card = parse_cardinality(first_cardinality, "cardinality")
+        second_card = parse_cardinality(second_cardinality, "cardinality")
+    except ModelEditError:
+        raise ModelEditError("Invalid cardinality format.") from None
+    return Constraint(
+        require=require,
+        first_feature=first_feature,
+        first_cardinality=first_card,
+        second_feature=second_feature,
+        second_cardinality=second_card,
+    )
+
+
+def add_constraint(cfm: CFM, constraint: Constraint) -> ModelEdit:
+    """
+    Creates the edit adding a constraint after the existing constraints.
+
+    Args:
+        cfm (CFM): The feature model.
+        constraint (Constraint): The constraint to add, see create_constraint.
+
+    Returns:
+        ModelEdit: The edit.
+    """
+    return ModelEdit(
+        CompositeOperation([AddConstraint(len(cfm.constraints), constraint)])
+    )
+
+
+class ModelEditor:
+    """
+    Applies a batch of edits to a feature model. The features are referred to by name and looked up in an index of
+    the model, so every edit takes constant time apart from the changes themselves. The applied operations are kept,
+    so the whole batch can be reverted with operation.invert().
+
+    Attributes:
+        cfm: The edited feature model.
+        index: The index of the features and constraints of the model.
+        operations: The operations applied so far.
+    """
+
+    def __init__(self, cfm: CFM):
+        """
+        Initialize the ModelEditor.
+
+        Args:
+            cfm (CFM): The feature model to edit.
+        """
+        self.cfm = cfm
+        self.index = FeatureIndex(cfm)
+        self.operations: list[Operation] = []
+
+    @property
+    def operation(self) -> CompositeOperation:
+        """
+        The operation consisting of all edits applied so far.
+        """
+        return CompositeOperation(list(self.operations))
+
+    def get_feature(self, name: str) -> Feature:
+        """
+        Get a feature of the model by its name.
+
+        Args:
+            name (str): The name of the feature.
+
+        Returns:
+            Feature: The feature.
+
+        Raises:
+            ModelEditError: If the model contains no feature with the given name.
+        """
+        feature = self.index.get(name)
+        if feature is None:
+            raise ModelEditError(f"Unknown feature: {name}")
+        return feature
+
+    def apply(self, edit: ModelEdit) -> ModelEdit:
+        """
+        Apply an edit to the model.
+
+        Args:
+            edit (ModelEdit): The edit to apply.
+
+        Returns:
+            ModelEdit: The applied edit.
+        """
+        edit.operation.apply(self.cfm, self.index)
+        self.operations.append(edit.operation)
+        return edit
+
+    def add_feature(
+        self, parent: str, name: str, cardinality: Cardinality | str = ""
+    ) -> Feature:
+        """
+        Add a feature as the last child of a parent feature, see add_feature.
+
+        Args:
+            parent (str): The name of the parent feature.
+            name (str): The name of the new feature.
+            cardinality (Cardinality | str, optional): The feature cardinality.
+
+        Returns:
+            Feature: The new feature.
+        """
+        edit = self.apply(
+            add_feature(self.index, self.get_feature(parent), name, cardinality)
+        )
+        assert edit.feature is not None
+        # The operation inserts a copy of the feature of the edit
+        return self.get_feature(edit.feature.name)
+
+    def edit_feature(
+        self,
+        feature: str,
+        name: str | None = None,
+        cardinality: Cardinality | str | None = None,
+        group_type_cardinality: Cardinality | str | None = None,
+        group_instance_cardinality: Cardinality | str | None = None,
+    ):
+        """
+        Rename a feature and change its cardinalities, see edit_feature.
+
+        Args:
+            feature (str): The name of the feature.
+            name (str, optional): The new name.
+            cardinality (Cardinality | str, optional): The new feature cardinality.
+            group_type_cardinality (Cardinality | str, optional): The new group type cardinality.
+            group_instance_cardinality (Cardinality | str, optional): The new group instance cardinality.
+        """
+        self.apply(
+            edit_feature(
+                self.index,
+                self.get_feature(feature),
+                name,
+                cardinality,
+                group_type_cardinality,
+                group_instance_cardinality,
+            )
+        )
+
+    def delete_feature(self, feature: str, subtree: bool = False):
+        """
+        Delete a feature, see delete_feature.
+
+        Args:
+            feature (str): The name of the feature.
+            subtree (bool, optional): If True, delete the entire subtree. Otherwise, the children are transferred to
+                the parent.
+        """
+        self.apply(
+            delete_feature(self.cfm, self.index, self.get_feature(feature), subtree)
+        )
+
+    def add_constraint(
+        self,
+        first: str,
+        second: str,
+        first_cardinality: Cardinality | str = "1,*",
+        second_cardinality: Cardinality | str = "1,*",
+        require: bool = True,
+    ):
+        """
+        Add a constraint between two features.
+
+        Args:
+            first (str): The name of the first feature.
+            second (str): The name of the second feature.
+            first_cardinality (Cardinality | str, optional): The cardinality of the first feature.
+            second_cardinality (Cardinality | str, optional): The cardinality of the second feature.
+            require (bool, optional): True for a requires constraint, False for an excludes constraint.
+        """
+        constraint = create_constraint(
+            self.get_feature(first),
+            first_cardinality,
+            self.get_feature(second),
+            second_cardinality,
+            require,
+        )
+        self.apply(add_constraint(self.cfm, constraint))
+
+    def run_script(self, edits: Iterable[dict[str, Any]]) -> int:
+        """
+        Apply the edits of an edit script. Every edit is an object with the name of the edit in "action"
+        ("add_feature", "edit_feature", "delete_feature" or "add_constraint") and the arguments of the method of the
+        same name, e.g. {"action": "add_feature", "parent": "bread", "name": "rye", "cardinality": "0,1"}. The arguments
+        are strings, except for "subtree" and "require", which are true or false; the optional arguments of
+        "edit_feature" may be null.
+
+        Args:
+            edits (Iterable[dict[str, Any]]): The edits, see load_edit_script.
+
+        Returns:
+            int: The number of applied edits.
+
+        Raises:
+            ModelEditError: If an edit is invalid, including arguments of the wrong type. The edits before it have been
+                applied.
+        """
+        count = 0
+        for count, edit in enumerate(edits, start=1):
+            arguments = dict(edit)
+            action = arguments.pop("action", None)
+            signature = _SCRIPT_ACTIONS.get(action) if isinstance(action, str) else None
+            if signature is None:
+                raise ModelEditError(f"Edit {count}: Unknown action: {action}")
+            try:
+                signature.bind(self, **arguments)
+            except TypeError as error:
+                raise ModelEditError(f"Edit {count}: {error}") from None
+            for name, value in arguments.items():
+                # The values come from JSON, so they may have any JSON type
+                types = _SCRIPT_ARGUMENT_TYPES[action][name]
+                if not isinstance(value, types):
+                    expected = " or ".join(_JSON_TYPE_NAMES[type_] for type_ in types)
+                    raise ModelEditError(f"Edit {count}: {name} must be {expected}.")
+            try:
+                getattr(self, action)(**arguments)  # type: ignore[arg-type]
+            except ModelEditError as error:
+                raise ModelEditError(f"Edit {count}: {error}") from None
+        return count
+
+
+# Signatures of the methods that can be used in edit scripts, used to check the arguments of an edit
+_SCRIPT_ACTIONS = {
+    action: inspect.signature(getattr(ModelEditor, action))
+    for action in ["add_feature", "edit_feature", "delete_feature", "add_constraint"]
+}
+
+# The JSON types accepted for the arguments of the edits, taken from the annotations of the methods (cardinalities are
+# given as strings)
+_JSON_TYPE_NAMES = {str: "a string", bool: "true or false", type(None): "null"}
+_SCRIPT_ARGUMENT_TYPES = {
+    action: {
+        name: tuple(
+            type_
+            for type_ in get_args(parameter.annotation) or (parameter.annotation,)
+            if type_ in _JSON_TYPE_NAMES
+        )
+        for name, parameter in signature.parameters.items()
+        if name != "self"
+    }
+    for action, signature in _SCRIPT_ACTIONS.items()
+}
+
+
+def load_edit_script(text: str) -> list[dict[str, Any]]:
+    """
+    Reads the edits of an edit script. The script is either a JSON array of edits, or contains one JSON object per
+    line (JSON Lines), which is easier to generate for large scripts. See ModelEditor.run_script for the edits.
+
+    Args:
+        text (str): The content of the script.
+
+    Returns:
+        list[dict[str, Any]]: The edits.
+
+    Raises:
+        ModelEditError: If the script is not valid JSON or an edit is not an object.
+    """
+    try:
+        if text.lstrip().startswith("["):
+            edits = json.loads(text)
+        else:
+            edits = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except json.JSONDecodeError as error:
+        raise ModelEditError(f"Invalid edit script: {error}") from None
+    if not isinstance(edits, list) or not all(isinstance(edit, dict) for edit in edits):
+        raise ModelEditError("Invalid edit script: Every edit must be a JSON object.")
+    return edits
@@ -0,0 +1,512 @@
+"""
+This module defines reversible edit operations on a feature model. Every change the editor makes to a model is
+expressed as an operation that can be applied to the model and inverted, which allows the undo/redo history to store
+the edits instead of copies of the whole model.
+
+Operations refer to features by their (globally unique) names, so they can be applied to any model that is in the
+state the operation was recorded in, not only to the model object they were created for. If a FeatureIndex of the
+model is passed to apply, the features are looked up in the index, and the operation updates the index to the changes
+it makes.
+
+Classes:
+    Operation: Base class of all reversible edit operations.
+    CompositeOperation: An operation consisting of several operations that are applied as one step.
+    AddFeature: Inserts a feature (with its subtree) into the children of a parent feature.
+    RemoveFeature: Removes a feature (with its subtree) from the children of its parent.
+    MoveFeature: Moves a feature to another position in the tree.
+    RenameFeature: Renames a feature.
+    SetCardinality: Replaces one of the cardinalities of a feature.
+    AddConstraint: Inserts a constraint into the list of constraints.
+    RemoveConstraint: Removes a constraint from the list of constraints.
+    EditConstraint: Replaces the content of a constraint.
+    ReplaceModel: Replaces the whole content of a feature model.
+
+Functions:
+    find_feature: Looks up a feature of a feature model by its name.
+    remove_constraints_of: Creates the operations removing all constraints that involve the given features.
+"""
+
+from dataclasses import dataclass, field
+
+from cfmtoolbox import CFM, Cardinality, Constraint, Feature
+
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_snapshots import ModelSnapshot
+from cfmtoolbox_editor.utils.cfm_utils import copy_cardinality, copy_subtree
+
+
+def find_feature(cfm: CFM, name: str, index: FeatureIndex | None = None) -> Feature:
+    """
+    Looks up a feature of a feature model by its name.
+
+    Args:
+        cfm (CFM): The feature model to search.
+        name (str): The name of the feature.
+        index (FeatureIndex, optional): An index of the features of the model. Without an index, the features of the
+            model are searched one by one.
+
+    Returns:
+        Feature: The feature with the given name.
+
+    Raises:
+        ValueError: If the feature model contains no feature with the given name.
+    """
+    if index is not None:
+        found = index.get(name)
+        if found is not None:
+            return found
+    else:
+        for feature in cfm.features:
+            if feature.name == name:
+                return feature
+    raise ValueError(f"Unknown feature: {name}")
+
+
+class Operation:
+    """
+    Base class of all reversible edit operations on a feature model.
+    """
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        """
+        Apply the operation to a feature model.
+
+        Args:
+            cfm (CFM): The feature model to change.
+            index (FeatureIndex, optional): An index of the features of the model, which is used for the lookups and
+                updated to the changes.
+        """
+        raise NotImplementedError
+
+    def invert(self) -> "Operation":
+        """
+        Create the operation that reverts this operation after it has been applied.
+
+        Returns:
+            Operation: The inverse operation.
+        """
+        raise NotImplementedError
+
+    def changed_names(self) -> list[str] | None:
+        """
+        Get the names of the features whose name, cardinalities or children the operation changes, as they are named
+        after the operation was applied. Snapshots use them to visit only the changed parts of the model (see
+        cfm_snapshots).
+
+        Returns:
+            list[str] | None: The names of the changed features, or None if the operation may change any feature.
+        """
+        return None
+
+    def changes_constraints(self) -> bool:
+        """
+        Check whether the operation changes the constraints of the feature model.
+
+        Returns:
+            bool: False if the operation leaves the constraints unchanged.
+        """
+        return True
+
+
+@dataclass
+class CompositeOperation(Operation):
+    """
+    An operation consisting of several operations that are applied in order and reverted in reverse order.
+    """
+
+    operations: list[Operation] = field(default_factory=list)
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        for operation in self.operations:
+            operation.apply(cfm, index)
+
+    def invert(self) -> Operation:
+        return CompositeOperation(
+            [operation.invert() for operation in reversed(self.operations)]
+        )
+
+    def changed_names(self) -> list[str] | None:
+        names: list[str] = []
+        for operation in self.operations:
+            changed = operation.changed_names()
+            if changed is None:
+                return None
+            # The names of the earlier operations are updated to later renames
+            if isinstance(operation, RenameFeature):
+                names = [
+                    operation.new_name if name == operation.old_name else name
+                    for name in names
+                ]
+            names.extend(changed)
+        return names
+
+    def changes_constraints(self) -> bool:
+        return any(operation.changes_constraints() for operation in self.operations)
+
+
+@dataclass
+class AddFeature(Operation):
+    """
+    Inserts a feature, together with its subtree, into the children of a parent feature. The operation keeps a
+    detached copy of the subtree and inserts a new copy every time it is applied, so the models it is applied to
+    share no features with each other and later changes to an inserted feature do not affect the operation.
+    """
+
+    parent_name: str
+    index: int
+    feature: Feature
+
+    def __post_init__(self):
+        self.feature = copy_subtree(self.feature)
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        parent = find_feature(cfm, self.parent_name, index)
+        feature = copy_subtree(self.feature)
+        feature.parent = parent
+        parent.children.insert(self.index, feature)
+        if index is not None:
+            index.add_subtree(feature)
+
+    def invert(self) -> Operation:
+        return RemoveFeature(self.parent_name, self.index, self.feature)
+
+    def changed_names(self) -> list[str] | None:
+        return [self.parent_name, self.feature.name]
+
+    def changes_constraints(self) -> bool:
+        return False
+
+
+@dataclass
+class RemoveFeature(Operation):
+    """
+    Removes a feature, together with its subtree, from the children of its parent. The removed subtree is kept, so it
+    can be inserted again by the inverse operation, which inserts a copy of it.
+    """
+
+    parent_name: str
+    index: int
+    feature: Feature | None = None
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        parent = find_feature(cfm, self.parent_name, index)
+        self.feature = parent.children.pop(self.index)
+        if index is not None:
+            index.remove_subtree(self.feature)
+
+    def invert(self) -> Operation:
+        assert self.feature is not None, "The operation has not been applied yet."
+        return AddFeature(self.parent_name, self.index, self.feature)
+
+    def changed_names(self) -> list[str] | None:
+        return [self.parent_name]
+
+    def changes_constraints(self) -> bool:
+        return False
+
+
+@dataclass
+class MoveFeature(Operation):
+    """
+    Moves a feature, together with its subtree, from one position in the tree to another.
+    """
+
+    old_parent_name: str
+    old_index: int
+    new_parent_name: str
+    new_index: int
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        old_parent = find_feature(cfm, self.old_parent_name, index)
+        new_parent = find_feature(cfm, self.new_parent_name, index)
+        feature = old_parent.children.pop(self.old_index)
+        feature.parent = new_parent
+        new_parent.children.insert(self.new_index, feature)
+
+    def invert(self) -> Operation:
+        return MoveFeature(
+            self.new_parent_name, self.new_index, self.old_parent_name, self.old_index
+        )
+
+    def changed_names(self) -> list[str] | None:
+        return [self.old_parent_name, self.new_parent_name]
+
+    def changes_constraints(self) -> bool:
+        return False
+
+
+@dataclass
+class RenameFeature(Operation):
+    """
+    Renames a feature.
+    """
+
+    old_name: str
+    new_name: str
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        feature = find_feature(cfm, self.old_name, index)
+        feature.name = self.new_name
+        if index is not None:
+            index.rename(feature, self.old_name)
+
+    def invert(self) -> Operation:
+        return RenameFeature(self.new_name, self.old_name)
+
+    def changed_names(self) -> list[str] | None:
+        return [self.new_name]
+
+    def changes_constraints(self) -> bool:
+        return False
+
+
+CARDINALITY_ATTRIBUTES = (
+    "instance_cardinality",
+    "group_type_cardinality",
+    "group_instance_cardinality",
+)
+
+
+@dataclass
+class SetCardinality(Operation):
+    """
+    Replaces one of the cardinalities of a feature. The attribute is one of "instance_cardinality",
+    "group_type_cardinality" or "group_instance_cardinality".
+    """
+
+    feature_name: str
+    attribute: str
+    old_cardinality: Cardinality
+    new_cardinality: Cardinality
+
+    def __post_init__(self):
+        if self.attribute not in CARDINALITY_ATTRIBUTES:
+            raise ValueError(f"Unknown cardinality attribute: {self.attribute}")
+        # Keep private copies, the cardinalities of a model may be changed in place.
+        self.old_cardinality = copy_cardinality(self.old_cardinality)
+        self.new_cardinality = copy_cardinality(self.new_cardinality)
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        setattr(
+            find_feature(cfm, self.feature_name, index),
+            self.attribute,
+            copy_cardinality(self.new_cardinality),
+        )
+
+    def invert(self) -> Operation:
+        return SetCardinality(
+            self.feature_name,
+            self.attribute,
+            self.new_cardinality,
+            self.old_cardinality,
+        )
+
+    def changed_names(self) -> list[str] | None:
+        return [self.feature_name]
+
+    def changes_constraints(self) -> bool:
+        return False
+
+
+def _resolve_constraint(
+    cfm: CFM, constraint: Constraint, index: FeatureIndex | None
+) -> Constraint:
+    # A new constraint between the features of the model that have the names of the features of a stored constraint
+    return Constraint(
+        require=constraint.require,
+        first_feature=find_feature(cfm, constraint.first_feature.name, index),
+        first_cardinality=copy_cardinality(constraint.first_cardinality),
+        second_feature=find_feature(cfm, constraint.second_feature.name, index),
+        second_cardinality=copy_cardinality(constraint.second_cardinality),
+    )
+
+
+@dataclass
+class AddConstraint(Operation):
+    """
+    Inserts a constraint into the list of constraints of a feature model. Like AddFeature, the operation keeps a
+    detached copy of the constraint, which refers to the features by their names at the time the operation was
+    created, and inserts a new copy every time it is applied.
+    """
+
+    index: int
+    constraint: Constraint
+
+    def __post_init__(self):
+        self.constraint = _copy_constraint(self.constraint)
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        constraint = _resolve_constraint(cfm, self.constraint, index)
+        cfm.constraints.insert(self.index, constraint)
+        if index is not None:
+            index.add_constraint(constraint, self.index)
+
+    def invert(self) -> Operation:
+        return RemoveConstraint(self.index, self.constraint)
+
+    def changed_names(self) -> list[str] | None:
+        # The feature tree is not changed
+        return []
+
+
+@dataclass
+class RemoveConstraint(Operation):
+    """
+    Removes a constraint from the list of constraints of a feature model. A detached copy of the removed constraint
+    is kept, so it can be inserted again by the inverse operation.
+    """
+
+    index: int
+    constraint: Constraint | None = None
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        constraint = cfm.constraints.pop(self.index)
+        self.constraint = _copy_constraint(constraint)
+        if index is not None:
+            index.remove_constraint(constraint, self.index)
+
+    def invert(self) -> Operation:
+        assert self.constraint is not None, "The operation has not been applied yet."
+        return AddConstraint(self.index, self.constraint)
+
+    def changed_names(self) -> list[str] | None:
+        # The feature tree is not changed
+        return []
+
+
+@dataclass
+class EditConstraint(Operation):
+    """
+    Replaces the content of a constraint. The constraint object in the model is updated in place, so it keeps its
+    identity.
+    """
+
+    index: int
+    old_constraint: Constraint
+    new_constraint: Constraint
+
+    def __post_init__(self):
+        self.old_constraint = _copy_constraint(self.old_constraint)
+        self.new_constraint = _copy_constraint(self.new_constraint)
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        constraint = cfm.constraints[self.index]
+        if index is not None:
+            index.remove_constraint(constraint)
+        constraint.require = self.new_constraint.require
+        constraint.first_feature = find_feature(
+            cfm, self.new_constraint.first_feature.name, index
+        )
+        constraint.first_cardinality = copy_cardinality(
+            self.new_constraint.first_cardinality
+        )
+        constraint.second_feature = find_feature(
+            cfm, self.new_constraint.second_feature.name, index
+        )
+        constraint.second_cardinality = copy_cardinality(
+            self.new_constraint.second_cardinality
+        )
+        if index is not None:
+            index.add_constraint(constraint)
+
+    def invert(self) -> Operation:
+        return EditConstraint(self.index, self.new_constraint, self.old_constraint)
+
+    def changed_names(self) -> list[str] | None:
+        # The feature tree is not changed
+        return []
+
+
+@dataclass
+class ReplaceModel(Operation):
+    """
+    Replaces the whole content (feature tree and constraints) of a feature model, e.g. to reset it to its initial
+    state. The model object itself is kept, so it can still be edited by later operations. Like AddFeature, the
+    operation keeps a snapshot of the new content and installs a new copy of it every time it is applied.
+    """
+
+    old_root: Feature
+    old_constraints: list[Constraint]
+    new_root: Feature
+    new_constraints: list[Constraint]
+    _new_state: ModelSnapshot = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._new_state = ModelSnapshot.from_cfm(
+            CFM(root=self.new_root, constraints=self.new_constraints)
+        )
+
+    def apply(self, cfm: CFM, index: FeatureIndex | None = None):
+        content = self._new_state.to_cfm()
+        cfm.root = content.root
+        cfm.constraints = content.constraints
+        if index is not None:
+            index.rebuild(cfm)
+
+    def invert(self) -> Operation:
+        return ReplaceModel(
+            self.new_root, self.new_constraints, self.old_root, self.old_constraints
+        )
+
+
+def remove_constraints_of(
+    cfm: CFM, features: list[Feature], index: FeatureIndex | None = None
+) -> list[Operation]:
+    """
+    Create the operations removing all constraints that involve one of the given features.
+
+    Args:
+        cfm (CFM): The feature model containing the constraints.
+        features (list[Feature]): The features whose constraints are removed.
+        index (FeatureIndex, optional): An index of the model. With an index, the affected constraints are looked up
+            per feature and their positions are taken from the index, so the list of constraints is not searched.
+
+    Returns:
+        list[Operation]: The removal operations, ordered from the last constraint to the first, so that the indices
+        stay valid while they are applied.
+    """
+    if index is not None:
+        affected = {
+            id(constraint): constraint
+            for feature in features
+            for constraint in index.constraints_of(feature)
+        }
+        positions = sorted(
+            (
+                index.constraint_position(cfm.constraints, constraint)
+                for constraint in affected.values()
+            ),
+            reverse=True,
+        )
+        return [RemoveConstraint(position) for position in positions]
+
+    feature_ids = {id(feature) for feature in features}
+    return [
+        RemoveConstraint(position)
+        for position in range(len(cfm.constraints) - 1, -1, -1)
+        if id(cfm.constraints[position].first_feature) in feature_ids
+        or id(cfm.constraints[position].second_feature) in feature_ids
+    ]
+
+
+def _detached_feature(name: str) -> Feature:
+    # Stands in for a feature of a stored constraint, so renaming the feature in the model does not change the name
+    return Feature(
+        name=name,
+        instance_cardinality=Cardinality([]),
+        group_type_cardinality=Cardinality([]),
+        group_instance_cardinality=Cardinality([]),
+        parent=None,
+        children=[],
+    )
+
+
+def _copy_constraint(constraint: Constraint) -> Constraint:
+    # A copy referring to detached features with the current names of the features of the constraint
+    return Constraint(
+        require=constraint.require,
+        first_feature=_detached_feature(constraint.first_feature.name),
+        first_cardinality=copy_cardinality(constraint.first_cardinality),
+        second_feature=_detached_feature(constraint.second_feature.name),
+        second_cardinality=copy_cardinality(constraint.second_cardinality),
+    )
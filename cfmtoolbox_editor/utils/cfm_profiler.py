@@ -0,0 +1,276 @@
+"""
+This module defines the opt-in instrumentation of the editor's hot paths. It records the wall time and the number of
+calls of operations like drawing the model, computing the layout, recording undo states or updating the constraints,
+and logs every recorded call (span) to the "cfmtoolbox_editor.utils.cfm_profiler" logger.
+
+Profiling is off by default, then a profiled call costs a single attribute check. It is enabled by the --profile and
+--profile-overlay options of the edit command or by the environment variable CFM_EDITOR_PROFILE: "1" logs the spans,
+"overlay" additionally shows the breakdown of the last frame on the canvas.
+
+A frame is an outermost span on the Tk thread together with all spans nested in it, e.g. a redraw with the layout
+and the drawing of the canvas items. Spans recorded in other threads, like layouts computed in the background, are
+added to the next frame. The spans are logged when their frame is finished.
+
+Classes:
+    Span: A single recorded call of an operation.
+    SpanStats: The number of calls and the wall times recorded for an operation.
+    Profiler: Records spans, keeps statistics per operation and reports finished frames.
+
+Functions:
+    profiled: Decorator recording every call of a function as a span of the shared profiler.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Mapping, ParamSpec, TypeVar
+
+PROFILE_ENV_VAR = "CFM_EDITOR_PROFILE"
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class Span:
+    """
+    A single recorded call of an operation.
+
+    Attributes:
+        name (str): The name of the operation.
+        duration (float): The wall time of the call in seconds.
+        depth (int): The number of spans the call was nested in.
+        background (bool): Whether the call was made outside the Tk thread.
+    """
+
+    name: str
+    duration: float
+    depth: int = 0
+    background: bool = False
+
+
+@dataclass
+class SpanStats:
+    """
+    The number of calls and the wall times in seconds recorded for an operation.
+    """
+
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class Profiler:
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """
+        Initialize a disabled Profiler.
+
+        Args:
+            clock (Callable[[], float], optional): Returns the current time in seconds.
+        """
+        self.enabled = False
+        self.overlay = False
+        self.stats: dict[str, SpanStats] = {}
+        self.last_frame: list[Span] = []
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Spans finished in other threads since the last frame
+        self._background: list[Span] = []
+        self._frame_listeners: list[Callable[[list[Span]], None]] = []
+
+    def enable(self, overlay: bool = False):
+        """
+        Start recording spans. If logging has not been configured, the spans are logged to stderr.
+
+        Args:
+            overlay (bool, optional): Whether the breakdown of the last frame is shown on the canvas.
+        """
+        self.enabled = True
+        self.overlay = overlay
+        logger.setLevel(logging.INFO)
+        if not logger.handlers and not logging.getLogger().handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("[profile] %(message)s"))
+            logger.addHandler(handler)
+
+    def disable(self):
+        """
+        Stop recording spans. The statistics recorded so far are kept.
+        """
+        self.enabled = False
+        self.overlay = False
+
+    def configure_from_environment(self, environ: Mapping[str, str] = os.environ):
+        """
+        Enable the profiler if requested by the environment variable CFM_EDITOR_PROFILE. Values like "0", "false" or
+        "off" and an empty value leave the profiler as it is.
+
+        Args:
+            environ (Mapping[str, str], optional): The environment variables.
+        """
+        value = environ.get(PROFILE_ENV_VAR, "").strip().lower()
+        if value in ("", "0", "false", "no", "off"):
+            return
+        self.enable(overlay=value == "overlay")
+
+    def reset(self):
+        """
+        Forget all recorded statistics and frames.
+        """
+        with self._lock:
+            self.stats = {}
+            self.last_frame = []
+            self._background = []
+
+    def add_frame_listener(self, listener: Callable[[list[Span]], None]):
+        """
+        Register a function that is called on the Tk thread with the spans of every finished frame.
+
+        Args:
+            listener (Callable[[list[Span]], None]): The function to call.
+        """
+        self._frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener: Callable[[list[Span]], None]):
+        """
+        Unregister a function registered with add_frame_listener.
+
+        Args:
+            listener (Callable[[list[Span]], None]): The function to unregister.
+        """
+        if listener in self._frame_listeners:
+            self._frame_listeners.remove(listener)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Record the wall time of the enclosed code as a call of an operation. Nothing is recorded while the profiler
+        is disabled.
+
+        Args:
+            name (str): The name of the operation.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        local = self._local
+        if not hasattr(local, "depth"):
+            local.depth = 0
+            local.frame = []
+        depth = local.depth
+        local.depth += 1
+        # Index of the span in the frame, the spans are listed in the order they were started
+        position = len(local.frame)
+        start = self._clock()
+        try:
+            yield
+        finally:
+            duration = self._clock() - start
+            local.depth = depth
+            background = threading.current_thread() is not threading.main_thread()
+            span = Span(name, duration, depth, background)
+            local.frame.insert(position, span)
+            self._record(span)
+            if depth == 0:
+                frame, local.frame = local.frame, []
+                self._finish_frame(frame, background)
+
+    def _record(self, span: Span):
+        with self._lock:
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = SpanStats()
+            stats.calls += 1
+            stats.total += span.duration
+            stats.max = max(stats.max, span.duration)
+            stats.last = span.duration
+
+    def _finish_frame(self, frame: list[Span], background: bool):
+        # Logged per frame, so nested spans follow the span they are nested in
+        for span in frame:
+            logger.info(
+                "%s%s: %.2f ms%s",
+                "  " * span.depth,
+                span.name,
+                span.duration * 1000,
+                " (background)" if span.background else "",
+            )
+        with self._lock:
+            if background:
+                self._background.extend(frame)
+                return
+            frame = self._background + frame
+            self._background = []
+            self.last_frame = frame
+        for listener in list(self._frame_listeners):
+            listener(frame)
+
+    def summary(self) -> str:
+        """
+        Format the statistics of all operations as a table, the operations with the most total time first.
+
+        Returns:
+            str: The table.
+        """
+        with self._lock:
+            stats = sorted(
+                self.stats.items(), key=lambda item: item[1].total, reverse=True
+            )
+        name_width = max([len("operation")] + [len(name) for name, _ in stats])
+        lines = [
+            f"{'operation':<{name_width}} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"
+        ]
+        for name, entry in stats:
+            lines.append(
+                f"{name:<{name_width}} {entry.calls:>7} {entry.total * 1000:>10.1f} "
+                f"{entry.mean * 1000:>9.2f} {entry.max * 1000:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def log_summary(self):
+        """
+        Log the statistics of all operations, if any calls were recorded.
+        """
+        if self.stats:
+            logger.info("Summary\n%s", self.summary())
+
+
+# The profiler shared by the editor
+profiler = Profiler()
+
+
+def profiled(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Decorator recording every call of a function as a span of the shared profiler.
+
+    Args:
+        name (str): The name of the operation.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(function: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(function)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            with profiler.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
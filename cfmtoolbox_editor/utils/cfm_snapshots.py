@@ -0,0 +1,403 @@
+"""
+This module defines persistent snapshots of feature models, which the undo/redo history stores instead of copies of
+the model.
+
+A snapshot is an immutable tree of FeatureNode objects. As nodes are never changed, a snapshot taken after some
+changes shares every unchanged subtree with the previous snapshot: only the nodes of the changed features and of their
+ancestors (the paths from the changed features to the root) are new. A snapshot is turned back into a mutable feature
+model only when a state is restored.
+
+Features are matched with the nodes of the previous snapshot by their stable ids (see feature_uid), and the features
+recreated from a snapshot get the ids of the features the snapshot was taken of. If the ids of the changed features
+are known, e.g. from the operations applied since the previous snapshot (see mark_changed), only the paths from them
+to the root are visited, so taking the snapshot costs time proportional to the change instead of to the model.
+
+Classes:
+    FeatureNode: An immutable feature of a snapshot.
+    ConstraintNode: An immutable constraint of a snapshot.
+    ModelSnapshot: An immutable snapshot of a feature model.
+
+Functions:
+    mark_changed: Adds the stable ids of changed features and of their ancestors to a set of changed ids.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Container, Iterable
+
+from cfmtoolbox import CFM, Cardinality, Constraint, Feature, Interval
+
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid, set_feature_uid
+
+# The intervals of a cardinality as (lower, upper) pairs
+CardinalityTuple = tuple[tuple[int, int | None], ...]
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class FeatureNode:
+    """
+    An immutable feature of a snapshot. The children are nodes as well, so a node is the snapshot of a whole subtree.
+    """
+
+    uid: int
+    name: str
+    instance_cardinality: CardinalityTuple
+    group_type_cardinality: CardinalityTuple
+    group_instance_cardinality: CardinalityTuple
+    children: tuple["FeatureNode", ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ConstraintNode:
+    """
+    An immutable constraint of a snapshot. The features are referenced by their stable ids.
+    """
+
+    require: bool
+    first_uid: int
+    first_cardinality: CardinalityTuple
+    second_uid: int
+    second_cardinality: CardinalityTuple
+
+
+def _cardinality_tuple(cardinality: Cardinality) -> CardinalityTuple:
+    return tuple((interval.lower, interval.upper) for interval in cardinality.intervals)
+
+
+def _cardinality(intervals: CardinalityTuple) -> Cardinality:
+    return Cardinality([Interval(lower, upper) for lower, upper in intervals])
+
+
+def mark_changed(changed: set[int], features: Iterable[Feature]):
+    """
+    Adds the stable ids of changed features and of their ancestors to a set of changed ids, which can be passed to
+    ModelSnapshot.from_cfm. A feature has changed if its name, its cardinalities or its list of children changed.
+
+    Args:
+        changed (set[int]): The ids of the features changed so far, which is extended.
+        features (Iterable[Feature]): The changed features.
+    """
+    for feature in features:
+        current: Feature | None = feature
+        # The ancestors of a feature that is already marked are marked as well
+        while current is not None and feature_uid(current) not in changed:
+            changed.add(feature_uid(current))
+            current = current.parent
+
+
+def _node_size(node: FeatureNode) -> int:
+    # The cardinalities are left out, most features share a few distinct ones
+    return sys.getsizeof(node) + sys.getsizeof(node.children) + sys.getsizeof(node.name)
+
+
+class _Builder:
+    """
+    Builds the nodes of a snapshot, reusing the nodes of the previous snapshot for unchanged subtrees.
+    """
+
+    def __init__(self):
+        # The ids of the visited features, i.e. of all features unless only changed paths are visited
+        self.uids: set[int] = set()
+        # Approximate number of bytes of the nodes created (not reused) so far
+        self.size = 0
+        # Nodes of the previous snapshot that are no longer children of their (changed) parent
+        self.dropped: list[FeatureNode] = []
+
+    def build(
+        self,
+        root: Feature,
+        previous: FeatureNode | None,
+        changed: set[int] | None = None,
+    ) -> FeatureNode:
+        # Iterative post-order traversal: the nodes of the children are built before the node of their parent.
+        # With the ids of the changed features and their ancestors, the previous nodes of all other features are
+        # reused without visiting their subtrees.
+        built: list[FeatureNode] = []
+        stack: list[tuple[Feature, FeatureNode | None, bool]] = [
+            (root, previous, False)
+        ]
+        while stack:
+            feature, old, children_built = stack.pop()
+            if not children_built:
+                if (
+                    changed is not None
+                    and old is not None
+                    and feature_uid(feature) not in changed
+                ):
+                    built.append(old)
+                    continue
+                stack.append((feature, old, True))
+                old_children = old.children if old is not None else ()
+                old_by_uid: dict[int, FeatureNode] | None = None
+                for position in range(len(feature.children) - 1, -1, -1):
+                    child = feature.children[position]
+                    uid = feature_uid(child)
+                    match: FeatureNode | None = None
+                    if (
+                        position < len(old_children)
+                        and old_children[position].uid == uid
+                    ):
+                        match = old_children[position]
+                    elif old_children:
+                        if old_by_uid is None:
+                            old_by_uid = {node.uid: node for node in old_children}
+                        match = old_by_uid.get(uid)
+                    stack.append((child, match, False))
+                if changed is not None and (
+                    old_by_uid is not None or len(old_children) > len(feature.children)
+                ):
+                    # Only the changed paths are visited, so the children removed from them are collected here
+                    uids = {feature_uid(child) for child in feature.children}
+                    self.dropped.extend(
+                        node for node in old_children if node.uid not in uids
+                    )
+                continue
+
+            count = len(feature.children)
+            children = tuple(built[len(built) - count :]) if count else ()
+            if count:
+                del built[len(built) - count :]
+            built.append(self._node(feature, old, children))
+        return built[0]
+
+    def _node(
+        self,
+        feature: Feature,
+        old: FeatureNode | None,
+        children: tuple[FeatureNode, ...],
+    ) -> FeatureNode:
+        uid = feature_uid(feature)
+        self.uids.add(uid)
+        instance_cardinality = _cardinality_tuple(feature.instance_cardinality)
+        group_type_cardinality = _cardinality_tuple(feature.group_type_cardinality)
+        group_instance_cardinality = _cardinality_tuple(
+            feature.group_instance_cardinality
+        )
+        if (
+            old is not None
+            and old.name == feature.name
+            and old.instance_cardinality == instance_cardinality
+            and old.group_type_cardinality == group_type_cardinality
+            and old.group_instance_cardinality == group_instance_cardinality
+            and len(old.children) == len(children)
+            and all(new is kept for new, kept in zip(children, old.children))
+        ):
+            return old
+        node = FeatureNode(
+            uid,
+            feature.name,
+            instance_cardinality,
+            group_type_cardinality,
+            group_instance_cardinality,
+            children,
+        )
+        self.size += _node_size(node)
+        return node
+
+
+class _TreeMembership:
+    """
+    Decides whether a feature is part of the tree of a snapshot of which only the changed paths were visited. Features
+    of the previous snapshot are still part of the tree unless their subtree was dropped from a changed feature.
+    """
+
+    def __init__(self, root: FeatureNode, builder: _Builder, previous: "ModelSnapshot"):
+        self.root = root
+        self.builder = builder
+        self.previous_detached = {node.uid for node in previous.detached}
+        # The features referenced by the previous constraints were part of its tree unless they were detached
+        self.previous_referenced = {
+            uid
+            for node in previous.constraints
+            for uid in (node.first_uid, node.second_uid)
+        }
+        self._dropped: set[int] | None = None
+        self._all: set[int] | None = None
+
+    def __contains__(self, uid: object) -> bool:
+        if uid in self.builder.uids:
+            return True
+        if uid in self.previous_detached:
+            return False
+        if uid in self.previous_referenced:
+            if self._dropped is None:
+                self._dropped = _subtree_uids(self.builder.dropped)
+            return uid not in self._dropped
+        # Nothing is known about the feature, which is rare, so the whole tree is searched
+        if self._all is None:
+            self._all = _subtree_uids([self.root])
+        return uid in self._all
+
+
+def _subtree_uids(roots: list[FeatureNode]) -> set[int]:
+    uids: set[int] = set()
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        uids.add(node.uid)
+        stack.extend(node.children)
+    return uids
+
+
+@dataclass(frozen=True, slots=True)
+class ModelSnapshot:
+    """
+    An immutable snapshot of a feature model.
+
+    Attributes:
+        root (FeatureNode): The snapshot of the feature tree.
+        constraints (tuple[ConstraintNode, ...]): The constraints of the model.
+        detached (tuple[FeatureNode, ...]): Snapshots of the features that are referenced by constraints but are not
+            part of the feature tree.
+        size (int): The approximate number of bytes of the nodes that are not shared with the previous snapshot,
+            see full_size for the size of all nodes.
+    """
+
+    root: FeatureNode
+    constraints: tuple[ConstraintNode, ...]
+    detached: tuple[FeatureNode, ...] = ()
+    size: int = 0
+
+    @classmethod
+    def from_cfm(
+        cls,
+        cfm: CFM,
+        previous: "ModelSnapshot | None" = None,
+        changed: set[int] | None = None,
+        constraints_changed: bool = True,
+    ) -> "ModelSnapshot":
+        """
+        Take a snapshot of a feature model. Later changes to the model do not affect the snapshot.
+
+        Args:
+            cfm (CFM): The feature model.
+            previous (ModelSnapshot, optional): An earlier snapshot of the model. The nodes of unchanged subtrees and
+                constraints are taken from it instead of being created again.
+            changed (set[int], optional): The stable ids of the features that changed since the previous snapshot
+                was taken, together with their ancestors (see mark_changed). Only the features with these ids are
+                visited, the nodes of all other features are taken from the previous snapshot. If omitted, the whole
+                feature tree is compared with the previous snapshot.
+            constraints_changed (bool, optional): Whether the constraints changed since the previous snapshot was
+                taken. Only used with the changed features: if neither the constraints nor the features they
+                reference changed, the constraints of the previous snapshot are taken without comparing them.
+
+        Returns:
+            ModelSnapshot: The snapshot.
+        """
+        if previous is None:
+            changed = None
+        builder = _Builder()
+        root = builder.build(
+            cfm.root, previous.root if previous is not None else None, changed
+        )
+        if previous is None or changed is None:
+            tree: Container[int] = builder.uids
+        elif (
+            not constraints_changed
+            and not any(node.uid in builder.uids for node in previous.detached)
+            and _subtree_uids(builder.dropped) <= builder.uids
+        ):
+            # The same features are part of the tree (features dropped from one parent were added to another), so
+            # the same features of the constraints are detached
+            return cls(root, previous.constraints, previous.detached, builder.size)
+        else:
+            tree = _TreeMembership(root, builder, previous)
+
+        previous_detached = (
+            {node.uid: node for node in previous.detached}
+            if previous is not None
+            else {}
+        )
+        detached: dict[int, FeatureNode] = {}
+        for constraint in cfm.constraints:
+            # Constraints may still reference features that are no longer part of the tree
+            for feature in (constraint.first_feature, constraint.second_feature):
+                uid = feature_uid(feature)
+                if uid not in detached and uid not in tree:
+                    detached[uid] = _Builder().build(
+                        feature, previous_detached.get(uid)
+                    )
+
+        old_constraints = previous.constraints if previous is not None else ()
+        constraints = []
+        for position, constraint in enumerate(cfm.constraints):
+            node = ConstraintNode(
+                constraint.require,
+                feature_uid(constraint.first_feature),
+                _cardinality_tuple(constraint.first_cardinality),
+                feature_uid(constraint.second_feature),
+                _cardinality_tuple(constraint.second_cardinality),
+            )
+            if position < len(old_constraints) and old_constraints[position] == node:
+                node = old_constraints[position]
+            else:
+                builder.size += sys.getsizeof(node)
+            constraints.append(node)
+
+        return cls(root, tuple(constraints), tuple(detached.values()), builder.size)
+
+    def full_size(self) -> int:
+        """
+        Estimate the number of bytes of all nodes of the snapshot, including the nodes shared with other snapshots.
+
+        Returns:
+            int: The approximate size in bytes.
+        """
+        size = sum(sys.getsizeof(node) for node in self.constraints)
+        stack = [self.root, *self.detached]
+        while stack:
+            node = stack.pop()
+            size += _node_size(node)
+            stack.extend(node.children)
+        return size
+
+    def to_cfm(self) -> CFM:
+        """
+        Create a feature model in the state of the snapshot. The model shares no objects with other models created
+        from the snapshot, so it can be changed freely.
+
+        Returns:
+            CFM: The feature model.
+        """
+        features: dict[int, Feature] = {}
+        root = self._create_tree(self.root, features)
+        for node in self.detached:
+            if node.uid not in features:
+                self._create_tree(node, features)
+        constraints = [
+            Constraint(
+                require=node.require,
+                first_feature=features[node.first_uid],
+                first_cardinality=_cardinality(node.first_cardinality),
+                second_feature=features[node.second_uid],
+                second_cardinality=_cardinality(node.second_cardinality),
+            )
+            for node in self.constraints
+        ]
+        return CFM(root=root, constraints=constraints)
+
+    @staticmethod
+    def _create_tree(root: FeatureNode, features: dict[int, Feature]) -> Feature:
+        created = None
+        stack: list[tuple[FeatureNode, Feature | None]] = [(root, None)]
+        while stack:
+            node, parent = stack.pop()
+            feature = Feature(
+                name=node.name,
+                instance_cardinality=_cardinality(node.instance_cardinality),
+                group_type_cardinality=_cardinality(node.group_type_cardinality),
+                group_instance_cardinality=_cardinality(
+                    node.group_instance_cardinality
+                ),
+                parent=parent,
+                children=[],
+            )
+            set_feature_uid(feature, node.uid)
+            features[node.uid] = feature
+            if parent is None:
+                created = feature
+            else:
+                parent.children.append(feature)
+            stack.extend((child, feature) for child in reversed(node.children))
+        assert created is not None
+        return created
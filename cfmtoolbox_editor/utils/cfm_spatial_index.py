@@ -0,0 +1,96 @@
+"""
+This module defines the SpatialGrid class, a spatial index that finds the items whose bounding boxes intersect a
+rectangle, e.g. the features of a model that are within the visible part of the canvas.
+
+Classes:
+    SpatialGrid: A spatial index over bounding boxes based on a uniform grid.
+"""
+
+from itertools import chain
+from math import floor
+from typing import Hashable, Iterator
+
+BBox = tuple[float, float, float, float]
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: int = 256, max_cells: int = 64):
+        """
+        Initialize an empty SpatialGrid.
+
+        Args:
+            cell_size (int, optional): The width and height of a grid cell. Items are registered in every cell their
+                bounding box overlaps, so the cells should be about as large as a typical item.
+            max_cells (int, optional): Items overlapping more cells are not registered in the cells but checked by
+                every query, e.g. the edges from a feature with thousands of children, which span the whole model.
+        """
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells: dict[tuple[int, int], list[Hashable]] = {}
+        self._bboxes: dict[Hashable, BBox] = {}
+        self._large_items: list[Hashable] = []
+
+    def __len__(self) -> int:
+        return len(self._bboxes)
+
+    def _cells_of(self, bbox: BBox) -> Iterator[tuple[int, int]]:
+        x_min, y_min, x_max, y_max = bbox
+        for column in range(
+            floor(x_min / self.cell_size), floor(x_max / self.cell_size) + 1
+        ):
+            for row in range(
+                floor(y_min / self.cell_size), floor(y_max / self.cell_size) + 1
+            ):
+                yield column, row
+
+    def insert(self, key: Hashable, bbox: BBox):
+        """
+        Add an item to the index. Every key may only be inserted once.
+
+        Args:
+            key (Hashable): The key of the item.
+            bbox (BBox): The bounding box (x_min, y_min, x_max, y_max) of the item.
+        """
+        self._bboxes[key] = bbox
+        x_min, y_min, x_max, y_max = bbox
+        columns = floor(x_max / self.cell_size) - floor(x_min / self.cell_size) + 1
+        rows = floor(y_max / self.cell_size) - floor(y_min / self.cell_size) + 1
+        if columns * rows > self.max_cells:
+            self._large_items.append(key)
+            return
+        for cell in self._cells_of(bbox):
+            self._cells.setdefault(cell, []).append(key)
+
+    def query(self, bbox: BBox) -> set[Hashable]:
+        """
+        Find the items whose bounding boxes intersect a rectangle.
+
+        Args:
+            bbox (BBox): The rectangle (x_min, y_min, x_max, y_max) to search.
+
+        Returns:
+            set[Hashable]: The keys of the intersecting items.
+        """
+        x_min, y_min, x_max, y_max = bbox
+        result = set()
+        cells = (self._cells.get(cell, ()) for cell in self._cells_of(bbox))
+        for key in chain(self._large_items, *cells):
+            if key in result:
+                continue
+            item_x_min, item_y_min, item_x_max, item_y_max = self._bboxes[key]
+            if (
+                item_x_min <= x_max
+                and x_min <= item_x_max
+                and item_y_min <= y_max
+                and y_min <= item_y_max
+            ):
+                result.add(key)
+        return result
+
+    def clear(self):
+        """
+        Remove all items from the index.
+        """
+        self._cells.clear()
+        self._bboxes.clear()
+        self._large_items.clear()
@@ -0,0 +1,410 @@
+"""
+This module defines the SvgExporter class, which renders the layout of a feature model as SVG without Tk, e.g. to
+create diagrams for the documentation in a batch job on a machine without a display.
+
+The positions are computed by GraphLayoutCalculator and the features are drawn with the geometry of CFMCanvas: the
+node with the (truncated) name, the edge from the parent, the feature instance cardinality above the node and, for
+features with several children, the group arc with the group cardinalities below it. The collapse/expand buttons are
+left out, all features are shown. As there is no Tk font to measure the names, they are measured with a
+CharacterWidthTable.
+
+The SVG is written to the file while the features are visited, the document is never held in memory. Very large
+models can be split into tiles, each written to its own file and containing only the features overlapping the tile.
+
+Classes:
+    SvgExporter: Lays out a feature model and writes it as SVG, as a single file or as tiles.
+
+Functions:
+    export_svg: Writes the diagram of a feature model to an SVG file or to tiles.
+"""
+
+from math import atan2, cos, degrees, radians, sin
+from pathlib import Path
+from typing import Hashable, TextIO
+from xml.sax.saxutils import escape
+
+from cfmtoolbox import CFM, Feature
+
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import GraphLayoutCalculator, Point
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+from cfmtoolbox_editor.utils.cfm_profiler import profiled
+from cfmtoolbox_editor.utils.cfm_spatial_index import BBox, SpatialGrid
+from cfmtoolbox_editor.utils.cfm_text_width import (
+    CharacterWidthTable,
+    TextWidthCache,
+)
+from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_display_str
+
+# Geometry of CFMCanvas
+MAX_NODE_WIDTH = 120
+NODE_PADDING_X = 4
+NODE_PADDING_Y = 2
+GROUP_ARC_RADIUS = 35
+# Extent of a name above and below its y-coordinate, as in the bounding box of a Tk text item with the default font
+_TEXT_ABOVE = 7
+_TEXT_BELOW = 8
+# Space around the drawn features, as in the scroll region of the canvas
+_PADDING_X = 100
+_PADDING_Y = 50
+
+# Styles of the drawn items; the fonts are those of the canvas (TkDefaultFont at 9 points, Arial at 8 points)
+_STYLE = (
+    "<style>"
+    "line{stroke:black;marker-end:url(#arrow)}"
+    ".arc{fill:white;stroke:black}"
+    "rect{fill:lightgrey;stroke:black}"
+    "text{font-family:'DejaVu Sans',sans-serif;font-size:12px;"
+    "text-anchor:middle;dominant-baseline:central}"
+    "text.card{font-family:Arial,sans-serif;font-size:11px}"
+    "text.w{text-anchor:start}"
+    "text.e{text-anchor:end}"
+    "</style>"
+)
+# The default arrow of Tk lines (arrowshape 8 10 3)
+_ARROW = (
+    '<marker id="arrow" markerWidth="10" markerHeight="6" refX="10" refY="3" '
+    'orient="auto" markerUnits="userSpaceOnUse"><path d="M10,3 L0,0 L2,3 L0,6 Z"/></marker>'
+)
+
+
+def _overlaps(bbox: BBox, area: BBox) -> bool:
+    return (
+        bbox[0] <= area[2]
+        and area[0] <= bbox[2]
+        and bbox[1] <= area[3]
+        and area[1] <= bbox[3]
+    )
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value == int(value) else f"{value:.2f}"
+
+
+class SvgExporter:
+    def __init__(
+        self,
+        cfm: CFM,
+        character_widths: CharacterWidthTable | None = None,
+        max_node_width: int = MAX_NODE_WIDTH,
+    ):
+        """
+        Initialize the SvgExporter and compute the layout of the feature model.
+
+        Args:
+            cfm (CFM): The feature model to draw.
+            character_widths (CharacterWidthTable, optional): Measures the feature names. Defaults to the approximate
+                widths of the default Tk font.
+            max_node_width (int, optional): The maximum width of a name, longer names are truncated.
+        """
+        self.cfm = cfm
+        self.character_widths = character_widths or CharacterWidthTable()
+        self.max_node_width = max_node_width
+        self.text_widths = TextWidthCache()
+        # Feature name -> (displayed text, whether it is truncated, half of the width of the text)
+        self._labels: dict[str, tuple[str, bool, float]] = {}
+
+        self.positions: dict[int, Point] = GraphLayoutCalculator(
+            cfm, {}, max_node_width, self._node_width
+        ).compute_positions()
+        # The features in drawing order (depth-first pre-order) with the position of their instance cardinality
+        self.features: list[tuple[Feature, str]] = []
+        stack = [(cfm.root, "middle")]
+        while stack:
+            feature, feature_instance_card_pos = stack.pop()
+            self.features.append((feature, feature_instance_card_pos))
+            x = self.positions[feature_uid(feature)].x
+            for child in reversed(feature.children):
+                child_x = self.positions[feature_uid(child)].x
+                stack.append((child, "right" if child_x >= x else "left"))
+
+    def _node_width(self, name: str) -> int:
+        # Width of the rectangle drawn around the name
+        return (
+            self.text_widths.measure(self.character_widths, name) + 2 * NODE_PADDING_X
+        )
+
+    def bounds(self) -> BBox:
+        """
+        Get the area covered by the diagram, the drawn features with the padding around them.
+
+        Returns:
+            BBox: The area (x_min, y_min, x_max, y_max).
+        """
+        xs = [position.x for position in self.positions.values()]
+        max_y = max(position.y for position in self.positions.values())
+        return min(min(xs) - _PADDING_X, 0), 0, max(xs) + _PADDING_X, max_y + _PADDING_Y
+
+    def _label(self, name: str) -> tuple[str, bool, float]:
+        label = self._labels.get(name)
+        if label is None:
+            width = self.text_widths.measure(self.character_widths, name)
+            if width > self.max_node_width:
+                text = (
+                    self.text_widths.fitting_prefix(
+                        self.character_widths, name, "...", self.max_node_width - 10
+                    )
+                    + "..."
+                )
+                label = (text, True, self.character_widths.measure(text) / 2)
+            else:
+                label = (name, False, width / 2)
+            self._labels[name] = label
+        return label
+
+    def _padded_bbox(self, feature: Feature, x: int, y: int) -> BBox:
+        half_width = self._label(feature.name)[2]
+        return (
+            x - half_width - NODE_PADDING_X,
+            y - _TEXT_ABOVE - NODE_PADDING_Y,
+            x + half_width + NODE_PADDING_X,
+            y + _TEXT_BELOW + NODE_PADDING_Y,
+        )
+
+    def _node_area(self, feature: Feature) -> BBox:
+        # The area covered by the node of a feature with its cardinalities and its group arc
+        position = self.positions[feature_uid(feature)]
+        x_margin = self.max_node_width // 2 + 40
+        return (
+            position.x - x_margin,
+            position.y - 40,
+            position.x + x_margin,
+            position.y + 50,
+        )
+
+    def _item_area(self, feature: Feature) -> BBox:
+        # The area covered by all items of a feature including the edge from the parent, as indexed by the culling
+        # of CFMCanvas
+        x_min, y_min, x_max, y_max = self._node_area(feature)
+        if feature.parent is not None:
+            parent_position = self.positions[feature_uid(feature.parent)]
+            x_min = min(x_min, parent_position.x)
+            x_max = max(x_max, parent_position.x)
+            y_min = min(y_min, parent_position.y)
+        return x_min, y_min, x_max, y_max
+
+    @profiled("export_svg")
+    def write(self, file: TextIO, area: BBox | None = None):
+        """
+        Write the diagram as an SVG document. Edges are written first and group arcs second, so they are below the
+        nodes and labels as on the canvas.
+
+        Args:
+            file (TextIO): The file to write to.
+            area (BBox, optional): The area to write, e.g. a tile. Only the features whose items overlap the area are
+                written. Defaults to the whole diagram.
+        """
+        if area is None:
+            self._write_document(file, self.bounds(), self.features, self.features)
+            return
+        features = [
+            (feature, feature_instance_card_pos)
+            for feature, feature_instance_card_pos in self.features
+            if _overlaps(self._item_area(feature), area)
+        ]
+        self._write_area(file, area, features)
+
+    def _write_area(
+        self, file: TextIO, area: BBox, features: list[tuple[Feature, str]]
+    ):
+        # Features whose nodes are outside the area are only drawn for the edges from their parents, which may cross
+        # the area, e.g. in a tile between a feature and its distant children
+        nodes = [
+            (feature, feature_instance_card_pos)
+            for feature, feature_instance_card_pos in features
+            if _overlaps(self._node_area(feature), area)
+        ]
+        self._write_document(file, area, features, nodes)
+
+    def _write_document(
+        self,
+        file: TextIO,
+        area: BBox,
+        edges: list[tuple[Feature, str]],
+        nodes: list[tuple[Feature, str]],
+    ):
+        x_min, y_min, x_max, y_max = area
+        width, height = x_max - x_min, y_max - y_min
+        file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{_number(width)}" height="{_number(height)}" '
+            f'viewBox="{_number(x_min)} {_number(y_min)} {_number(width)} {_number(height)}">\n'
+            f"<defs>{_ARROW}</defs>\n{_STYLE}\n"
+            f'<rect x="{_number(x_min)}" y="{_number(y_min)}" width="{_number(width)}" '
+            f'height="{_number(height)}" style="fill:white;stroke:none"/>\n'
+        )
+        root = self.cfm.root
+        positions = self.positions
+
+        file.write('<g class="edges">\n')
+        for feature, _ in edges:
+            if feature.parent is not None and feature is not root:
+                position = positions[feature_uid(feature)]
+                parent_position = positions[feature_uid(feature.parent)]
+                file.write(
+                    f'<line x1="{parent_position.x}" y1="{parent_position.y + 10}" '
+                    f'x2="{position.x}" y2="{position.y - 10}"/>\n'
+                )
+        file.write("</g>\n")
+
+        file.write('<g class="groups">\n')
+        for feature, _ in nodes:
+            if len(feature.children) > 1:
+                file.write(self._group_arc(feature))
+        file.write("</g>\n")
+
+        file.write('<g class="features">\n')
+        for feature, feature_instance_card_pos in nodes:
+            file.write(self._feature(feature, feature_instance_card_pos))
+        file.write("</g>\n</svg>\n")
+
+    def _group_arc(self, feature: Feature) -> str:
+        position = self.positions[feature_uid(feature)]
+        x_center, y_center = position.x, position.y + 10
+        first_child = self.positions[feature_uid(feature.children[0])]
+        last_child = self.positions[feature_uid(feature.children[-1])]
+        # The angles of the arc on the canvas, counterclockwise with the y-axis pointing up
+        left_angle = (
+            degrees(atan2(first_child.y - y_center, first_child.x - x_center)) + 180
+        ) % 360
+        right_angle = (
+            degrees(atan2(last_child.y - y_center, last_child.x - x_center)) + 180
+        ) % 360
+        extent = right_angle - left_angle
+        start_x = x_center + GROUP_ARC_RADIUS * cos(radians(left_angle))
+        start_y = y_center - GROUP_ARC_RADIUS * sin(radians(left_angle))
+        end_x = x_center + GROUP_ARC_RADIUS * cos(radians(right_angle))
+        end_y = y_center - GROUP_ARC_RADIUS * sin(radians(right_angle))
+        # A negative extent is clockwise on the screen, which is the positive direction of SVG
+        large_arc = 1 if abs(extent) > 180 else 0
+        sweep = 1 if extent < 0 else 0
+        return (
+            f'<path class="arc" d="M{x_center},{y_center} L{_number(start_x)},{_number(start_y)} '
+            f"A{GROUP_ARC_RADIUS},{GROUP_ARC_RADIUS} 0 {large_arc} {sweep} "
+            f'{_number(end_x)},{_number(end_y)} Z"/>\n'
+        )
+
+    def _feature(self, feature: Feature, feature_instance_card_pos: str) -> str:
+        position = self.positions[feature_uid(feature)]
+        x, y = position.x, position.y
+        text, truncated, _ = self._label(feature.name)
+        padded_bbox = self._padded_bbox(feature, x, y)
+        parts = [
+            f'<rect x="{_number(padded_bbox[0])}" y="{_number(padded_bbox[1])}" '
+            f'width="{_number(padded_bbox[2] - padded_bbox[0])}" '
+            f'height="{_number(padded_bbox[3] - padded_bbox[1])}"/>\n',
+            # The full name of a truncated feature is shown as a tooltip, like on the canvas
+            f'<text x="{x}" y="{y}">{escape(text)}'
+            + (f"<title>{escape(feature.name)}</title>" if truncated else "")
+            + "</text>\n",
+        ]
+
+        if feature is not self.cfm.root:
+            match feature_instance_card_pos:
+                case "right":
+                    anchor, feature_instance_x = ' class="card w"', x + 4
+                case "left":
+                    anchor, feature_instance_x = ' class="card e"', x - 4
+                case _:
+                    anchor, feature_instance_x = ' class="card"', x
+            parts.append(
+                f'<text{anchor} x="{feature_instance_x}" y="{_number(padded_bbox[1] - 10)}">'
+                f"{escape(cardinality_to_display_str(feature.instance_cardinality, '⟨', '⟩'))}</text>\n"
+            )
+
+        if len(feature.children) > 1:
+            last_child = self.positions[feature_uid(feature.children[-1])]
+            # Group instance cardinality on the line to the last child, as on the canvas
+            slope = (last_child.x - x) / (last_child.y - 10 - (y + 10))
+            group_instance_y = padded_bbox[3] + 10
+            group_instance_x = x + slope * (group_instance_y - (y + 10)) + 7
+            parts.append(
+                f'<text class="card w" x="{_number(group_instance_x)}" y="{_number(group_instance_y)}">'
+                f"{escape(cardinality_to_display_str(feature.group_instance_cardinality, '⟨', '⟩'))}</text>\n"
+            )
+            parts.append(
+                f'<text class="card" x="{x}" y="{_number(padded_bbox[3] + 20)}">'
+                f"{escape(cardinality_to_display_str(feature.group_type_cardinality, '[', ']'))}</text>\n"
+            )
+        return "".join(parts)
+
+    def export(self, path: Path) -> Path:
+        """
+        Write the whole diagram to an SVG file.
+
+        Args:
+            path (Path): The file to write.
+
+        Returns:
+            Path: The written file.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            self.write(file)
+        return path
+
+    def export_tiles(self, path: Path, tile_width: int, tile_height: int) -> list[Path]:
+        """
+        Split the diagram into tiles of the given size and write each tile that contains features to its own SVG
+        file, named after the path with the row and the column of the tile, e.g. model_r0_c2.svg.
+
+        Args:
+            path (Path): The path the names of the tiles are derived from.
+            tile_width (int): The width of a tile in pixels.
+            tile_height (int): The height of a tile in pixels.
+
+        Returns:
+            list[Path]: The written tiles, row by row.
+
+        Raises:
+            ValueError: If the tile size is not positive.
+        """
+        if tile_width <= 0 or tile_height <= 0:
+            raise ValueError("The tile size must be positive")
+        x_min, y_min, x_max, y_max = self.bounds()
+        # The features are found by a spatial index over their items, so every tile only visits its own features
+        grid = SpatialGrid(cell_size=max(tile_width, tile_height))
+        order: dict[Hashable, int] = {}
+        for number, (feature, _) in enumerate(self.features):
+            order[feature_uid(feature)] = number
+            grid.insert(feature_uid(feature), self._item_area(feature))
+
+        tiles = []
+        row = 0
+        tile_y = y_min
+        while tile_y < y_max:
+            column = 0
+            tile_x = x_min
+            while tile_x < x_max:
+                area = (tile_x, tile_y, tile_x + tile_width, tile_y + tile_height)
+                numbers = sorted(order[key] for key in grid.query(area))
+                if numbers:
+                    tile = path.with_name(f"{path.stem}_r{row}_c{column}{path.suffix}")
+                    with open(tile, "w", encoding="utf-8") as file:
+                        self._write_area(
+                            file, area, [self.features[number] for number in numbers]
+                        )
+                    tiles.append(tile)
+                column += 1
+                tile_x += tile_width
+            row += 1
+            tile_y += tile_height
+        return tiles
+
+
+def export_svg(
+    cfm: CFM, path: Path, tile_size: tuple[int, int] | None = None
+) -> list[Path]:
+    """
+    Write the diagram of a feature model to an SVG file, or split it into tiles if a tile size is given.
+
+    Args:
+        cfm (CFM): The feature model.
+        path (Path): The SVG file to write. The names of the tiles are derived from it.
+        tile_size (tuple[int, int], optional): The width and height of the tiles in pixels.
+
+    Returns:
+        list[Path]: The written files.
+    """
+    exporter = SvgExporter(cfm)
+    if tile_size is None:
+        return [exporter.export(path)]
+    return exporter.export_tiles(path, *tile_size)
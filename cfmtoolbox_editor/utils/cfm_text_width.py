@@ -0,0 +1,148 @@
+"""
+This module defines the TextWidthCache class, which measures and truncates texts with a font and remembers the
+results, so that each text is measured only once per session, and the CharacterWidthTable class, which measures texts
+without Tk from a table of character widths.
+
+The fonts only need to provide a measure(text) method returning the width in pixels, like tkinter.font.Font does.
+
+Classes:
+    TextWidthCache: A cache for the widths of texts and for the prefixes of texts that fit into a given width.
+    CharacterWidthTable: Measures texts by adding up precomputed character widths.
+"""
+
+import string
+
+# Approximate widths in pixels of the characters of DejaVu Sans at 9 points and 96 dpi, the default font of Tk on
+# Linux. Used to measure texts when no Tk font is available.
+_DEFAULT_WIDTHS_BY_GROUP = {
+    3: "ijl'",
+    4: "fIJ -.,:/",
+    5: "rt()",
+    6: "sz_",
+    7: "acekovxyFLPTY",
+    8: "bdghnpquABCEKRSVXZ0123456789",
+    9: "DGHNOQU&",
+    10: "wM+",
+    12: "mW",
+}
+DEFAULT_CHARACTER_WIDTHS = {
+    character: width
+    for width, characters in _DEFAULT_WIDTHS_BY_GROUP.items()
+    for character in characters
+}
+DEFAULT_CHARACTER_WIDTH = 8
+
+
+class TextWidthCache:
+    def __init__(self):
+        """
+        Initialize the TextWidthCache with empty caches.
+        """
+        self._widths: dict[tuple[str, str], int] = {}
+        self._prefixes: dict[tuple[str, str, str, int], str] = {}
+
+    def measure(self, font, text: str) -> int:
+        """
+        Get the width of a text, measuring it only if it has not been measured with the font before.
+
+        Args:
+            font: The font the text is displayed with.
+            text (str): The text to measure.
+
+        Returns:
+            int: The width of the text in pixels.
+        """
+        key = (str(font), text)
+        width = self._widths.get(key)
+        if width is None:
+            width = font.measure(text)
+            self._widths[key] = width
+        return width
+
+    def fitting_prefix(self, font, text: str, suffix: str, max_width: int) -> str:
+        """
+        Find the longest proper prefix of a text that, followed by the suffix, is at most max_width wide. The prefix
+        length is found by binary search, the result is remembered.
+
+        Args:
+            font: The font the text is displayed with.
+            text (str): The text to shorten.
+            suffix (str): The suffix appended to the prefix, e.g. "...".
+            max_width (int): The maximum width of the prefix and the suffix in pixels.
+
+        Returns:
+            str: The longest fitting prefix, or an empty string if no prefix fits.
+        """
+        key = (str(font), text, suffix, max_width)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            low, high = 0, len(text) - 1
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self.measure(font, text[:middle] + suffix) <= max_width:
+                    low = middle
+                else:
+                    high = middle - 1
+            prefix = text[: max(low, 0)]
+            self._prefixes[key] = prefix
+        return prefix
+
+    def clear(self):
+        """
+        Forget all measured widths, e.g. after the fonts have been reconfigured.
+        """
+        self._widths.clear()
+        self._prefixes.clear()
+
+
+class CharacterWidthTable:
+    def __init__(
+        self,
+        widths: dict[str, int] | None = None,
+        default_width: int = DEFAULT_CHARACTER_WIDTH,
+        name: str = "default",
+    ):
+        """
+        Initialize the CharacterWidthTable with the widths of single characters.
+
+        Args:
+            widths (dict[str, int], optional): The width in pixels of each character. Defaults to approximate widths
+                of the default Tk font.
+            default_width (int, optional): The width of characters missing in the table.
+            name (str, optional): The name of the table, used as the font name by TextWidthCache.
+        """
+        self.widths = DEFAULT_CHARACTER_WIDTHS if widths is None else widths
+        self.default_width = default_width
+        self.name = name
+
+    @classmethod
+    def from_font(cls, font) -> "CharacterWidthTable":
+        """
+        Create a table by measuring the printable ASCII characters with a font once. Texts can then be measured
+        without calling into Tk, e.g. from another thread.
+
+        Args:
+            font: The font to measure, e.g. a tkinter.font.Font.
+
+        Returns:
+            CharacterWidthTable: The table of the character widths of the font.
+        """
+        characters = string.ascii_letters + string.digits + string.punctuation + " "
+        widths = {character: font.measure(character) for character in characters}
+        return cls(widths, widths["x"], f"table:{font}")
+
+    def measure(self, text: str) -> int:
+        """
+        Get the width of a text as the sum of the widths of its characters.
+
+        Args:
+            text (str): The text to measure.
+
+        Returns:
+            int: The width of the text in pixels.
+        """
+        widths = self.widths
+        return sum(widths.get(character, self.default_width) for character in text)
+
+    def __str__(self):
+        return self.name
@@ -9,12 +9,23 @@ Functions:
     derive_parent_group_cards_for_one_child: Derives parent group cardinalities for a single child.
     derive_parent_group_cards_for_multiple_children: Derives parent group cardinalities for multiple children.
     center_window: Calculates the position to center a window relative to a parent widget.
+    copy_cardinality: Creates an independent copy of a cardinality.
+    copy_subtree: Creates a detached deep copy of a feature and its descendants without recursion.
+    copy_cfm: Creates a deep copy of a feature model without recursion.
+    estimate_size: Estimates the memory used by a feature model or parts of it.
 """
 
-import tkinter as tk
-from typing import Tuple, List
+import sys
+from copy import copy, deepcopy
+from typing import TYPE_CHECKING, Tuple, List
 
-from cfmtoolbox import Cardinality, Interval
+from cfmtoolbox import CFM, Cardinality, Constraint, Feature, Interval
+
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+
+if TYPE_CHECKING:
+    # Only needed for annotations, so the model utilities can be used without a display
+    import tkinter as tk
 
 
 def cardinality_to_display_str(
@@ -154,7 +165,7 @@ def derive_parent_group_cards_for_multiple_children(
 
 
 def center_window(
-    parent_widget: tk.Widget, window_width: int, window_height: int
+    parent_widget: "tk.Widget", window_width: int, window_height: int
 ) -> Tuple[int, int]:
     """
     Calculates the position of the window to appear centered relative to the parent widget.
@@ -177,3 +188,149 @@ def center_window(
     window_y = main_window_y + (main_window_height // 2) - (window_height // 2)
 
     return window_x, window_y
+
+
+def copy_cardinality(cardinality: Cardinality) -> Cardinality:
+    """
+    Creates an independent copy of a cardinality.
+
+    Args:
+        cardinality (Cardinality): The cardinality to copy.
+
+    Returns:
+        Cardinality: A cardinality with copies of the intervals of the given cardinality.
+    """
+    return Cardinality(
+        [Interval(interval.lower, interval.upper) for interval in cardinality.intervals]
+    )
+
+
+def copy_subtree(feature: Feature) -> Feature:
+    """
+    Creates a deep copy of a feature and its descendants. The copy has no parent, and the copied features keep the
+    stable ids (see feature_uid) and any other attributes stored on the original features.
+
+    Args:
+        feature (Feature): The root of the subtree to copy.
+
+    Returns:
+        Feature: The copy of the feature, which shares no features or cardinalities with the original subtree.
+    """
+    root_copy = None
+    stack: list[tuple[Feature, Feature | None]] = [(feature, None)]
+    while stack:
+        original, parent_copy = stack.pop()
+        # Assign the stable id before copying, so all copies get the same id
+        feature_uid(original)
+        feature_copy = copy(original)
+        feature_copy.instance_cardinality = copy_cardinality(
+            original.instance_cardinality
+        )
+        feature_copy.group_type_cardinality = copy_cardinality(
+            original.group_type_cardinality
+        )
+        feature_copy.group_instance_cardinality = copy_cardinality(
+            original.group_instance_cardinality
+        )
+        feature_copy.parent = parent_copy
+        feature_copy.children = []
+        if parent_copy is None:
+            root_copy = feature_copy
+        else:
+            parent_copy.children.append(feature_copy)
+        stack.extend((child, feature_copy) for child in reversed(original.children))
+    assert root_copy is not None
+    return root_copy
+
+
+def copy_cfm(cfm: CFM) -> CFM:
+    """
+    Creates a deep copy of a feature model. Unlike copy.deepcopy, the feature tree is copied iteratively, so models of
+    arbitrary depth can be copied. Additional attributes stored on the features are copied along.
+
+    Args:
+        cfm (CFM): The feature model to copy.
+
+    Returns:
+        CFM: A feature model that shares no features, cardinalities or constraints with the given one.
+    """
+    copies: dict = {}
+    stack: list[tuple[Feature, Feature | None]] = [(cfm.root, None)]
+    while stack:
+        feature, parent_copy = stack.pop()
+        feature_copy = copy(feature)
+        feature_copy.instance_cardinality = copy_cardinality(
+            feature.instance_cardinality
+        )
+        feature_copy.group_type_cardinality = copy_cardinality(
+            feature.group_type_cardinality
+        )
+        feature_copy.group_instance_cardinality = copy_cardinality(
+            feature.group_instance_cardinality
+        )
+        feature_copy.parent = parent_copy
+        feature_copy.children = []
+        if parent_copy is not None:
+            parent_copy.children.append(feature_copy)
+        copies[id(feature)] = feature_copy
+        stack.extend((child, feature_copy) for child in reversed(feature.children))
+
+    def copied_feature(feature: Feature) -> Feature:
+        # Constraints may still reference features that are no longer part of the tree. The copies made so far double
+        # as the memo of deepcopy, so such features are linked to the copied tree like deepcopy would do.
+        if id(feature) not in copies:
+            return deepcopy(feature, copies)
+        return copies[id(feature)]
+
+    constraints = [
+        Constraint(
+            require=constraint.require,
+            first_feature=copied_feature(constraint.first_feature),
+            first_cardinality=copy_cardinality(constraint.first_cardinality),
+            second_feature=copied_feature(constraint.second_feature),
+            second_cardinality=copy_cardinality(constraint.second_cardinality),
+        )
+        for constraint in cfm.constraints
+    ]
+    return CFM(root=copies[id(cfm.root)], constraints=constraints)
+
+
+# Attributes that reference features owned by another part of the model. They are not followed when estimating sizes.
+_REFERENCE_ATTRIBUTES = ("parent", "first_feature", "second_feature")
+
+
+def estimate_size(obj: object) -> int:
+    """
+    Estimates the memory used by an object graph such as a feature model, a subtree or an edit operation. The objects
+    reachable from the given object are summed up with sys.getsizeof, except for references to parents and to the
+    features of constraints, which belong to the tree they are part of.
+
+    Args:
+        obj (object): The object to measure.
+
+    Returns:
+        int: The approximate size in bytes.
+    """
+    size = 0
+    seen: set[int] = set()
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, type):
+            attributes = vars(current)
+            size += sys.getsizeof(attributes)
+            stack.extend(
+                value
+                for name, value in attributes.items()
+                if name not in _REFERENCE_ATTRIBUTES
+            )
+    return size
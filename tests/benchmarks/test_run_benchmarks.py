@@ -0,0 +1,38 @@
+import json
+
+import pytest
+from benchmarks.cfm_generators import SHAPES, generate_cfm
+from benchmarks.run_benchmarks import BENCHMARKS, compare_results, main
+
+
+@pytest.mark.parametrize("shape", list(SHAPES))
+def test_generated_models(shape):
+    cfm = generate_cfm(shape, 50, constraints=10)
+    features = cfm.features
+
+    assert len(features) == 50
+    assert len({feature.name for feature in features}) == 50
+    assert len(cfm.constraints) == 10
+    assert all(
+        (len(feature.children) > 0) == bool(feature.group_type_cardinality.intervals)
+        for feature in features
+    )
+
+
+def test_run_all_benchmarks(tmp_path):
+    output = tmp_path / "results.json"
+
+    assert main(["--sizes", "20", "--repeat", "1", "--output", str(output)]) == 0
+
+    results = json.loads(output.read_text())["results"]
+    assert len(results) == len(SHAPES) * len(BENCHMARKS)
+    assert all(result["min"] <= result["median"] for result in results)
+
+
+def test_compare_results():
+    baseline = [{"benchmark": "layout", "shape": "wide", "features": 10, "median": 1.0}]
+    slower = [dict(baseline[0], median=2.0)]
+
+    assert compare_results(slower, baseline, 1.5) == [(slower[0], 2.0)]
+    assert compare_results(slower, baseline, 2.5) == []
+    assert compare_results(slower, [], 1.5) == []
@@ -0,0 +1,276 @@
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from benchmarks.cfm_generators import generate_cfm
+from benchmarks.fake_widgets import FakeCanvasView
+from cfmtoolbox import Cardinality, Feature, Interval
+from cfmtoolbox_editor.utils import cfm_layout_worker
+from cfmtoolbox_editor.utils.cfm_click_handler import CFMClickHandler
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+from cfmtoolbox_editor.utils.cfm_operations import (
+    AddFeature,
+    RenameFeature,
+    SetCardinality,
+)
+
+
+def item_kinds(view):
+    return Counter(item.kind for item in view.canvas.items.values())
+
+
+def item_states(view):
+    return {
+        item_id: (item.coords, dict(item.options))
+        for item_id, item in view.canvas.items.items()
+    }
+
+
+class TestRetainedItems:
+    """Test class for the canvas items retained between redraws"""
+
+    def test_redraw_without_changes(self, sandwich_cfm):
+        view = FakeCanvasView(SimpleNamespace(cfm=sandwich_cfm), CFMClickHandler())
+        view.draw_model()
+        states = item_states(view)
+        view.canvas.calls.clear()
+
+        view.draw_model()
+
+        assert view.canvas.calls == {}
+        assert item_states(view) == states
+
+    def test_redraw_after_change(self, sandwich_cfm):
+        view = FakeCanvasView(SimpleNamespace(cfm=sandwich_cfm), CFMClickHandler())
+        view.draw_model()
+        states = item_states(view)
+        view.canvas.calls.clear()
+
+        cheesemix = sandwich_cfm.root.children[1]
+        SetCardinality(
+            cheesemix.name,
+            "instance_cardinality",
+            cheesemix.instance_cardinality,
+            Cardinality([Interval(0, 3)]),
+        ).apply(sandwich_cfm)
+        view.draw_model()
+
+        # Only the instance cardinality of the changed feature is reconfigured
+        changed = {
+            item_id
+            for item_id, state in item_states(view).items()
+            if states[item_id] != state
+        }
+        card_id = view._feature_items[feature_uid(cheesemix)]["instance_card"].item_id
+        assert changed == {card_id}
+        assert view.canvas.calls == {"itemconfig": 1}
+        assert view.canvas.items[card_id].options["text"] == "⟨0, 3⟩"
+
+    def test_highlight_updates_retained_item(self, sandwich_cfm):
+        view = FakeCanvasView(SimpleNamespace(cfm=sandwich_cfm), CFMClickHandler())
+        view.draw_model()
+        bread, cheesemix = sandwich_cfm.root.children[:2]
+        rect_id = view._feature_items[feature_uid(bread)]["rect"].item_id
+
+        view._highlight_feature(bread)
+        assert view.canvas.items[rect_id].options["fill"] == "lightblue"
+        view._highlight_feature(cheesemix)
+        assert view.canvas.items[rect_id].options["fill"] == "lightgrey"
+
+        # The record of the item matches the canvas, so a redraw changes nothing
+        view.canvas.calls.clear()
+        view.draw_model()
+        assert view.canvas.calls == {}
+        assert view._feature_items[feature_uid(bread)]["rect"].item_id == rect_id
+
+
+class TestCanvasZoom:
+    """Test class for the zoom and the level of detail of the canvas"""
+
+    def test_zoom_levels_of_detail(self):
+        cfm = generate_cfm("balanced", 300)
+        view = FakeCanvasView(SimpleNamespace(cfm=cfm), CFMClickHandler())
+        view.draw_model()
+        detailed = item_kinds(view)
+
+        # Zoomed out below the threshold, only the nodes and the edges are drawn
+        view.zoom_to(0.25)
+        overview = item_kinds(view)
+        assert overview == {"rectangle": 300, "line": 299}
+        assert sum(overview.values()) < sum(detailed.values()) / 2
+
+        # The items are placed at the zoomed positions
+        root_position = view.positions[feature_uid(cfm.root)]
+        x_min, y_min, x_max, y_max = view.canvas.items[
+            view._feature_items[feature_uid(cfm.root)]["rect"].item_id
+        ].coords
+        assert x_min < root_position.x * 0.25 < x_max
+        assert y_min < root_position.y * 0.25 < y_max
+
+        # Zooming in above the threshold shows the details again, also after zooming within a level
+        view.zoom_to(0.4)
+        view.zoom_to(2)
+        assert item_kinds(view) == detailed
+        view.zoom_to(view.MAX_ZOOM * 10)
+        assert view.zoom == view.MAX_ZOOM
+
+    def test_labels_measured_while_zoomed(self):
+        cfm = generate_cfm("balanced", 300)
+        view = FakeCanvasView(SimpleNamespace(cfm=cfm), CFMClickHandler())
+        view.zoom_to(0.8)
+        view.draw_model()
+        unzoomed = FakeCanvasView(SimpleNamespace(cfm=cfm), CFMClickHandler())
+        unzoomed.draw_model()
+
+        # The labels are measured independently of the zoom, so the nodes fit their names at every zoom level
+        assert view._label_cache == unzoomed._label_cache
+
+
+class TestEventDispatch:
+    """Test class for the events on features handled by the bindings of the canvas"""
+
+    @staticmethod
+    def view_of(cfm):
+        redraws = []
+        editor = SimpleNamespace(
+            cfm=cfm, schedule_redraw=lambda **kwargs: redraws.append(kwargs)
+        )
+        view = FakeCanvasView(editor, CFMClickHandler())
+        view.draw_model()
+        return view, redraws
+
+    @staticmethod
+    def point_at(view, feature, role):
+        view.canvas.current = view._feature_items[feature_uid(feature)][role].item_id
+
+    def test_clicks_reach_feature_after_rename(self, sandwich_cfm, monkeypatch):
+        view, _ = self.view_of(sandwich_cfm)
+        bread = sandwich_cfm.root.children[0]
+        RenameFeature("bread", "toast").apply(sandwich_cfm)
+        view.draw_model()
+        event = SimpleNamespace(x=0, y=0, x_root=0, y_root=0)
+
+        self.point_at(view, bread, "text")
+        view._on_canvas_left_click(event)
+        assert view.currently_highlighted_feature is bread
+        rect_id = view._feature_items[feature_uid(bread)]["rect"].item_id
+        assert view.canvas.items[rect_id].options["fill"] == "lightblue"
+
+        menus = []
+        monkeypatch.setattr(
+            view, "_on_right_click_node", lambda event, feature: menus.append(feature)
+        )
+        view._on_canvas_right_click(event)
+        # Right clicks on other items of the feature do not open the menu
+        self.point_at(view, bread, "rect")
+        view._on_canvas_right_click(event)
+        assert menus == [bread]
+
+    def test_button_click_after_redraw(self, sandwich_cfm):
+        view, redraws = self.view_of(sandwich_cfm)
+        veggies = sandwich_cfm.root.children[2]
+        lettuce = veggies.children[0]
+        lettuce_text = view._feature_items[feature_uid(lettuce)]["text"].item_id
+
+        self.point_at(view, veggies, "button")
+        view._on_canvas_left_click(SimpleNamespace(x=0, y=0))
+        assert view.expanded_features[feature_uid(veggies)] is False
+        assert redraws == [{"constraints": False}]
+
+        # After the redraw, the items of hidden features are gone and no longer resolve to them
+        view.draw_model()
+        view.canvas.current = lettuce_text
+        assert view._current_feature() == (None, None)
+        self.point_at(view, veggies, "button")
+        assert view._current_feature() == (veggies, "button")
+
+    def test_hover_shows_full_name_of_truncated_feature(self, sandwich_cfm):
+        long_name = "a_feature_with_a_very_long_name_that_is_truncated"
+        view, _ = self.view_of(sandwich_cfm)
+        tips = []
+        view.node_tooltip = SimpleNamespace(
+            show_tip=lambda text, x, y: tips.append(text),
+            hide_tip=lambda: tips.append(None),
+        )
+        lettuce = sandwich_cfm.root.children[2].children[0]
+        RenameFeature("lettuce", long_name).apply(sandwich_cfm)
+        view.draw_model()
+        event = SimpleNamespace(x=0, y=0)
+
+        self.point_at(view, lettuce, "text")
+        view._on_canvas_motion(event)
+        assert tips == [None, long_name]
+
+        # Names that fit are not shown as a tooltip, moving within an item does nothing
+        self.point_at(view, sandwich_cfm.root, "text")
+        view._on_canvas_motion(event)
+        view._on_canvas_motion(event)
+        view._on_canvas_leave(event)
+        assert tips == [None, long_name, None, None]
+
+
+class TestBackgroundLayout:
+    """Test class for scrolling and zooming while a layout is computed in the background"""
+
+    def test_scroll_and_zoom_before_layout_is_done(self):
+        cfm = generate_cfm("balanced", 6000)
+        view = FakeCanvasView(SimpleNamespace(cfm=cfm), CFMClickHandler())
+        view.draw_model()
+        view.BACKGROUND_LAYOUT_THRESHOLD = 5000
+        root = cfm.root
+        old_root_position = view.positions[feature_uid(root)]
+        new_feature = Feature(
+            name="new",
+            instance_cardinality=Cardinality([Interval(0, 1)]),
+            group_type_cardinality=Cardinality([]),
+            group_instance_cardinality=Cardinality([]),
+            parent=None,
+            children=[],
+        )
+        AddFeature(root.name, len(root.children), new_feature).apply(cfm)
+
+        view.cancel_layout()
+        view.draw_model()
+        assert view.layout_worker.busy
+        # The root, whose group arc reaches to the new last child, is in view
+        view.center_on(old_root_position.x, old_root_position.y)
+        view._update_culling()
+        view.zoom_to(0.3)
+        view.zoom_to(1)
+        assert feature_uid(root.children[-1]) not in view._feature_items
+
+        deadline = time.monotonic() + 10
+        while view.layout_worker.busy:
+            assert time.monotonic() < deadline, "No layout within the timeout"
+            time.sleep(0.005)
+            view.layout_worker._poll()
+
+        # The new layout is drawn and culled to the view
+        assert feature_uid(root.children[-1]) in view.positions
+        new_position = view.positions[feature_uid(root.children[-1])]
+        view.center_on(new_position.x, new_position.y)
+        view._update_culling()
+        assert "text" in view._feature_items[feature_uid(root.children[-1])]
+
+    def test_failed_layout_is_computed_again(self, sandwich_cfm, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError("layout failed")
+
+        view = FakeCanvasView(SimpleNamespace(cfm=sandwich_cfm), CFMClickHandler())
+        view.draw_model()
+        view.BACKGROUND_LAYOUT_THRESHOLD = 1
+        monkeypatch.setattr(cfm_layout_worker, "GraphLayoutCalculator", fail)
+        RenameFeature("bread", "toast").apply(sandwich_cfm)
+
+        view.cancel_layout()
+        view.draw_model()
+        deadline = time.monotonic() + 10
+        while view.layout_worker.busy:
+            assert time.monotonic() < deadline, "No layout within the timeout"
+            time.sleep(0.005)
+            view.layout_worker._poll()
+
+        assert not view._layout_outdated
+        bread = sandwich_cfm.root.children[0]
+        text_id = view._feature_items[feature_uid(bread)]["text"].item_id
+        assert view.canvas.items[text_id].options["text"] == "toast"
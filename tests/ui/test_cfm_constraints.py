@@ -0,0 +1,142 @@
+from unittest.mock import MagicMock
+
+import pytest
+from cfmtoolbox import Cardinality, Constraint, Interval
+
+from cfmtoolbox_editor.ui.cfm_constraints import CFMConstraints
+from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_display_str
+
+
+class FakeTreeview:
+    """Treeview stand-in keeping the rows in a dict and counting the row changes"""
+
+    def __init__(self, height=4):
+        self.height = height
+        self.rows: dict[str, tuple] = {}
+        self.order: list[str] = []
+        self.row_changes = 0
+        self._next_id = 0
+
+    def cget(self, option):
+        assert option == "height"
+        return self.height
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def insert(self, parent, index, values):
+        self._next_id += 1
+        row = f"I{self._next_id:03}"
+        self.rows[row] = tuple(values)
+        self.order.insert(len(self.order) if index == "end" else index, row)
+        self.row_changes += 1
+        return row
+
+    def item(self, row, option=None, values=None):
+        if values is None:
+            return self.rows[row]
+        self.rows[row] = tuple(values)
+        self.row_changes += 1
+
+    def move(self, row, parent, index):
+        self.order.remove(row)
+        self.order.insert(index, row)
+        self.row_changes += 1
+
+    def delete(self, *rows):
+        for row in rows:
+            del self.rows[row]
+            self.order.remove(row)
+            self.row_changes += 1
+
+
+@pytest.fixture
+def panel(monkeypatch):
+    def create_frame(self):
+        self.constraints_tree = FakeTreeview()
+        self.constraints_scroll = MagicMock()
+
+    monkeypatch.setattr(CFMConstraints, "_create_constraints_frame", create_frame)
+    monkeypatch.setattr(CFMConstraints, "_create_constraints_tooltip", MagicMock())
+    return CFMConstraints(MagicMock(), MagicMock(), MagicMock())
+
+
+def make_constraints(sandwich_cfm, count):
+    features = sandwich_cfm.features
+    return [
+        Constraint(
+            require=index % 2 == 0,
+            first_feature=features[index % len(features)],
+            first_cardinality=Cardinality([Interval(index, index)]),
+            second_feature=features[(index + 1) % len(features)],
+            second_cardinality=Cardinality([Interval(0, None)]),
+        )
+        for index in range(count)
+    ]
+
+
+def displayed_constraints(panel):
+    return [panel.constraint_mapping[row] for row in panel.get_tree().get_children()]
+
+
+def test_small_lists_are_fully_inserted(panel, sandwich_cfm):
+    constraints = make_constraints(sandwich_cfm, 10)
+    panel.update_constraints(constraints)
+
+    assert displayed_constraints(panel) == constraints
+
+
+def test_only_changed_rows_are_updated(panel, sandwich_cfm):
+    constraints = make_constraints(sandwich_cfm, 10)
+    tree = panel.get_tree()
+    panel.update_constraints(constraints)
+
+    # Unchanged constraints
+    tree.row_changes = 0
+    panel.update_constraints(list(constraints))
+    assert tree.row_changes == 0
+
+    # A renamed feature only changes the rows of its constraints
+    constraints[3].first_feature.name = "renamed"
+    panel.update_constraints(constraints)
+    changed = [
+        c
+        for c in constraints
+        if "renamed" in (c.first_feature.name, c.second_feature.name)
+    ]
+    assert tree.row_changes == len(changed)
+    assert all("renamed" in tree.rows[panel.constraint_rows[id(c)]] for c in changed)
+
+    # Removed, inserted and moved constraints
+    tree.row_changes = 0
+    new_constraint = make_constraints(sandwich_cfm, 1)[0]
+    constraints = [constraints[9], *constraints[1:5], new_constraint, *constraints[5:9]]
+    panel.update_constraints(constraints)
+    assert displayed_constraints(panel) == constraints
+    assert tree.row_changes == 3
+    assert len(tree.rows) == len(panel.constraint_rows) == 10
+
+
+def test_virtual_mode_fills_only_visible_rows(panel, sandwich_cfm):
+    constraints = make_constraints(sandwich_cfm, panel.VIRTUAL_THRESHOLD * 4)
+    tree = panel.get_tree()
+
+    panel.update_constraints(constraints)
+    assert displayed_constraints(panel) == constraints[:4]
+    assert tree.rows[tree.get_children()[0]][1] == cardinality_to_display_str(
+        constraints[0].first_cardinality, "⟨", "⟩"
+    )
+
+    tree.row_changes = 0
+    panel._on_scrollbar("moveto", "0.5")
+    first = len(constraints) // 2
+    assert displayed_constraints(panel) == constraints[first : first + 4]
+    panel._on_scrollbar("scroll", "1", "pages")
+    assert displayed_constraints(panel) == constraints[first + 4 : first + 8]
+    panel._on_scrollbar("moveto", "1.0")
+    assert displayed_constraints(panel) == constraints[-4:]
+    assert tree.row_changes == 3 * 4
+
+    # Removing constraints keeps the window within the list
+    panel.update_constraints(constraints[:-10])
+    assert displayed_constraints(panel) == constraints[-14:-10]
@@ -0,0 +1,188 @@
+import pytest
+from typer.testing import CliRunner
+import cfmtoolbox_editor
+from cfmtoolbox_editor.utils.cfm_utils import copy_cfm
+from benchmarks.fake_widgets import FakeCanvasView, FakeConstraintsView
+from cfmtoolbox_editor import cfm_editor
+from cfmtoolbox_editor.cfm_editor import CFMEditorApp
+from cfmtoolbox_editor.utils.cfm_click_handler import CFMClickHandler
+from cfmtoolbox_editor.utils.cfm_journal import (
+    journal_path,
+    model_fingerprint,
+    read_journal,
+)
+from cfmtoolbox_editor.utils.cfm_operations import RenameFeature
+
+
+class FakeTk:
+    """Tk stand-in collecting the idle callbacks, which are run by run_idle"""
+
+    def __init__(self):
+        self.idle = []
+
+    def title(self, title):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def after_idle(self, callback, *args):
+        self.idle.append(callback)
+        return "after"
+
+    def after(self, ms, callback=None, *args):
+        return "after"
+
+    def mainloop(self):
+        pass
+
+    def run_idle(self):
+        callbacks, self.idle = self.idle, []
+        for callback in callbacks:
+            callback()
+
+
+def setup_fake_ui(editor):
+    editor.canvas = FakeCanvasView(editor, CFMClickHandler())
+    editor.constraints = FakeConstraintsView(None, editor, CFMClickHandler())
+
+
+@pytest.fixture
+def fake_ui(monkeypatch):
+    monkeypatch.setattr(cfm_editor.tk, "Tk", FakeTk)
+    monkeypatch.setattr(CFMEditorApp, "_setup_ui", setup_fake_ui)
+
+
+@pytest.fixture
+def editor(sandwich_cfm, monkeypatch, fake_ui):
+    editor = CFMEditorApp()
+    editor.start(sandwich_cfm)
+    editor.root.run_idle()
+
+    calls = {"draw_model": 0, "update_constraints": 0}
+    for name, view in [
+        ("draw_model", editor.canvas),
+        ("update_constraints", editor.constraints),
+    ]:
+        method = getattr(view, name)
+
+        def counted(*args, method=method, name=name):
+            calls[name] += 1
+            return method(*args)
+
+        monkeypatch.setattr(view, name, counted)
+    editor.calls = calls
+    return editor
+
+
+class TestRedrawScheduling:
+    """Test class for the redraws deferred until Tk is idle"""
+
+    def test_edits_in_one_tick_are_drawn_once(self, editor):
+        for old, new in [("bread", "toast"), ("toast", "bun"), ("wheat", "rye")]:
+            editor.apply_operation(RenameFeature(old, new))
+        assert editor.calls == {"draw_model": 0, "update_constraints": 0}
+        assert len(editor.root.idle) == 1
+
+        editor.root.run_idle()
+        assert editor.calls == {"draw_model": 1, "update_constraints": 1}
+        names = {
+            item.options.get("text") for item in editor.canvas.canvas.items.values()
+        }
+        assert {"bun", "rye"} <= names and "toast" not in names
+
+    def test_flush_redraw_runs_pending_redraw(self, editor):
+        editor.apply_operation(RenameFeature("bread", "toast"))
+        editor.flush_redraw()
+        assert editor.calls == {"draw_model": 1, "update_constraints": 1}
+
+        # The idle callback finds nothing left to draw
+        editor.root.run_idle()
+        assert editor.calls == {"draw_model": 1, "update_constraints": 1}
+
+    def test_view_changes_skip_constraints(self, editor):
+        editor.schedule_redraw(constraints=False)
+        editor.schedule_redraw(constraints=False)
+        editor.root.run_idle()
+        assert editor.calls == {"draw_model": 1, "update_constraints": 0}
+
+
+class TestConstraintDeletion:
+    """Test class for deleting constraints, which are found through the feature index"""
+
+    def test_delete_constraint(self, editor, monkeypatch):
+        monkeypatch.setattr(cfm_editor.messagebox, "askokcancel", lambda *args: True)
+        constraints = list(editor.cfm.constraints)
+
+        editor.delete_constraint(constraints[-1])
+        assert editor.cfm.constraints == constraints[:-1]
+        editor.delete_constraint(constraints[0])
+        assert editor.cfm.constraints == constraints[1:-1]
+
+
+class TestJournalRemoval:
+    """Test class for dropping the journal once the edited model is saved"""
+
+    @pytest.fixture
+    def model_path(self, tmp_path, monkeypatch, fake_ui):
+        path = tmp_path / "sandwich.uvl"
+        monkeypatch.setattr(cfmtoolbox_editor.app, "import_path", path)
+        monkeypatch.setattr(cfmtoolbox_editor.app, "export_path", None)
+        return path
+
+    @pytest.fixture
+    def prompts(self, monkeypatch):
+        prompts = []
+
+        def ask(title, message):
+            prompts.append(title)
+            return True
+
+        monkeypatch.setattr(cfm_editor.messagebox, "askyesno", ask)
+        monkeypatch.setattr(cfm_editor.messagebox, "showwarning", ask)
+        return prompts
+
+    def edit(self, cfm, path):
+        # Runs a session renaming a feature, like a user closing the editor without a crash
+        editor = CFMEditorApp(journal_path=journal_path(path))
+        editor.root.mainloop = lambda: editor.apply_operation(
+            RenameFeature("bread", "toast")
+        )
+        return editor.start(cfm)
+
+    def test_model_is_exported_once(self, sandwich_cfm, model_path, monkeypatch):
+        model_path.write_text("")
+        exported = []
+        monkeypatch.setitem(
+            cfmtoolbox_editor.app.registered_importers,
+            ".uvl",
+            lambda data: sandwich_cfm,
+        )
+        monkeypatch.setattr(cfmtoolbox_editor.app, "export_model", exported.append)
+        result = CliRunner().invoke(
+            cfmtoolbox_editor.app.typer,
+            ["--import", str(model_path), "--export", str(model_path), "edit"],
+        )
+        assert result.exit_code == 0, result.output
+        assert exported == [sandwich_cfm]
+
+    def test_journal_is_kept_when_the_editor_is_closed(self, sandwich_cfm, model_path):
+        self.edit(sandwich_cfm, model_path)
+        contents = read_journal(journal_path(model_path))
+        assert contents.edits == 1
+        assert contents.end == model_fingerprint(sandwich_cfm)
+
+    def test_saved_journal_is_dropped(self, sandwich_cfm, model_path, prompts):
+        edited = self.edit(sandwich_cfm, model_path)
+
+        CFMEditorApp(journal_path=journal_path(model_path)).start(edited)
+        assert prompts == []
+        assert read_journal(journal_path(model_path)).records == []
+
+    def test_unsaved_journal_is_recovered(self, sandwich_cfm, model_path, prompts):
+        self.edit(copy_cfm(sandwich_cfm), model_path)
+
+        editor = CFMEditorApp(journal_path=journal_path(model_path))
+        editor.start(sandwich_cfm)
+        assert prompts == ["Recover Edits"]
+        assert editor.get_feature_by_name("toast") is not None
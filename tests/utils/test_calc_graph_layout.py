@@ -0,0 +1,166 @@
+import pytest
+from cfmtoolbox import Feature, CFM, Cardinality, Interval
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import (
+    GraphLayoutCalculator,
+    LayoutCache,
+    Point,
+)
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex, feature_uid
+from cfmtoolbox_editor.utils.cfm_text_width import CharacterWidthTable
+from cfmtoolbox_editor.utils.cfm_utils import copy_cfm
+
+
+def _feature(name, parent=None):
+    feature = Feature(
+        name=name,
+        instance_cardinality=Cardinality([Interval(0, 1)]),
+        group_type_cardinality=Cardinality([]),
+        group_instance_cardinality=Cardinality([]),
+        parent=parent,
+        children=[],
+    )
+    if parent is not None:
+        parent.children.append(feature)
+    return feature
+
+
+@pytest.fixture
+def uneven_cfm():
+    # Subtrees of different depths, so that both the left and the right contour of merged siblings are extended
+    root = _feature("root")
+    _feature("a", root)
+    b = _feature("b", root)
+    b1 = _feature("b1", b)
+    _feature("b11", b1)
+    _feature("feature_with_long_name", b1)
+    _feature("c", root)
+    d = _feature("d", root)
+    d1 = _feature("d1", d)
+    d11 = _feature("d11", d1)
+    _feature("d111", d11)
+    _feature("e", root)
+    return CFM(root=root, constraints=[])
+
+
+def compute_positions(cfm, collapsed=(), **kwargs):
+    expanded_features = {
+        feature_uid(feature): feature.name not in collapsed for feature in cfm.features
+    }
+    positions = GraphLayoutCalculator(
+        cfm, expanded_features, 120, **kwargs
+    ).compute_positions()
+    return {
+        feature.name: (
+            positions[feature_uid(feature)].x,
+            positions[feature_uid(feature)].y,
+        )
+        for feature in cfm.features
+    }
+
+
+class TestGraphLayoutCalculator:
+    """Regression tests pinning the positions computed by the layout algorithm"""
+
+    def test_positions_sandwich_cfm(self, sandwich_cfm):
+        assert compute_positions(sandwich_cfm) == {
+            "sandwich": (400, 50),
+            "bread": (305, 150),
+            "Cheesemix": (397, 150),
+            "veggies": (495, 150),
+            "sourdough": (259, 250),
+            "wheat": (351, 250),
+            "lettuce": (495, 250),
+        }
+
+    def test_positions_sandwich_cfm_collapsed(self, sandwich_cfm):
+        # Children of collapsed features are not positioned
+        assert compute_positions(sandwich_cfm, collapsed=("bread",)) == {
+            "sandwich": (400, 50),
+            "bread": (305, 150),
+            "Cheesemix": (397, 150),
+            "veggies": (495, 150),
+            "sourdough": (0, 0),
+            "wheat": (0, 0),
+            "lettuce": (495, 250),
+        }
+
+    def test_positions_uneven_depths(self, uneven_cfm):
+        assert compute_positions(uneven_cfm) == {
+            "root": (400, 50),
+            "a": (255, 150),
+            "b": (311, 150),
+            "c": (367, 150),
+            "d": (489, 150),
+            "e": (545, 150),
+            "b1": (311, 250),
+            "d1": (489, 250),
+            "b11": (251, 350),
+            "feature_with_long_name": (370, 350),
+            "d11": (489, 350),
+            "d111": (489, 450),
+        }
+
+    def test_positions_deep_chain(self):
+        # Deeper than the default recursion limit
+        root = _feature("root")
+        feature = root
+        for i in range(5000):
+            feature = _feature(f"feature{i}", feature)
+        positions = compute_positions(CFM(root=root, constraints=[]))
+
+        assert positions["feature4999"] == (400, 5000 * 100 + 50)
+        assert all(x == 400 for x, _ in positions.values())
+
+    def test_positions_with_measured_widths(self):
+        # Names of the same length but very different widths must not overlap
+        root = _feature("root")
+        for name in ["MMMMMMMM", "WWWWWWWW", "iiiiiiii", "MWMWMWMW"]:
+            _feature(name, root)
+        widths = CharacterWidthTable()
+        positions = compute_positions(
+            CFM(root=root, constraints=[]), node_width=widths.measure
+        )
+
+        names = [child.name for child in root.children]
+        for left, right in zip(names, names[1:]):
+            gap = positions[right][0] - positions[left][0]
+            assert gap >= (widths.measure(left) + widths.measure(right)) / 2
+
+    def test_expansion_states_apply_to_copies(self, sandwich_cfm):
+        # The states are keyed by stable feature ids, so they still apply to a copy of the model restored by undo
+        # The ids are assigned when the model is indexed, like the editor does on start
+        FeatureIndex(sandwich_cfm)
+        bread = sandwich_cfm.root.children[0]
+        expanded_features = {feature_uid(bread): False}
+        copy = copy_cfm(sandwich_cfm)
+
+        positions = GraphLayoutCalculator(
+            copy, expanded_features, 120
+        ).compute_positions()
+
+        assert positions[feature_uid(bread.children[0])] == Point(0, 0)
+        assert positions[feature_uid(copy.root.children[-1].children[0])].y == 250
+
+    def test_cached_layout_matches_full_layout(self, uneven_cfm, monkeypatch):
+        cache = LayoutCache()
+        compute_positions(uneven_cfm, cache=cache)
+        b1 = uneven_cfm.root.children[1].children[0]
+        _feature("b12", b1)
+        uneven_cfm.root.children[3].name = "renamed"
+
+        assert compute_positions(uneven_cfm, ("d1",), cache=cache) == (
+            compute_positions(uneven_cfm, ("d1",))
+        )
+
+        # Without changes, no contour is merged again
+        merged = []
+        original = GraphLayoutCalculator._compute_contour
+        monkeypatch.setattr(
+            GraphLayoutCalculator,
+            "_compute_contour",
+            lambda self, feature, contours: (
+                merged.append(feature.name) or original(self, feature, contours)
+            ),
+        )
+        compute_positions(uneven_cfm, ("d1",), cache=cache)
+        assert merged == []
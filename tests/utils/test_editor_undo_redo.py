@@ -1,100 +1,12 @@
-import pytest
-from cfmtoolbox import Feature, CFM, Cardinality, Interval, Constraint
+from cfmtoolbox import Constraint, Feature, Cardinality, Interval
 from cfmtoolbox_editor.utils.cfm_editor_undo_redo import UndoRedoManager
-
-
-@pytest.fixture
-def sandwich_cfm():
-    # Root feature mit allen erforderlichen Argumenten
-    sandwich = Feature(
-        name="sandwich",
-        instance_cardinality=Cardinality([Interval(1, 1)]),
-        group_type_cardinality=Cardinality([Interval(2, 7)]),
-        group_instance_cardinality=Cardinality([Interval(2, 7)]),
-        parent=None,
-        children=[],
-    )
-
-    # Bread feature
-    bread = Feature(
-        name="bread",
-        instance_cardinality=Cardinality([Interval(2, 2)]),
-        group_type_cardinality=Cardinality([Interval(1, 1)]),  # alternative
-        group_instance_cardinality=Cardinality([Interval(1, 1)]),
-        parent=sandwich,
-        children=[],
-    )
-
-    # Bread types
-    sourdough = Feature(
-        name="sourdough",
-        instance_cardinality=Cardinality([Interval(0, 1)]),
-        group_type_cardinality=Cardinality([Interval(0, 0)]),
-        group_instance_cardinality=Cardinality([Interval(0, 0)]),
-        parent=bread,
-        children=[],
-    )
-
-    wheat = Feature(
-        name="wheat",
-        instance_cardinality=Cardinality([Interval(0, 1)]),
-        group_type_cardinality=Cardinality([Interval(0, 0)]),
-        group_instance_cardinality=Cardinality([Interval(0, 0)]),
-        parent=bread,
-        children=[],
-    )
-
-    veggies = Feature(
-        name="veggies",
-        instance_cardinality=Cardinality([Interval(0, 1)]),
-        group_type_cardinality=Cardinality([Interval(1, 2)]),  # or
-        group_instance_cardinality=Cardinality([Interval(1, 2)]),
-        parent=sandwich,
-        children=[],
-    )
-
-    # Veggies types
-    lettuce = Feature(
-        name="lettuce",
-        instance_cardinality=Cardinality([Interval(0, None)]),
-        group_type_cardinality=Cardinality([Interval(0, 0)]),
-        group_instance_cardinality=Cardinality([Interval(0, 0)]),
-        parent=veggies,
-        children=[],
-    )
-
-    # Cheese feature mit Kindern
-    cheesemix = Feature(
-        name="Cheesemix",
-        instance_cardinality=Cardinality([Interval(2, 4)]),
-        group_type_cardinality=Cardinality([Interval(1, 3)]),  # or
-        group_instance_cardinality=Cardinality([Interval(1, 3)]),
-        parent=sandwich,
-        children=[],
-    )
-
-    veggies.children = [lettuce]
-    sandwich.children = [bread, cheesemix, veggies]
-    bread.children = [sourdough, wheat]
-
-    constraints = [
-        Constraint(
-            first_feature=wheat,
-            first_cardinality=Cardinality([Interval(1, None)]),
-            second_feature=lettuce,
-            second_cardinality=Cardinality([Interval(1, None)]),
-            require=True,  # Hinzugefügt: require Parameter
-        ),
-        Constraint(
-            first_feature=cheesemix,
-            first_cardinality=Cardinality([Interval(1, None)]),
-            second_feature=sourdough,
-            second_cardinality=Cardinality([Interval(1, None)]),
-            require=True,  # Hinzugefügt: require Parameter
-        ),
-    ]
-
-    return CFM(root=sandwich, constraints=constraints)
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_operations import (
+    AddConstraint,
+    AddFeature,
+    RenameFeature,
+)
+from cfmtoolbox_editor.utils.cfm_snapshots import ModelSnapshot
 
 
 class TestUndoRedoManager:
@@ -335,3 +247,247 @@ class TestUndoRedoManager:
             if child.name == "Cheesemix"
         )
         assert len(cheesemix.children) == 0
+
+    def test_deep_model_sandwich_cfm(self, sandwich_cfm):
+        """Test undo and redo on a model deeper than the recursion limit"""
+        self.sandwich_cfm = sandwich_cfm
+        manager = UndoRedoManager()
+
+        feature = self.sandwich_cfm.root.children[1]
+        for i in range(5000):
+            child = Feature(
+                name=f"DeepFeature{i}",
+                instance_cardinality=Cardinality([Interval(1, 1)]),
+                group_type_cardinality=Cardinality([]),
+                group_instance_cardinality=Cardinality([]),
+                parent=feature,
+                children=[],
+            )
+            feature.children.append(child)
+            feature = child
+        manager.add_state(self.sandwich_cfm)
+
+        feature.name = "Deepest"
+        manager.add_state(self.sandwich_cfm)
+
+        self.sandwich_cfm = manager.undo()
+        assert len(self.sandwich_cfm.features) == 5007
+        assert self.sandwich_cfm.features[-1].name == "DeepFeature4999"
+        assert manager.redo().features[-1].name == "Deepest"
+
+    def test_max_entries_evicts_oldest_sandwich_cfm(self, sandwich_cfm):
+        """Test that the oldest entries are evicted when the history has too many entries"""
+        self.sandwich_cfm = sandwich_cfm
+        manager = UndoRedoManager(max_entries=3)
+        manager.set_initial_state(self.sandwich_cfm)
+        manager.add_state(self.sandwich_cfm)
+
+        for name in ["toast", "bun", "roll", "bagel"]:
+            operation = RenameFeature(self.sandwich_cfm.root.children[0].name, name)
+            operation.apply(self.sandwich_cfm)
+            manager.add_state(self.sandwich_cfm, operation)
+        assert len(manager.undo_stack) == 3
+
+        # Only the two most recent edits can be undone
+        assert manager.undo().root.children[0].name == "roll"
+        assert manager.undo().root.children[0].name == "bun"
+        assert manager.undo() is None
+
+        # The initial state is still reachable by a reset, which can be undone as well
+        assert manager.reset().root.children[0].name == "bread"
+        assert manager.undo().root.children[0].name == "bun"
+
+    def test_max_bytes_evicts_snapshots_sandwich_cfm(self, sandwich_cfm):
+        """Test that the oldest entries are evicted when the history exceeds its memory budget"""
+        self.sandwich_cfm = sandwich_cfm
+        bread = self.sandwich_cfm.root.children[0]
+        snapshot = ModelSnapshot.from_cfm(self.sandwich_cfm)
+        bread.instance_cardinality.intervals[0].upper = 1
+        # A snapshot after a change of bread only adds nodes for bread and the root
+        change_size = ModelSnapshot.from_cfm(self.sandwich_cfm, snapshot).size
+        max_bytes = int(snapshot.full_size() + 2.5 * change_size)
+        manager = UndoRedoManager(max_bytes=max_bytes)
+
+        for upper in range(2, 7):
+            bread.instance_cardinality.intervals[0].upper = upper
+            manager.add_state(self.sandwich_cfm)
+            assert manager.history_size <= max_bytes
+        # The oldest snapshot is charged with all of its nodes, the newer ones only with the nodes they do not share
+        assert len(manager.undo_stack) == 3
+
+        assert (
+            manager.undo().root.children[0].instance_cardinality.intervals[0].upper == 5
+        )
+        assert (
+            manager.undo().root.children[0].instance_cardinality.intervals[0].upper == 4
+        )
+        assert manager.undo() is None
+        assert (
+            manager.redo().root.children[0].instance_cardinality.intervals[0].upper == 5
+        )
+
+    def test_undo_redo_update_index_sandwich_cfm(self, sandwich_cfm):
+        """Test that undone and redone operations update the index of the edited model"""
+        self.sandwich_cfm = sandwich_cfm
+        index = FeatureIndex(self.sandwich_cfm)
+        manager = UndoRedoManager()
+        manager.set_initial_state(self.sandwich_cfm)
+        manager.add_state(self.sandwich_cfm)
+        operation = RenameFeature("bread", "toast")
+        operation.apply(self.sandwich_cfm, index)
+        manager.add_state(self.sandwich_cfm, operation)
+
+        assert manager.undo(index) is self.sandwich_cfm
+        assert "bread" in index and "toast" not in index
+        assert manager.redo(index) is self.sandwich_cfm
+        assert index.get("toast") is self.sandwich_cfm.root.children[0]
+
+        # A reset replaces the content of the model, the index is rebuilt
+        assert manager.reset(index) is self.sandwich_cfm
+        assert index.get("bread") is self.sandwich_cfm.root.children[0]
+
+    def test_undo_replays_operations_after_snapshot_sandwich_cfm(self, sandwich_cfm):
+        """Test undoing a snapshot that is restored by replaying operations on an older snapshot"""
+        self.sandwich_cfm = sandwich_cfm
+        manager = UndoRedoManager()
+        manager.add_state(self.sandwich_cfm)
+
+        new_feature = Feature(
+            name="new",
+            instance_cardinality=Cardinality([Interval(0, 1)]),
+            group_type_cardinality=Cardinality([]),
+            group_instance_cardinality=Cardinality([]),
+            parent=None,
+            children=[],
+        )
+        for operation in [
+            AddFeature("sandwich", 3, new_feature),
+            RenameFeature("new", "renamed"),
+        ]:
+            operation.apply(self.sandwich_cfm)
+            manager.add_state(self.sandwich_cfm, operation)
+        added = self.sandwich_cfm.root.children[3]
+        added.instance_cardinality.intervals[0].upper = 5
+        manager.add_state(self.sandwich_cfm)
+
+        restored = manager.undo()
+        assert restored is not self.sandwich_cfm
+        restored_feature = restored.root.children[3]
+        assert restored_feature.name == "renamed"
+        assert restored_feature.instance_cardinality.intervals[0].upper == 1
+        # The restored model shares no features with the edited one
+        assert restored_feature is not added
+        assert not {id(feature) for feature in restored.features} & {
+            id(feature) for feature in self.sandwich_cfm.features
+        }
+
+        assert manager.undo().root.children[3].name == "new"
+        assert len(manager.undo().root.children) == 3
+        assert manager.redo().root.children[3].name == "new"
+
+    def test_undo_replays_constraints_of_renamed_features_sandwich_cfm(
+        self, sandwich_cfm
+    ):
+        """Test that renaming a feature does not change the recorded constraint operations replayed on a snapshot"""
+        self.sandwich_cfm = sandwich_cfm
+        manager = UndoRedoManager()
+        manager.add_state(self.sandwich_cfm)
+
+        new_feature = Feature(
+            name="a",
+            instance_cardinality=Cardinality([Interval(0, 1)]),
+            group_type_cardinality=Cardinality([]),
+            group_instance_cardinality=Cardinality([]),
+            parent=None,
+            children=[],
+        )
+        constraints = len(self.sandwich_cfm.constraints)
+        for operation in [
+            AddFeature("sandwich", 3, new_feature),
+            AddConstraint(
+                constraints,
+                Constraint(
+                    require=True,
+                    first_feature=new_feature,
+                    first_cardinality=Cardinality([Interval(1, 1)]),
+                    second_feature=self.sandwich_cfm.root,
+                    second_cardinality=Cardinality([Interval(1, 1)]),
+                ),
+            ),
+            RenameFeature("a", "b"),
+        ]:
+            operation.apply(self.sandwich_cfm)
+            manager.add_state(self.sandwich_cfm, operation)
+        manager.add_state(self.sandwich_cfm)
+
+        def added_constraint(cfm):
+            constraint = cfm.constraints[constraints]
+            assert constraint.first_feature is cfm.root.children[3]
+            assert constraint.second_feature is cfm.root
+            return constraint.first_feature.name
+
+        assert added_constraint(manager.undo()) == "b"
+        assert added_constraint(manager.undo()) == "a"
+        assert len(manager.undo().constraints) == constraints
+        assert added_constraint(manager.redo()) == "a"
+        assert added_constraint(manager.redo()) == "b"
+        assert added_constraint(manager.redo()) == "b"
+
+    def test_undo_reset_after_later_edits_sandwich_cfm(self, sandwich_cfm):
+        """Test that edits after a reset do not change the state the reset is replayed to"""
+        self.sandwich_cfm = sandwich_cfm
+        manager = UndoRedoManager()
+        manager.set_initial_state(self.sandwich_cfm)
+        manager.add_state(self.sandwich_cfm)
+        operation = RenameFeature("bread", "toast")
+        operation.apply(self.sandwich_cfm)
+        manager.add_state(self.sandwich_cfm, operation)
+
+        manager.reset()
+        operation = RenameFeature("bread", "bun")
+        operation.apply(self.sandwich_cfm)
+        manager.add_state(self.sandwich_cfm, operation)
+        manager.add_state(self.sandwich_cfm)
+
+        # Restored from the first snapshot by replaying the rename and the reset
+        assert manager.undo().root.children[0].name == "bun"
+        assert manager.undo().root.children[0].name == "bread"
+        assert manager.undo().root.children[0].name == "toast"
+
+    def test_snapshot_visits_paths_changed_by_operations_sandwich_cfm(
+        self, sandwich_cfm
+    ):
+        """Test that a snapshot after tracked operations only creates the nodes of the changed paths"""
+        self.sandwich_cfm = sandwich_cfm
+        index = FeatureIndex(self.sandwich_cfm)
+        manager = UndoRedoManager()
+        manager.set_initial_state(self.sandwich_cfm)
+        manager.add_state(self.sandwich_cfm, index=index, changed=())
+        first = manager.undo_stack[-1]
+        assert first.root is manager.initial_state.root
+
+        for operation in [
+            RenameFeature("wheat", "rye"),
+            RenameFeature("rye", "spelt"),
+        ]:
+            operation.apply(self.sandwich_cfm, index)
+            manager.add_state(self.sandwich_cfm, operation, index)
+        manager.undo(index)
+        manager.redo(index)
+        lettuce = index.get("lettuce")
+        lettuce.name = "rocket"
+        index.rename(lettuce, "lettuce")
+        manager.add_state(self.sandwich_cfm, index=index, changed=[lettuce])
+        snapshot = manager.undo_stack[-1]
+
+        bread, cheesemix, veggies = snapshot.root.children
+        assert cheesemix is first.root.children[1]
+        assert snapshot.constraints is first.constraints
+        assert bread is not first.root.children[0]
+        assert veggies is not first.root.children[2]
+        assert [node.name for node in bread.children] == ["sourdough", "spelt"]
+        assert veggies.children[0].name == "rocket"
+
+        # The states before the snapshot are restored from the first snapshot
+        assert manager.undo().root.children[0].children[1].name == "spelt"
+        assert manager.undo().root.children[0].children[1].name == "rye"
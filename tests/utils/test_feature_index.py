@@ -0,0 +1,160 @@
+import pytest
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex, feature_uid
+from cfmtoolbox_editor.utils.cfm_operations import (
+    AddConstraint,
+    CompositeOperation,
+    RemoveConstraint,
+    find_feature,
+    remove_constraints_of,
+)
+from cfmtoolbox_editor.utils.cfm_utils import copy_cfm
+from tests.utils.test_operations import operations
+
+
+class CountingList(list):
+    """A list counting the reads of its items by position."""
+
+    reads = 0
+
+    def __getitem__(self, position):
+        self.reads += 1
+        return super().__getitem__(position)
+
+
+def index_content(index):
+    return (
+        {name: id(feature) for name, feature in index._by_name.items()},
+        {uid: id(feature) for uid, feature in index._by_uid.items()},
+        {uid: set(constraints) for uid, constraints in index._constraints.items()},
+    )
+
+
+class TestFeatureIndex:
+    """Test class for FeatureIndex"""
+
+    def test_lookup_by_name_and_uid(self, sandwich_cfm):
+        index = FeatureIndex(sandwich_cfm)
+        bread = find_feature(sandwich_cfm, "bread")
+
+        assert len(index) == len(sandwich_cfm.features)
+        assert "bread" in index
+        assert index.get("bread") is bread
+        assert index.get("ketchup") is None
+        assert index.get_by_uid(feature_uid(bread)) is bread
+
+    def test_uid_is_stable(self, sandwich_cfm):
+        bread = find_feature(sandwich_cfm, "bread")
+        uid = feature_uid(bread)
+        bread.name = "toast"
+        copy = find_feature(copy_cfm(sandwich_cfm), "toast")
+
+        assert feature_uid(bread) == uid
+        assert feature_uid(copy) == uid
+        assert feature_uid(sandwich_cfm.root) != uid
+
+    def test_path(self, sandwich_cfm):
+        wheat = find_feature(sandwich_cfm, "wheat")
+
+        assert [feature.name for feature in FeatureIndex.path(wheat)] == [
+            "sandwich",
+            "bread",
+            "wheat",
+        ]
+
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "add",
+            "remove",
+            "move",
+            "rename",
+            "add_constraint",
+            "remove_constraint",
+            "edit_constraint",
+            "delete_subtree",
+        ],
+    )
+    def test_operations_update_index(self, sandwich_cfm, name):
+        index = FeatureIndex(sandwich_cfm)
+        operation = operations(sandwich_cfm)[name]
+
+        operation.apply(sandwich_cfm, index)
+        assert index_content(index) == index_content(FeatureIndex(sandwich_cfm))
+
+        operation.invert().apply(sandwich_cfm, index)
+        assert index_content(index) == index_content(FeatureIndex(sandwich_cfm))
+
+    def test_constraints_of(self, sandwich_cfm):
+        index = FeatureIndex(sandwich_cfm)
+
+        for feature in sandwich_cfm.features:
+            assert index.constraints_of(feature) == [
+                constraint
+                for constraint in sandwich_cfm.constraints
+                if feature in (constraint.first_feature, constraint.second_feature)
+            ]
+
+    def test_remove_constraints_of_subtree(self, sandwich_cfm):
+        index = FeatureIndex(sandwich_cfm)
+        subtree = FeatureIndex.subtree(sandwich_cfm.root.children[0])
+
+        CompositeOperation(remove_constraints_of(sandwich_cfm, subtree, index)).apply(
+            sandwich_cfm, index
+        )
+
+        assert all(
+            constraint.first_feature not in subtree
+            and constraint.second_feature not in subtree
+            for constraint in sandwich_cfm.constraints
+        )
+        assert all(not index.constraints_of(feature) for feature in subtree)
+
+    def test_constraint_positions(self, sandwich_cfm):
+        index = FeatureIndex(sandwich_cfm)
+        first, second = sandwich_cfm.constraints
+
+        def assert_positions():
+            for position, constraint in enumerate(sandwich_cfm.constraints):
+                assert (
+                    index.constraint_position(sandwich_cfm.constraints, constraint)
+                    == position
+                )
+
+        assert_positions()
+        AddConstraint(0, copy_cfm(sandwich_cfm).constraints[1]).apply(
+            sandwich_cfm, index
+        )
+        assert_positions()
+        RemoveConstraint(1).apply(sandwich_cfm, index)
+        assert_positions()
+        assert first not in sandwich_cfm.constraints
+
+        # Changes of the list made without the index are noticed
+        sandwich_cfm.constraints.insert(0, first)
+        assert_positions()
+        assert index.constraint_position(sandwich_cfm.constraints, second) == 2
+
+    def test_remove_constraints_of_reads_affected_positions(self, sandwich_cfm):
+        features = sandwich_cfm.features
+        for feature in features:
+            for other in features:
+                constraint = copy_cfm(sandwich_cfm).constraints[0]
+                constraint.first_feature, constraint.second_feature = feature, other
+                sandwich_cfm.constraints.append(constraint)
+        sandwich_cfm.constraints = CountingList(sandwich_cfm.constraints)
+        index = FeatureIndex(sandwich_cfm)
+        lettuce = find_feature(sandwich_cfm, "lettuce")
+        affected = len(index.constraints_of(lettuce))
+
+        sandwich_cfm.constraints.reads = 0
+        operations = remove_constraints_of(sandwich_cfm, [lettuce], index)
+
+        # Only the positions of the affected constraints are checked
+        assert (
+            sandwich_cfm.constraints.reads
+            == affected
+            < len(sandwich_cfm.constraints) / 3
+        )
+        CompositeOperation(operations).apply(sandwich_cfm, index)
+        assert not index.constraints_of(lettuce)
+        assert index_content(index) == index_content(FeatureIndex(sandwich_cfm))
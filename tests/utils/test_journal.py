@@ -0,0 +1,203 @@
+import pytest
+from cfmtoolbox_editor.utils import cfm_journal
+from cfmtoolbox_editor.utils.cfm_editor_undo_redo import UndoRedoManager
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_journal import (
+    Journal,
+    JournalError,
+    journal_path,
+    model_fingerprint,
+    read_journal,
+    replay_journal,
+)
+from cfmtoolbox_editor.utils.cfm_model_edits import (
+    ModelEditor,
+    add_feature,
+    delete_feature,
+)
+from cfmtoolbox_editor.utils.cfm_operations import CompositeOperation, RenameFeature
+from cfmtoolbox_editor.utils.cfm_utils import copy_cfm
+from tests.utils.test_operations import describe, operations
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def replay(path, cfm):
+    contents = read_journal(path)
+    assert contents.base == model_fingerprint(cfm)
+    return replay_journal(cfm, contents.records, FeatureIndex(cfm))
+
+
+class TestJournal:
+    """Test class for the edit journal"""
+
+    def test_journal_path(self, tmp_path):
+        assert journal_path(tmp_path / "model.uvl") == tmp_path / "model.uvl.journal"
+
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "add",
+            "remove",
+            "move",
+            "rename",
+            "cardinality",
+            "add_constraint",
+            "remove_constraint",
+            "edit_constraint",
+            "delete_subtree",
+        ],
+    )
+    def test_replay_operation(self, sandwich_cfm, tmp_path, name):
+        path = tmp_path / "model.journal"
+        recovered = copy_cfm(sandwich_cfm)
+        journal = Journal(path, model_fingerprint(sandwich_cfm))
+        expected_initial = describe(sandwich_cfm)
+
+        operation = operations(sandwich_cfm)[name]
+        operation.apply(sandwich_cfm, FeatureIndex(sandwich_cfm))
+        journal.append(operation)
+        journal.close()
+        applied = replay(path, recovered)
+
+        assert describe(recovered) == describe(sandwich_cfm)
+        # The replayed edits can be undone
+        CompositeOperation(applied).invert().apply(recovered)
+        assert describe(recovered) == expected_initial
+
+    def test_replay_edit_script(self, sandwich_cfm, tmp_path):
+        path = tmp_path / "model.journal"
+        recovered = copy_cfm(sandwich_cfm)
+        journal = Journal(path, model_fingerprint(sandwich_cfm))
+        editor = ModelEditor(sandwich_cfm)
+
+        # Edits that consist of several operations, which are appended when they have been applied
+        for edit, args in [
+            (editor.add_feature, ("sandwich", "sauce", "0,1")),
+            (editor.add_feature, ("sauce", "mayo")),
+            (editor.add_constraint, ("mayo", "lettuce", "1,1", "1,1", False)),
+            (editor.delete_feature, ("bread", True)),
+        ]:
+            edit(*args)
+            journal.append(editor.operations[-1])
+        journal.close()
+        replay(path, recovered)
+
+        assert describe(recovered) == describe(sandwich_cfm)
+
+    def test_checkpoint_compacts_the_journal(self, sandwich_cfm, tmp_path):
+        path = tmp_path / "model.journal"
+        recovered = copy_cfm(sandwich_cfm)
+        journal = Journal(path, model_fingerprint(sandwich_cfm), checkpoint_interval=3)
+        index = FeatureIndex(sandwich_cfm)
+
+        for number in range(5):
+            operation = RenameFeature(sandwich_cfm.root.name, f"sandwich{number}")
+            operation.apply(sandwich_cfm, index)
+            journal.append(operation, sandwich_cfm)
+        journal.close()
+
+        # Header, checkpoint after the third edit and the last two edits
+        assert len(path.read_bytes().splitlines()) == 4
+        assert read_journal(path).edits == 2
+        replay(path, recovered)
+        assert describe(recovered) == describe(sandwich_cfm)
+
+    def test_incomplete_last_record_is_ignored(self, sandwich_cfm, tmp_path):
+        path = tmp_path / "model.journal"
+        journal = Journal(path, model_fingerprint(sandwich_cfm))
+        journal.append(RenameFeature("bread", "toast"))
+        journal.append(RenameFeature("toast", "bun"))
+        journal.close()
+        content = path.read_bytes()
+
+        path.write_bytes(content[:-5])
+        assert read_journal(path).edits == 1
+
+        lines = content.splitlines(keepends=True)
+        path.write_bytes(lines[0] + lines[1][:-5] + b"\n" + lines[2])
+        with pytest.raises(JournalError):
+            read_journal(path)
+
+        path.write_bytes(b"sandwich {}\n")
+        with pytest.raises(JournalError):
+            read_journal(path)
+
+    def test_sync_is_batched(self, sandwich_cfm, tmp_path, monkeypatch):
+        syncs = []
+        monkeypatch.setattr(cfm_journal.os, "fsync", syncs.append)
+        clock = FakeClock()
+        journal = Journal(
+            tmp_path / "model.journal", "base", sync_interval=1.0, clock=clock
+        )
+        syncs.clear()
+
+        for number in range(10):
+            journal.append(RenameFeature(f"f{number}", f"f{number + 1}"))
+            clock.now += 0.25
+        # Synced while the edits were appended, the last ones are still pending
+        assert len(syncs) == 2
+        assert journal.pending
+
+        journal.sync()
+        assert len(syncs) == 3 and not journal.pending
+        journal.sync()
+        assert len(syncs) == 3
+
+    def test_undo_and_redo_are_recorded(self, sandwich_cfm, tmp_path):
+        path = tmp_path / "model.journal"
+        recovered = copy_cfm(sandwich_cfm)
+        journal = Journal(path, model_fingerprint(sandwich_cfm))
+        index = FeatureIndex(sandwich_cfm)
+        manager = UndoRedoManager(apply=journal.apply)
+        manager.set_initial_state(sandwich_cfm)
+        manager.add_state(sandwich_cfm)
+
+        # Deleting a feature moves its children to the parent. Undoing it adds the feature again and moves the
+        # children back, so the added feature has to be recorded before its children are moved back.
+        bread = index.get("bread")
+        for edit in (
+            delete_feature(sandwich_cfm, index, bread, delete_subtree=False),
+            add_feature(index, index.get("wheat"), "spelt"),
+        ):
+            journal.apply(edit.operation, sandwich_cfm, index)
+            manager.add_state(sandwich_cfm, edit.operation)
+        for step in (manager.undo, manager.undo, manager.redo, manager.undo):
+            step(index)
+        journal.close()
+        replay(path, recovered)
+
+        assert describe(recovered) == describe(sandwich_cfm)
+
+    def test_reset_is_recorded(self, sandwich_cfm, tmp_path):
+        path = tmp_path / "model.journal"
+        recovered = copy_cfm(sandwich_cfm)
+        journal = Journal(path, model_fingerprint(sandwich_cfm))
+        index = FeatureIndex(sandwich_cfm)
+        manager = UndoRedoManager(apply=journal.apply)
+        manager.set_initial_state(sandwich_cfm)
+        manager.add_state(sandwich_cfm)
+
+        journal.apply(RenameFeature("bread", "toast"), sandwich_cfm, index)
+        manager.add_state(sandwich_cfm, RenameFeature("bread", "toast"))
+        manager.reset(index)
+        journal.apply(RenameFeature("wheat", "rye"), sandwich_cfm, index)
+        journal.close()
+        replay(path, recovered)
+
+        assert describe(recovered) == describe(sandwich_cfm)
+
+    def test_close_removes_the_journal(self, tmp_path):
+        path = tmp_path / "model.journal"
+        journal = Journal(path, "base")
+        journal.append(RenameFeature("bread", "toast"))
+
+        journal.close(remove=True)
+
+        assert not path.exists()
@@ -0,0 +1,82 @@
+import time
+
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import GraphLayoutCalculator
+from cfmtoolbox_editor.utils.cfm_feature_index import feature_uid
+from cfmtoolbox_editor.utils.cfm_layout_worker import LayoutWorker, layout_snapshot
+
+
+class FakeWidget:
+    """Widget stand-in collecting the callbacks registered with after"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def run_until_idle(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.callbacks:
+            assert time.monotonic() < deadline, "No result within the timeout"
+            time.sleep(0.001)
+            self.callbacks.pop(0)()
+
+
+def test_layout_snapshot(sandwich_cfm):
+    bread = sandwich_cfm.root.children[0]
+    snapshot, size = layout_snapshot(sandwich_cfm, {feature_uid(bread): False})
+
+    assert size == len(sandwich_cfm.features) - len(bread.children)
+    assert [feature_uid(feature) for feature in snapshot.features] == [
+        feature_uid(feature)
+        for feature in sandwich_cfm.features
+        if feature.parent is not bread
+    ]
+    assert snapshot.root.children[0].children == []
+    # The model is not shared with the snapshot
+    assert bread.children
+
+
+def test_worker_delivers_latest_result(sandwich_cfm):
+    widget = FakeWidget()
+    worker = LayoutWorker(widget)
+    snapshot, _ = layout_snapshot(sandwich_cfm, {})
+    results = []
+
+    worker.submit(snapshot, 120, len, lambda positions: results.append(("old", 0)))
+    worker.submit(snapshot, 120, len, lambda positions: results.append(positions))
+    widget.run_until_idle()
+
+    expected = GraphLayoutCalculator(sandwich_cfm, {}, 120, len).compute_positions()
+    assert results == [expected]
+    assert not worker.busy
+
+
+def test_worker_cancel(sandwich_cfm):
+    widget = FakeWidget()
+    worker = LayoutWorker(widget)
+    snapshot, _ = layout_snapshot(sandwich_cfm, {})
+    results = []
+
+    worker.submit(snapshot, 120, len, results.append)
+    worker.cancel()
+    widget.run_until_idle()
+
+    assert results == []
+
+
+def test_worker_reports_errors(sandwich_cfm):
+    widget = FakeWidget()
+    worker = LayoutWorker(widget)
+    snapshot, _ = layout_snapshot(sandwich_cfm, {})
+    results, errors = [], []
+
+    def fail(name):
+        raise ValueError(name)
+
+    worker.submit(snapshot, 120, fail, results.append, on_error=errors.append)
+    widget.run_until_idle()
+
+    assert results == []
+    assert [type(error) for error in errors] == [ValueError]
+    assert not worker.busy
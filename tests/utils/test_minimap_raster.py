@@ -0,0 +1,62 @@
+from benchmarks.cfm_generators import generate_cfm
+from cfmtoolbox_editor.utils.cfm_calc_graph_Layout import GraphLayoutCalculator
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_minimap_raster import MinimapRaster
+from cfmtoolbox_editor.utils.cfm_model_edits import add_feature, delete_feature
+
+
+def layout(cfm):
+    return GraphLayoutCalculator(cfm, {}, 120).compute_positions()
+
+
+class TestMinimapRaster:
+    """Test class for the minimap rendering"""
+
+    def test_render(self, sandwich_cfm):
+        raster = MinimapRaster(40, 30)
+        positions = layout(sandwich_cfm)
+
+        raster.update(sandwich_cfm.features, positions)
+        image = raster.to_pgm()
+
+        assert image.startswith(b"P5 40 30 255\n")
+        assert len(image) == len(b"P5 40 30 255\n") + 40 * 30
+        assert not raster.changed
+        # Every feature is drawn inside the image
+        pixels = raster.pixels()
+        for position in positions.values():
+            x, y = raster.to_pixel(position.x, position.y)
+            assert 0 <= x < 40 and 0 <= y < 30
+            assert pixels[y * 40 + x] < 255
+        root = positions[next(iter(positions))]
+        x, y = raster.to_position(*raster.to_pixel(root.x, root.y))
+        assert abs(x - root.x) <= 1 / raster.scale
+        assert abs(y - root.y) <= 1 / raster.scale
+
+        # An unchanged layout does not change the image
+        raster.update(sandwich_cfm.features, positions)
+        assert not raster.changed
+
+    def test_incremental_updates(self):
+        cfm = generate_cfm("random", 2000)
+        index = FeatureIndex(cfm)
+        raster = MinimapRaster(200, 150)
+        raster.update(cfm.features, layout(cfm))
+        # Renders every layout from scratch with the same mapping
+        fresh = MinimapRaster(200, 150)
+        fresh.update(cfm.features, layout(cfm))
+
+        features = cfm.features
+        for number, feature in enumerate(features[100:1500:100]):
+            if number % 2:
+                delete_feature(cfm, index, feature, delete_subtree=number % 4 == 1)
+            else:
+                add_feature(index, feature, f"added{number}")
+            positions = layout(cfm)
+            raster.update(cfm.features, positions)
+
+            fresh._clear()
+            fresh.update(cfm.features, positions)
+            assert raster.pixels() == fresh.pixels()
+        # The model still fits into the area mapped first
+        assert raster.full_renders == 1
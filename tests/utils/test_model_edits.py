@@ -0,0 +1,158 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex
+from cfmtoolbox_editor.utils.cfm_model_edits import (
+    ModelEditError,
+    ModelEditor,
+    load_edit_script,
+)
+from cfmtoolbox_editor.utils.cfm_utils import copy_cfm
+from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_edit_str
+from tests.utils.test_operations import describe
+
+
+def group_cards(feature):
+    return (
+        cardinality_to_edit_str(feature.group_type_cardinality),
+        cardinality_to_edit_str(feature.group_instance_cardinality),
+    )
+
+
+class TestModelEditor:
+    """Test class for the headless edits"""
+
+    def test_add_feature_derives_group_cardinalities(self, sandwich_cfm):
+        editor = ModelEditor(sandwich_cfm)
+
+        editor.add_feature("sandwich", "sauce", "0,1")
+        editor.add_feature("sauce", "ketchup", "1,1")
+        sauce = editor.get_feature("sauce")
+        assert group_cards(sauce) == ("1,1", "1,1")
+
+        editor.add_feature("sauce", "mayo")
+        assert group_cards(sauce) == ("1,2", "1,*")
+        assert editor.get_feature("mayo").parent is sauce
+
+    def test_edit_feature(self, sandwich_cfm):
+        editor = ModelEditor(sandwich_cfm)
+
+        editor.edit_feature("lettuce", name="salad", cardinality="1,3")
+        salad = editor.get_feature("salad")
+        assert cardinality_to_edit_str(salad.instance_cardinality) == "1,3"
+        # Lettuce is the only veggie, so the group of veggies follows its cardinality
+        assert group_cards(salad.parent) == ("1,1", "1,3")
+        assert "lettuce" not in editor.index
+
+        editor.edit_feature("bread", group_type_cardinality="1,2")
+        assert group_cards(editor.get_feature("bread")) == ("1,2", "1,1")
+
+    @pytest.mark.parametrize(
+        "subtree, children", [(True, ["Cheesemix", "veggies"]), (False, None)]
+    )
+    def test_delete_feature(self, sandwich_cfm, subtree, children):
+        editor = ModelEditor(sandwich_cfm)
+
+        editor.delete_feature("bread", subtree=subtree)
+
+        names = [child.name for child in sandwich_cfm.root.children]
+        assert names == (children or ["sourdough", "wheat", "Cheesemix", "veggies"])
+        # Both constraints involve bread types, they are only deleted with the subtree
+        assert len(sandwich_cfm.constraints) == (0 if subtree else 2)
+
+    def test_batch_can_be_reverted(self, sandwich_cfm):
+        expected = describe(copy_cfm(sandwich_cfm))
+        editor = ModelEditor(sandwich_cfm)
+        editor.add_feature("Cheesemix", "gouda", "0,1")
+        editor.add_constraint("gouda", "wheat", require=False)
+        editor.delete_feature("veggies", subtree=True)
+
+        editor.operation.invert().apply(sandwich_cfm, editor.index)
+
+        assert describe(sandwich_cfm) == expected
+
+    @pytest.mark.parametrize(
+        "edit, message",
+        [
+            ({"action": "add_feature", "parent": "bread", "name": "wheat"}, "unique"),
+            ({"action": "add_feature", "parent": "toast", "name": "x"}, "Unknown"),
+            ({"action": "edit_feature", "feature": "wheat", "cardinality": "1"}, "Use"),
+            (
+                {
+                    "action": "edit_feature",
+                    "feature": "veggies",
+                    "group_type_cardinality": "1,1",
+                },
+                "Group",
+            ),
+            ({"action": "delete_feature", "feature": "sandwich"}, "root"),
+            ({"action": "add_constraint", "first": "wheat", "second": "wheat"}, "same"),
+            ({"action": "add_feature", "parent": "bread", "nam": "x"}, "nam"),
+            ({"action": "toast"}, "Unknown action"),
+            ({"action": []}, "Unknown action"),
+            ({"parent": "bread", "name": "x"}, "Unknown action"),
+            (
+                {"action": "add_feature", "parent": "bread", "name": 5},
+                "name must be a string",
+            ),
+            (
+                {
+                    "action": "add_feature",
+                    "parent": "bread",
+                    "name": "x",
+                    "cardinality": None,
+                },
+                "cardinality must be a string",
+            ),
+            (
+                {"action": "edit_feature", "feature": "wheat", "cardinality": [0, 1]},
+                "cardinality must be a string or null",
+            ),
+            (
+                {"action": "delete_feature", "feature": "bread", "subtree": "yes"},
+                "subtree must be true or false",
+            ),
+            (
+                {"action": "add_constraint", "first": {}, "second": "wheat"},
+                "first must be a string",
+            ),
+        ],
+    )
+    def test_invalid_edits(self, sandwich_cfm, edit, message):
+        edits = [{"action": "add_feature", "parent": "bread", "name": "rye"}, edit]
+
+        with pytest.raises(ModelEditError, match=message) as error:
+            ModelEditor(sandwich_cfm).run_script(edits)
+        assert str(error.value).startswith("Edit 2: ")
+
+    def test_run_script(self, sandwich_cfm):
+        edits = [
+            {"action": "add_feature", "parent": "veggies", "name": "tomato"},
+            {"action": "add_constraint", "first": "tomato", "second": "sourdough"},
+            {"action": "delete_feature", "feature": "veggies"},
+        ]
+        script = "\n".join(json.dumps(edit) for edit in edits)
+
+        assert load_edit_script(script) == load_edit_script(json.dumps(edits))
+        assert ModelEditor(sandwich_cfm).run_script(load_edit_script(script)) == 3
+        assert [child.name for child in sandwich_cfm.root.children] == [
+            "bread",
+            "Cheesemix",
+            "lettuce",
+            "tomato",
+        ]
+        assert (
+            len(FeatureIndex(sandwich_cfm).constraints_of(sandwich_cfm.features[-1]))
+            == 1
+        )
+
+
+def test_headless_import():
+    # The plugin and the edits must not need tkinter, which is unavailable without a display
+    code = (
+        "import sys; sys.modules['tkinter'] = None; "
+        "import cfmtoolbox_editor, cfmtoolbox_editor.utils.cfm_model_edits"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,207 @@
+import pytest
+from cfmtoolbox import Feature, Cardinality, Constraint, Interval
+from cfmtoolbox_editor.utils.cfm_editor_undo_redo import UndoRedoManager
+from cfmtoolbox_editor.utils.cfm_operations import (
+    AddConstraint,
+    AddFeature,
+    CompositeOperation,
+    EditConstraint,
+    MoveFeature,
+    RemoveConstraint,
+    RemoveFeature,
+    RenameFeature,
+    SetCardinality,
+    find_feature,
+    remove_constraints_of,
+)
+from cfmtoolbox_editor.utils.cfm_utils import cardinality_to_edit_str
+
+
+def describe(cfm):
+    """Structural description of a feature model that can be compared with =="""
+    features = [
+        (
+            feature.name,
+            feature.parent.name if feature.parent else None,
+            cardinality_to_edit_str(feature.instance_cardinality),
+            cardinality_to_edit_str(feature.group_type_cardinality),
+            cardinality_to_edit_str(feature.group_instance_cardinality),
+            [child.name for child in feature.children],
+        )
+        for feature in cfm.features
+    ]
+    constraints = [
+        (
+            constraint.require,
+            constraint.first_feature.name,
+            cardinality_to_edit_str(constraint.first_cardinality),
+            constraint.second_feature.name,
+            cardinality_to_edit_str(constraint.second_cardinality),
+        )
+        for constraint in cfm.constraints
+    ]
+    # Constraints must point to the features of the model itself
+    model_features = {id(feature) for feature in cfm.features}
+    assert all(
+        id(constraint.first_feature) in model_features
+        and id(constraint.second_feature) in model_features
+        for constraint in cfm.constraints
+    )
+    return features, constraints
+
+
+def new_feature(name):
+    return Feature(
+        name=name,
+        instance_cardinality=Cardinality([Interval(0, 1)]),
+        group_type_cardinality=Cardinality([]),
+        group_instance_cardinality=Cardinality([]),
+        parent=None,
+        children=[],
+    )
+
+
+def operations(cfm):
+    bread = find_feature(cfm, "bread")
+    return {
+        "add": AddFeature("bread", 1, new_feature("rye")),
+        "remove": CompositeOperation(
+            [
+                *remove_constraints_of(cfm, [find_feature(cfm, "lettuce")]),
+                RemoveFeature("veggies", 0),
+            ]
+        ),
+        "move": MoveFeature("bread", 1, "veggies", 0),
+        "rename": RenameFeature("bread", "toast"),
+        "cardinality": SetCardinality(
+            "bread",
+            "instance_cardinality",
+            bread.instance_cardinality,
+            Cardinality([Interval(1, None)]),
+        ),
+        "add_constraint": AddConstraint(
+            0,
+            Constraint(
+                require=False,
+                first_feature=bread,
+                first_cardinality=Cardinality([Interval(1, 1)]),
+                second_feature=find_feature(cfm, "lettuce"),
+                second_cardinality=Cardinality([Interval(1, 1)]),
+            ),
+        ),
+        "remove_constraint": RemoveConstraint(1),
+        "edit_constraint": EditConstraint(
+            0,
+            cfm.constraints[0],
+            Constraint(
+                require=not cfm.constraints[0].require,
+                first_feature=find_feature(cfm, "wheat"),
+                first_cardinality=Cardinality([Interval(0, 2)]),
+                second_feature=find_feature(cfm, "sourdough"),
+                second_cardinality=Cardinality([Interval(1, None)]),
+            ),
+        ),
+        "delete_subtree": CompositeOperation(
+            [
+                *remove_constraints_of(cfm, [bread, *bread.children]),
+                RemoveFeature("sandwich", 0),
+            ]
+        ),
+    }
+
+
+class TestOperations:
+    """Test class for the reversible edit operations"""
+
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "add",
+            "remove",
+            "move",
+            "rename",
+            "cardinality",
+            "add_constraint",
+            "remove_constraint",
+            "edit_constraint",
+            "delete_subtree",
+        ],
+    )
+    def test_apply_and_invert(self, sandwich_cfm, name):
+        before = describe(sandwich_cfm)
+        operation = operations(sandwich_cfm)[name]
+
+        operation.apply(sandwich_cfm)
+        after = describe(sandwich_cfm)
+        assert after != before
+
+        operation.invert().apply(sandwich_cfm)
+        assert describe(sandwich_cfm) == before
+
+        operation.apply(sandwich_cfm)
+        assert describe(sandwich_cfm) == after
+
+    def test_move_feature(self, sandwich_cfm):
+        MoveFeature("bread", 1, "veggies", 0).apply(sandwich_cfm)
+
+        wheat = find_feature(sandwich_cfm, "wheat")
+        assert wheat.parent.name == "veggies"
+        assert [child.name for child in wheat.parent.children] == ["wheat", "lettuce"]
+
+    def test_remove_constraints_of(self, sandwich_cfm):
+        bread = find_feature(sandwich_cfm, "bread")
+        CompositeOperation(remove_constraints_of(sandwich_cfm, bread.children)).apply(
+            sandwich_cfm
+        )
+
+        assert all(
+            constraint.first_feature not in bread.children
+            and constraint.second_feature not in bread.children
+            for constraint in sandwich_cfm.constraints
+        )
+
+    def test_find_unknown_feature(self, sandwich_cfm):
+        with pytest.raises(ValueError):
+            find_feature(sandwich_cfm, "ketchup")
+
+
+class TestOperationHistory:
+    """Test class for UndoRedoManager with an operation log"""
+
+    def test_undo_redo_operations(self, sandwich_cfm):
+        manager = UndoRedoManager()
+        manager.add_state(sandwich_cfm)
+        states = [describe(sandwich_cfm)]
+        for name in ["cardinality", "add", "edit_constraint", "delete_subtree"]:
+            operation = operations(sandwich_cfm)[name]
+            operation.apply(sandwich_cfm)
+            manager.add_state(sandwich_cfm, operation)
+            states.append(describe(sandwich_cfm))
+
+        # Operations are undone in place, without copying the model
+        for state in reversed(states[:-1]):
+            assert manager.undo() is sandwich_cfm
+            assert describe(sandwich_cfm) == state
+        assert manager.undo() is None
+
+        for state in states[1:]:
+            assert manager.redo() is sandwich_cfm
+            assert describe(sandwich_cfm) == state
+        assert manager.redo() is None
+
+    def test_undo_snapshot_replays_operations(self, sandwich_cfm):
+        manager = UndoRedoManager()
+        manager.set_initial_state(sandwich_cfm)
+        manager.add_state(sandwich_cfm)
+        initial = describe(sandwich_cfm)
+
+        operation = operations(sandwich_cfm)["move"]
+        operation.apply(sandwich_cfm)
+        manager.add_state(sandwich_cfm, operation)
+        moved = describe(sandwich_cfm)
+
+        manager.reset()
+        assert describe(manager.undo()) == moved
+        assert describe(manager.undo()) == initial
+        assert describe(manager.redo()) == moved
+        assert describe(manager.redo()) == initial
@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+from cfmtoolbox_editor.utils import cfm_profiler
+from cfmtoolbox_editor.utils.cfm_profiler import Profiler, Span, profiled
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def profiler(clock):
+    profiler = Profiler(clock)
+    profiler.enable()
+    return profiler
+
+
+class TestProfiler:
+    """Test class for the profiler"""
+
+    def test_disabled_profiler_records_nothing(self, clock):
+        profiler = Profiler(clock)
+
+        with profiler.span("draw_model"):
+            clock.now += 1
+
+        assert profiler.stats == {}
+        assert profiler.last_frame == []
+
+    def test_nested_spans_form_a_frame(self, profiler, clock):
+        frames = []
+        profiler.add_frame_listener(frames.append)
+
+        with profiler.span("redraw"):
+            with profiler.span("draw_model"):
+                clock.now += 0.002
+                with profiler.span("compute_positions"):
+                    clock.now += 0.001
+            with profiler.span("update_constraints"):
+                clock.now += 0.004
+
+        assert frames == [
+            [
+                Span("redraw", 0.007, 0),
+                Span("draw_model", 0.003, 1),
+                Span("compute_positions", 0.001, 2),
+                Span("update_constraints", 0.004, 1),
+            ]
+        ]
+        assert profiler.last_frame == frames[0]
+
+    def test_stats(self, profiler, clock):
+        for duration in (0.002, 0.006, 0.004):
+            with profiler.span("add_state"):
+                clock.now += duration
+
+        stats = profiler.stats["add_state"]
+        assert stats.calls == 3
+        assert stats.total == pytest.approx(0.012)
+        assert stats.mean == pytest.approx(0.004)
+        assert stats.max == pytest.approx(0.006)
+        assert stats.last == pytest.approx(0.004)
+        assert "add_state" in profiler.summary()
+
+    def test_background_spans_are_added_to_the_next_frame(self, profiler, clock):
+        spans = []
+
+        def background():
+            with profiler.span("compute_positions"):
+                pass
+            spans.append(profiler.last_frame)
+
+        thread = threading.Thread(target=background)
+        thread.start()
+        thread.join()
+        with profiler.span("draw_layout"):
+            pass
+
+        assert spans == [[]]
+        assert profiler.last_frame == [
+            Span("compute_positions", 0.0, 0, background=True),
+            Span("draw_layout", 0.0, 0),
+        ]
+
+    @pytest.mark.parametrize(
+        "value, enabled, overlay",
+        [("", False, False), ("0", False, False), ("1", True, False)]
+        + [("overlay", True, True)],
+    )
+    def test_configure_from_environment(self, clock, value, enabled, overlay):
+        profiler = Profiler(clock)
+
+        profiler.configure_from_environment({"CFM_EDITOR_PROFILE": value})
+
+        assert (profiler.enabled, profiler.overlay) == (enabled, overlay)
+
+
+def test_profiled(monkeypatch, profiler):
+    monkeypatch.setattr(cfm_profiler, "profiler", profiler)
+
+    @profiled("double")
+    def double(value):
+        return 2 * value
+
+    assert double(21) == 42
+    assert profiler.stats["double"].calls == 1
+
+    profiler.disable()
+    assert double(1) == 2
+    assert profiler.stats["double"].calls == 1
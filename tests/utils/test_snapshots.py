@@ -0,0 +1,188 @@
+import pytest
+from benchmarks.cfm_generators import balanced_cfm
+from cfmtoolbox import CFM, Cardinality, Feature, Interval
+from cfmtoolbox_editor.utils import cfm_snapshots
+from cfmtoolbox_editor.utils.cfm_feature_index import FeatureIndex, feature_uid
+from cfmtoolbox_editor.utils.cfm_operations import (
+    AddFeature,
+    RemoveFeature,
+    RenameFeature,
+)
+from cfmtoolbox_editor.utils.cfm_snapshots import ModelSnapshot, mark_changed
+from tests.utils.test_operations import describe, operations
+
+
+def leaf(name):
+    return Feature(
+        name=name,
+        instance_cardinality=Cardinality([Interval(0, 1)]),
+        group_type_cardinality=Cardinality([]),
+        group_instance_cardinality=Cardinality([]),
+        parent=None,
+        children=[],
+    )
+
+
+def apply_and_mark(operation, cfm, index):
+    """Apply an operation and return the ids of the features it changed, like the undo history tracks them"""
+    operation.apply(cfm, index)
+    changed = set()
+    features = (index.get(name) for name in operation.changed_names())
+    mark_changed(changed, (feature for feature in features if feature is not None))
+    return changed
+
+
+class TestModelSnapshot:
+    """Test class for the persistent snapshots"""
+
+    def test_round_trip(self, sandwich_cfm):
+        snapshot = ModelSnapshot.from_cfm(sandwich_cfm)
+        expected = describe(sandwich_cfm)
+
+        # Changes to the model do not affect the snapshot
+        sandwich_cfm.root.children[0].instance_cardinality.intervals[0].upper = 9
+        sandwich_cfm.constraints.clear()
+        restored = snapshot.to_cfm()
+
+        assert describe(restored) == expected
+        assert [feature_uid(feature) for feature in restored.features] == [
+            feature_uid(feature) for feature in sandwich_cfm.features
+        ]
+        # Every restored model is independent of the others
+        assert restored.root is not snapshot.to_cfm().root
+
+    def test_unchanged_subtrees_are_shared(self, sandwich_cfm):
+        index = FeatureIndex(sandwich_cfm)
+        previous = ModelSnapshot.from_cfm(sandwich_cfm)
+
+        AddFeature("Cheesemix", 0, leaf("brie")).apply(sandwich_cfm, index)
+        snapshot = ModelSnapshot.from_cfm(sandwich_cfm, previous)
+
+        bread, cheesemix, veggies = snapshot.root.children
+        old_bread, old_cheesemix, old_veggies = previous.root.children
+        # Only the path from the root to the changed feature is new
+        assert snapshot.root is not previous.root
+        assert cheesemix is not old_cheesemix
+        assert bread is old_bread and veggies is old_veggies
+        assert all(
+            new is old
+            for new, old in zip(cheesemix.children[1:], old_cheesemix.children)
+        )
+        assert snapshot.constraints[0] is previous.constraints[0]
+        assert 0 < snapshot.size < previous.size
+        assert snapshot.full_size() > previous.full_size()
+
+    def test_renamed_feature(self, sandwich_cfm):
+        previous = ModelSnapshot.from_cfm(sandwich_cfm)
+
+        RenameFeature("wheat", "rye").apply(sandwich_cfm)
+        restored = ModelSnapshot.from_cfm(sandwich_cfm, previous).to_cfm()
+
+        assert describe(restored) == describe(sandwich_cfm)
+        assert "wheat" in [feature.name for feature in previous.to_cfm().features]
+
+    def test_deep_model(self):
+        root = feature = leaf("f0")
+        for number in range(1, 5000):
+            child = leaf(f"f{number}")
+            child.parent = feature
+            feature.children.append(child)
+            feature = child
+        cfm = CFM(root=root, constraints=[])
+
+        restored = ModelSnapshot.from_cfm(cfm).to_cfm()
+
+        assert restored.features[-1].name == "f4999"
+
+
+class TestChangedPaths:
+    """Test class for snapshots that visit only the paths of the changed features"""
+
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "add",
+            "remove",
+            "move",
+            "rename",
+            "cardinality",
+            "add_constraint",
+            "remove_constraint",
+            "edit_constraint",
+            "delete_subtree",
+        ],
+    )
+    def test_same_as_full_comparison(self, sandwich_cfm, name):
+        index = FeatureIndex(sandwich_cfm)
+        previous = ModelSnapshot.from_cfm(sandwich_cfm)
+        operation = operations(sandwich_cfm)[name]
+
+        changed = apply_and_mark(operation, sandwich_cfm, index)
+        snapshot = ModelSnapshot.from_cfm(
+            sandwich_cfm, previous, changed, operation.changes_constraints()
+        )
+        assert describe(snapshot.to_cfm()) == describe(sandwich_cfm)
+        if not operation.changes_constraints():
+            assert snapshot.constraints is previous.constraints
+
+        inverse = operation.invert()
+        changed = apply_and_mark(inverse, sandwich_cfm, index)
+        restored = ModelSnapshot.from_cfm(
+            sandwich_cfm, snapshot, changed, inverse.changes_constraints()
+        )
+        assert describe(restored.to_cfm()) == describe(previous.to_cfm())
+
+    def test_detached_constraint_features(self, sandwich_cfm):
+        index = FeatureIndex(sandwich_cfm)
+        previous = ModelSnapshot.from_cfm(sandwich_cfm)
+        veggies = index.get("veggies")
+        lettuce = veggies.children[0]
+        assert any(
+            lettuce in (constraint.first_feature, constraint.second_feature)
+            for constraint in sandwich_cfm.constraints
+        )
+
+        # The constraints of the removed feature are kept, so it is stored as a detached feature
+        operation = RemoveFeature("veggies", 0)
+        changed = apply_and_mark(operation, sandwich_cfm, index)
+        snapshot = ModelSnapshot.from_cfm(sandwich_cfm, previous, changed, False)
+        assert [node.uid for node in snapshot.detached] == [feature_uid(lettuce)]
+        assert snapshot.detached[0].name == "lettuce"
+
+        changed = apply_and_mark(operation.invert(), sandwich_cfm, index)
+        restored = ModelSnapshot.from_cfm(sandwich_cfm, snapshot, changed, False)
+        assert restored.detached == ()
+        assert describe(restored.to_cfm()) == describe(previous.to_cfm())
+
+    def test_cost_is_proportional_to_the_path(self, monkeypatch):
+        cfm = balanced_cfm(20000)
+        index = FeatureIndex(cfm)
+        previous = ModelSnapshot.from_cfm(cfm)
+        leaf = cfm.features[-1]
+        depth = 0
+        while leaf.parent is not None:
+            leaf, depth = leaf.parent, depth + 1
+        leaf = cfm.features[-1]
+
+        created = []
+        create = cfm_snapshots._Builder._node
+
+        def counted(self, feature, old, children):
+            created.append(feature.name)
+            return create(self, feature, old, children)
+
+        monkeypatch.setattr(cfm_snapshots._Builder, "_node", counted)
+        changed = apply_and_mark(RenameFeature(leaf.name, "renamed"), cfm, index)
+        snapshot = ModelSnapshot.from_cfm(cfm, previous, changed)
+
+        # Only the nodes from the root to the renamed leaf are visited
+        assert len(created) == depth + 1
+        assert created[0] == "renamed" and created[-1] == cfm.root.name
+        assert (
+            sum(
+                new is not old
+                for new, old in zip(snapshot.root.children, previous.root.children)
+            )
+            == 1
+        )
+        assert describe(snapshot.to_cfm()) == describe(cfm)
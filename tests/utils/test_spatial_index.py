@@ -0,0 +1,46 @@
+from cfmtoolbox_editor.utils.cfm_spatial_index import SpatialGrid
+
+
+class TestSpatialGrid:
+    """Test class for SpatialGrid"""
+
+    def test_query_finds_intersecting_items(self):
+        grid = SpatialGrid(cell_size=100)
+        grid.insert("left", (0, 0, 50, 50))
+        grid.insert("right", (1000, 0, 1050, 50))
+        grid.insert("wide", (-500, 200, 1500, 220))
+        grid.insert("negative", (-300, -300, -250, -250))
+
+        assert grid.query((-10, -10, 60, 60)) == {"left"}
+        assert grid.query((900, 0, 1100, 300)) == {"right", "wide"}
+        assert grid.query((-400, -400, -200, -200)) == {"negative"}
+        assert grid.query((400, 0, 600, 100)) == set()
+        assert len(grid) == 4
+
+    def test_query_checks_bounding_boxes_within_cells(self):
+        grid = SpatialGrid(cell_size=1000)
+        grid.insert("a", (0, 0, 10, 10))
+
+        # Same cell, but no intersection
+        assert grid.query((20, 20, 30, 30)) == set()
+        # Touching edges intersect
+        assert grid.query((10, 10, 30, 30)) == {"a"}
+
+    def test_items_spanning_many_cells(self):
+        grid = SpatialGrid(cell_size=100, max_cells=4)
+        grid.insert("edge", (0, 0, 1_000_000, 10))
+        grid.insert("node", (500, 0, 550, 50))
+
+        # The edge is not registered in its 10001 cells, but found by every query it intersects
+        assert len(grid._cells) == 1
+        assert grid.query((500_000, 0, 500_100, 100)) == {"edge"}
+        assert grid.query((500, 0, 600, 100)) == {"edge", "node"}
+        assert grid.query((0, 100, 1000, 200)) == set()
+
+    def test_clear(self):
+        grid = SpatialGrid()
+        grid.insert("a", (0, 0, 10, 10))
+        grid.clear()
+
+        assert grid.query((0, 0, 10, 10)) == set()
+        assert len(grid) == 0
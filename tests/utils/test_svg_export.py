@@ -0,0 +1,77 @@
+import subprocess
+import sys
+from xml.etree import ElementTree
+
+import pytest
+from benchmarks.cfm_generators import generate_cfm
+from cfmtoolbox_editor.utils.cfm_operations import RenameFeature
+from cfmtoolbox_editor.utils.cfm_svg_export import SvgExporter, export_svg
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def parse(path):
+    return ElementTree.parse(path).getroot()
+
+
+def names(svg):
+    # The full names of the drawn nodes, truncated names have them as a title
+    return [
+        text.findtext(f"{SVG}title", text.text)
+        for text in svg.iter(f"{SVG}text")
+        if text.get("class") is None
+    ]
+
+
+class TestSvgExporter:
+    """Test class for the SVG export"""
+
+    def test_export(self, sandwich_cfm, tmp_path):
+        long_name = "a_feature_with_a_very_long_name_that_is_truncated"
+        RenameFeature("lettuce", long_name).apply(sandwich_cfm)
+
+        (path,) = export_svg(sandwich_cfm, tmp_path / "sandwich.svg")
+        svg = parse(path)
+
+        features = sandwich_cfm.features
+        # A node per feature and an edge per child, the instance cardinality of the root is not shown
+        assert len(svg.findall(f".//{SVG}g[@class='features']/{SVG}rect")) == len(
+            features
+        )
+        assert len(list(svg.iter(f"{SVG}line"))) == len(features) - 1
+        assert len(svg.findall(f".//{SVG}path[@class='arc']")) == 2
+        assert "⟨0, 1⟩" in [text.text for text in svg.iter(f"{SVG}text")]
+        # Long names are truncated like on the canvas, with the full name as a tooltip
+        truncated = next(
+            text for text in svg.iter(f"{SVG}text") if text.text.endswith("...")
+        )
+        assert truncated.find(f"{SVG}title").text == long_name
+        assert sorted(names(svg)) == sorted(feature.name for feature in features)
+
+    def test_tiles(self, tmp_path):
+        cfm = generate_cfm("balanced", 500)
+        exporter = SvgExporter(cfm)
+
+        tiles = exporter.export_tiles(tmp_path / "model.svg", 2000, 400)
+
+        assert len(tiles) > 1
+        assert all(tile.name.startswith("model_r") for tile in tiles)
+        drawn = []
+        for tile in tiles:
+            svg = parse(tile)
+            assert svg.get("width") == "2000" and svg.get("height") == "400"
+            drawn.extend(names(svg))
+        # Every node is drawn in some tile, nodes on the border of tiles in several
+        assert set(drawn) == {feature.name for feature in cfm.features}
+        assert len(drawn) < 1.5 * len(cfm.features)
+
+        with pytest.raises(ValueError):
+            exporter.export_tiles(tmp_path / "model.svg", 0, 200)
+
+    def test_export_without_tk(self):
+        # The export runs in batch jobs without a display, so it must not load Tk
+        code = (
+            "import sys, cfmtoolbox_editor, cfmtoolbox_editor.utils.cfm_svg_export; "
+            "sys.exit('tkinter' in sys.modules)"
+        )
+        assert subprocess.run([sys.executable, "-c", code]).returncode == 0
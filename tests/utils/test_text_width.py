@@ -0,0 +1,75 @@
+from cfmtoolbox_editor.utils.cfm_text_width import (
+    CharacterWidthTable,
+    TextWidthCache,
+)
+
+
+class FixedWidthFont:
+    """Font stand-in measuring every character as 7 pixels and counting the measurements"""
+
+    def __init__(self, name="TkDefaultFont"):
+        self.name = name
+        self.measured: list[str] = []
+
+    def measure(self, text):
+        self.measured.append(text)
+        return 7 * len(text)
+
+    def __str__(self):
+        return self.name
+
+
+class TestTextWidthCache:
+    """Test class for TextWidthCache"""
+
+    def test_measure_is_cached_per_font_and_text(self):
+        cache = TextWidthCache()
+        font, bold_font = FixedWidthFont(), FixedWidthFont("bold")
+
+        assert cache.measure(font, "sandwich") == 56
+        assert cache.measure(font, "sandwich") == 56
+        assert cache.measure(bold_font, "sandwich") == 56
+        assert font.measured == ["sandwich"]
+        assert bold_font.measured == ["sandwich"]
+
+    def test_fitting_prefix(self):
+        cache = TextWidthCache()
+        font = FixedWidthFont()
+        name = "a_feature_with_a_very_long_name"
+
+        # 15 characters plus the suffix fit into 18 * 7 pixels
+        prefix = cache.fitting_prefix(font, name, "...", 18 * 7)
+        assert prefix == name[:15]
+
+        # Binary search over the prefix lengths, repeated calls are answered from the cache
+        assert len(font.measured) <= 5
+        measured = len(font.measured)
+        assert cache.fitting_prefix(font, name, "...", 18 * 7) == prefix
+        assert len(font.measured) == measured
+
+    def test_fitting_prefix_is_proper_prefix(self):
+        cache = TextWidthCache()
+        font = FixedWidthFont()
+
+        assert cache.fitting_prefix(font, "bread", "...", 1000) == "bread"[:-1]
+        assert cache.fitting_prefix(font, "bread", "...", 10) == ""
+
+
+class TestCharacterWidthTable:
+    """Test class for CharacterWidthTable"""
+
+    def test_measure_default_table(self):
+        widths = CharacterWidthTable()
+
+        assert widths.measure("") == 0
+        assert widths.measure("mmm") > widths.measure("iii")
+        assert widths.measure("ä") == widths.default_width
+
+    def test_from_font(self):
+        font = FixedWidthFont()
+        widths = CharacterWidthTable.from_font(font)
+        measured = len(font.measured)
+
+        assert widths.measure("sandwich") == 56
+        assert len(font.measured) == measured
+        assert str(widths) == "table:TkDefaultFont"